@@ -1,10 +1,71 @@
 import { spawn, type ChildProcess } from "child_process";
 import path from "path";
 import { app } from "electron";
-import { isDev, getPythonCommand } from "../util.js";
+import { isDev, getPythonCommand, isJsonIpc, runtimeStatsArgs } from "../util.js";
+import { AppState } from "./state.js";
+import { emitStat } from "./tracing.js";
+import {
+  FrameDecoder,
+  encodeActions,
+  encodeCommand,
+  encodeRegister,
+  decodeAcks,
+  decodeDone,
+  decodeRegistered,
+  decodeCommanded,
+  OP_READY,
+  OP_REGISTERED,
+  OP_ACKS,
+  OP_DONE,
+  OP_COMMANDED,
+  ACK_ACCEPTED,
+  ACK_STATUS_NAMES,
+  DONE_COMPLETED,
+  MAX_BATCH,
+  type FrameAction,
+} from "./ipcFrames.js";
+import type { ReservedCommand } from "./reservedPhrases.js";
 
 let child: ChildProcess | null = null;
 
+// Binary protocol (default; PHONIX_JSON_IPC=1 falls back to JSON lines): keymaps are
+// uploaded once under integer IDs, actions queued in the same tick go out as one frame,
+// and the bridge acks each action and reports when it has finished playing
+let binary = false;
+let keymapIds = new Map<string, number>();
+let pendingActions: FrameAction[] = [];
+let flushQueued = false;
+let nextSeq = 1;
+const inFlight = new Map<number, { trace?: string }>();
+// Virtual controllers the running bridge was started with
+let bridgePads = 1;
+
+// "normal" priority class on the wire (src/python/queue_policy.py)
+const PRIORITY_NORMAL = 1;
+// Keymap IDs are u16 on the wire
+const MAX_KEYMAP_ID = 0xffff;
+
+// On stop, how long the bridge gets to release everything and exit by itself before it is killed
+const BRIDGE_EXIT_TIMEOUT_MS = 2000;
+// Bridge processes that acknowledged a release_all (binary protocol); kept per process so a
+// bridge still shutting down can't answer for the one stopped after it
+const releaseAcked = new WeakSet<ChildProcess>();
+
+export interface ActionResult {
+  seq: number;
+  completed: boolean; // false if preempted by a conflicting keymap or release_all
+  startDelayMs: number | null; // bridge intake to first controller step; null if it never started
+  playMs: number;
+}
+
+const doneListeners = new Set<(result: ActionResult) => void>();
+
+// Get told when each action sent over the binary protocol has finished playing
+export function onActionDone(listener: (result: ActionResult) => void): () => void {
+  doneListeners.add(listener);
+  return () => doneListeners.delete(listener);
+}
+
 export function startControllerBridge() {
   if (child) return; // already running
 
@@ -12,14 +73,40 @@ export function startControllerBridge() {
     ? path.join(process.cwd(), "src", "python", "controller_bridge.py")
     : path.join(path.dirname(app.getPath("exe")), "src", "python", "controller_bridge.py");
 
-  child = spawn(getPythonCommand(), [scriptPath], {
+  // Pass the profile so the bridge can compile its keymaps before the first command
+  const args = AppState.profileFilePath ? [scriptPath, "--profile", AppState.profileFilePath] : [scriptPath];
+  // One virtual controller per pad the profile addresses
+  bridgePads = profilePadCount();
+  if (bridgePads > 1) {
+    args.push("--pads", String(bridgePads));
+  }
+  binary = !isJsonIpc();
+  if (binary) {
+    args.push("--binary");
+  }
+  args.push(...runtimeStatsArgs(1));
+  keymapIds = new Map();
+  pendingActions = [];
+  inFlight.clear();
+
+  const proc = spawn(getPythonCommand(), args, {
     stdio: ["pipe", "pipe", "pipe"],
   });
+  child = proc;
 
   if (child.stdout) {
-    child.stdout.on("data", (data) => {
-      console.log("[ControllerBridge python]", data.toString().trim());
-    });
+    if (binary) {
+      const decoder = new FrameDecoder();
+      child.stdout.on("data", (data: Buffer) => {
+        for (const frame of decoder.push(data)) {
+          handleFrame(proc, frame.opcode, frame.payload);
+        }
+      });
+    } else {
+      child.stdout.on("data", (data) => {
+        console.log("[ControllerBridge python]", data.toString().trim());
+      });
+    }
   }
 
   if (child.stderr) {
@@ -30,7 +117,10 @@ export function startControllerBridge() {
 
   child.on("exit", (code) => {
     console.log("[ControllerBridge] exited with code", code);
-    child = null;
+    // A bridge that is still shutting down may exit after the next one has started
+    if (child === proc) {
+      child = null;
+    }
     if (code !== 0 && code !== null) {
       // If exited with error (e.g. failed retries), notify the app to stop
       import("./session.js").then(({ stopSession }) => {
@@ -38,16 +128,179 @@ export function startControllerBridge() {
       });
     }
   });
+
+  if (binary) {
+    registerProfileKeymaps();
+  }
+}
+
+function profilePadCount(): number {
+  return Math.max(0, ...Object.values(AppState.pads)) + 1;
+}
+
+function writeFrame(data: Buffer) {
+  child?.stdin?.write(data);
+}
+
+function assignKeymapId(keymap: string): number {
+  const id = keymapIds.size + 1;
+  if (id > MAX_KEYMAP_ID) {
+    throw new RangeError(`at most ${MAX_KEYMAP_ID} keymaps per bridge`);
+  }
+  keymapIds.set(keymap, id);
+  return id;
+}
+
+// Once reloads and ad-hoc keymaps have used up the IDs, number keymaps from 1 again. The bridge
+// replaces a keymap registered under an ID it already has; actions queued under the old IDs go first.
+function resetKeymapIds() {
+  flushActions();
+  keymapIds = new Map();
+}
+
+// Upload every profile keymap the bridge doesn't have yet; actions then refer to them by ID
+function registerProfileKeymaps() {
+  const profileKeymaps = [...new Set(Object.values(AppState.mappings))];
+  let missing = profileKeymaps.filter((keymap) => !keymapIds.has(keymap));
+  if (keymapIds.size + missing.length > MAX_KEYMAP_ID) {
+    resetKeymapIds();
+    missing = profileKeymaps;
+  }
+  const keymaps = missing.map((keymap): [number, string] => [assignKeymapId(keymap), keymap]);
+  if (keymaps.length) {
+    writeFrame(encodeRegister(keymaps));
+  }
 }
 
-export function sendActionToController(action: string) {
+// Pick up reloaded mappings without restarting the bridge: new keymaps are uploaded
+// (JSON lines carry each keymap anyway). Pads need a restart, which the caller can check.
+export function reloadControllerProfile(): boolean {
+  if (!child) return true;
+  if (binary) {
+    flushActions();
+    registerProfileKeymaps();
+  }
+  return profilePadCount() <= bridgePads;
+}
+
+function flushActions() {
+  flushQueued = false;
+  while (pendingActions.length) {
+    writeFrame(encodeActions(pendingActions.splice(0, MAX_BATCH)));
+  }
+}
+
+function handleFrame(proc: ChildProcess, opcode: number, payload: Buffer) {
+  switch (opcode) {
+    case OP_READY:
+      console.log("[ControllerBridge] ready");
+      break;
+    case OP_REGISTERED: {
+      const { compiled, failed } = decodeRegistered(payload);
+      console.log("[ControllerBridge] registered", compiled, "keymaps");
+      if (failed.length) {
+        console.warn("[ControllerBridge] keymaps rejected by the bridge:", failed);
+      }
+      break;
+    }
+    case OP_ACKS:
+      for (const ack of decodeAcks(payload)) {
+        if (ack.status !== ACK_ACCEPTED) {
+          inFlight.delete(ack.seq);
+          console.warn(`[ControllerBridge] action ${ack.seq} not played: ${ACK_STATUS_NAMES[ack.status] ?? ack.status}`);
+        }
+      }
+      break;
+    case OP_DONE:
+      for (const done of decodeDone(payload)) {
+        const sent = inFlight.get(done.seq);
+        inFlight.delete(done.seq);
+        if (sent?.trace) {
+          emitStat(sent.trace, "action_done");
+        }
+        const result: ActionResult = {
+          seq: done.seq,
+          completed: done.outcome === DONE_COMPLETED,
+          startDelayMs: done.startDelayMs,
+          playMs: done.playMs,
+        };
+        for (const listener of doneListeners) {
+          listener(result);
+        }
+      }
+      break;
+    case OP_COMMANDED: {
+      const { command, cancelled } = decodeCommanded(payload);
+      console.log(`[ControllerBridge] ${command} done: cancelled ${cancelled} keymaps`);
+      if (command === "release_all") {
+        releaseAcked.add(proc);
+      }
+      break;
+    }
+    default:
+      console.warn("[ControllerBridge] unknown frame opcode:", opcode);
+  }
+}
+
+// Plays on the given controller (default 0, the first). Returns the action's sequence
+// number (binary protocol only), as used in onActionDone results
+export function sendActionToController(action: string, trace?: string, pad = 0): number | undefined {
   if (!child || !child.stdin) {
     console.warn("[ControllerBridge] not running; cannot send:", action);
+    return undefined;
+  }
+
+  if (!binary) {
+    // ts lets the bridge drop actions that are too old to be worth playing
+    const msg: Record<string, unknown> = { action, ts: Date.now() };
+    if (trace) {
+      msg.trace = trace;
+    }
+    if (pad) {
+      msg.pad = pad;
+    }
+    child.stdin.write(JSON.stringify(msg) + "\n");
+    return undefined;
+  }
+
+  let keymapId = keymapIds.get(action);
+  if (keymapId === undefined && keymapIds.size >= MAX_KEYMAP_ID) {
+    resetKeymapIds();
+    registerProfileKeymaps();
+    keymapId = keymapIds.get(action);
+  }
+  if (keymapId === undefined) {
+    // Not part of the profile upload: register it first (the bridge handles frames in order)
+    keymapId = assignKeymapId(action);
+    flushActions();
+    writeFrame(encodeRegister([[keymapId, action]]));
+  }
+  const seq = nextSeq;
+  nextSeq = nextSeq >= 0xffffffff ? 1 : nextSeq + 1;
+  pendingActions.push({ seq, keymapId, pad, priority: PRIORITY_NORMAL, ts: Date.now(), trace });
+  inFlight.set(seq, { trace });
+  // Everything sent in this tick (e.g. several lines of one speech chunk) shares a frame
+  if (!flushQueued) {
+    flushQueued = true;
+    queueMicrotask(flushActions);
+  }
+  return seq;
+}
+
+// Reserved bridge commands: stop every running keymap and zero every controller
+export function sendCommandToController(command: ReservedCommand) {
+  if (!child || !child.stdin) {
+    console.warn("[ControllerBridge] not running; cannot send command:", command);
     return;
   }
 
-  const msg = JSON.stringify({ action });
-  child.stdin.write(msg + "\n");
+  if (binary) {
+    // Actions queued before the command go first
+    flushActions();
+    writeFrame(encodeCommand(command));
+  } else {
+    child.stdin.write(JSON.stringify({ command }) + "\n");
+  }
 }
 
 export function stopControllerBridge() {
@@ -55,31 +308,50 @@ export function stopControllerBridge() {
   console.log("[ControllerBridge] stopping python process");
 
   const processToKill = child;
+  const processIsBinary = binary;
   child = null;
 
-  // Try graceful shutdown first
+  // Release anything still held, then close stdin: the bridge acks release_all once the
+  // neutral report is out (binary protocol), lets its schedulers finish and exits by itself
+  pendingActions = [];
+  releaseAcked.delete(processToKill);
   try {
-    if (!processToKill.killed) {
-      processToKill.kill("SIGTERM");
-    }
+    processToKill.stdin?.end(processIsBinary ? encodeCommand("release_all") : JSON.stringify({ command: "release_all" }) + "\n");
   } catch (err) {
-    console.error("[ControllerBridge] Error sending SIGTERM:", err);
+    console.error("[ControllerBridge] Error sending release_all:", err);
   }
 
-  // Force kill after a short timeout if it doesn't exit gracefully
-  const forceKillTimeout = setTimeout(() => {
+  // Only signal it if it hasn't exited in time
+  let forceKillTimeout: ReturnType<typeof setTimeout> | undefined;
+  const terminateTimeout = setTimeout(() => {
+    if (processIsBinary && !releaseAcked.has(processToKill)) {
+      console.warn("[ControllerBridge] release_all was not acknowledged; controller may be left with inputs held");
+    }
     try {
-      if (processToKill && !processToKill.killed) {
-        console.log("[ControllerBridge] force killing python process");
-        processToKill.kill("SIGKILL");
+      if (!processToKill.killed) {
+        console.log("[ControllerBridge] python process did not exit, sending SIGTERM");
+        processToKill.kill("SIGTERM");
       }
     } catch (err) {
-      console.error("[ControllerBridge] Error force killing:", err);
+      console.error("[ControllerBridge] Error sending SIGTERM:", err);
     }
-  }, 2000);
 
-  // Clear timeout if process exits gracefully
+    // Force kill after a short timeout if it doesn't exit gracefully
+    forceKillTimeout = setTimeout(() => {
+      try {
+        if (processToKill && processToKill.exitCode === null) {
+          console.log("[ControllerBridge] force killing python process");
+          processToKill.kill("SIGKILL");
+        }
+      } catch (err) {
+        console.error("[ControllerBridge] Error force killing:", err);
+      }
+    }, 2000);
+  }, BRIDGE_EXIT_TIMEOUT_MS);
+
+  // Clear timeouts if process exits gracefully
   processToKill.once("exit", () => {
+    clearTimeout(terminateTimeout);
     clearTimeout(forceKillTimeout);
   });
 }
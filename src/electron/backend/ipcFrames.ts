@@ -0,0 +1,174 @@
+// Host side of the controller bridge's binary framed protocol (see src/python/ipc_frames.py).
+// Every frame is a little-endian u32 length (of what follows), a u8 opcode and a payload.
+
+export const OP_REGISTER = 0x01;
+export const OP_ACTIONS = 0x02;
+export const OP_COMMAND = 0x03;
+
+export const OP_READY = 0x81;
+export const OP_REGISTERED = 0x82;
+export const OP_ACKS = 0x83;
+export const OP_DONE = 0x84;
+export const OP_COMMANDED = 0x85;
+
+// sample runs the bridge's sampling profiler (see src/python/runtime_stats.py)
+const COMMAND_CODES: Record<"release_all" | "sample", number> = {
+    release_all: 1,
+    sample: 2,
+};
+
+export const ACK_ACCEPTED = 0;
+export const ACK_STATUS_NAMES = [
+    "accepted", "stale", "refused by priority", "unknown keymap", "controller not ready", "unknown pad",
+];
+
+export const DONE_COMPLETED = 0;
+export const DONE_PREEMPTED = 1;
+
+// Counts are one byte on the wire
+export const MAX_BATCH = 255;
+
+const ACTION_BYTES = 4 + 2 + 1 + 1 + 8 + 1;
+const ACK_BYTES = 4 + 1 + 4;
+const DONE_BYTES = 4 + 1 + 4 + 4;
+
+export interface FrameAction {
+    seq: number;
+    keymapId: number;
+    pad?: number;
+    priority: number;
+    ts?: number;
+    trace?: string;
+}
+
+export interface Frame {
+    opcode: number;
+    payload: Buffer;
+}
+
+export interface AckRecord {
+    seq: number;
+    status: number;
+    ageMs: number | null;
+}
+
+export interface DoneRecord {
+    seq: number;
+    outcome: number;
+    startDelayMs: number | null;
+    playMs: number;
+}
+
+function frame(opcode: number, payload: Buffer): Buffer {
+    const header = Buffer.alloc(5);
+    header.writeUInt32LE(payload.length + 1, 0);
+    header.writeUInt8(opcode, 4);
+    return Buffer.concat([header, payload]);
+}
+
+function optionalMs(value: number): number | null {
+    return Number.isNaN(value) ? null : value;
+}
+
+export function encodeRegister(keymaps: Array<[number, string]>): Buffer {
+    const parts = [Buffer.alloc(2)];
+    parts[0].writeUInt16LE(keymaps.length, 0);
+    for (const [id, keymap] of keymaps) {
+        const data = Buffer.from(keymap, "utf-8");
+        const entry = Buffer.alloc(6);
+        entry.writeUInt16LE(id, 0);
+        entry.writeUInt32LE(data.length, 2);
+        parts.push(entry, data);
+    }
+    return frame(OP_REGISTER, Buffer.concat(parts));
+}
+
+export function encodeActions(actions: FrameAction[]): Buffer {
+    if (actions.length > MAX_BATCH) {
+        throw new RangeError(`at most ${MAX_BATCH} actions per frame`);
+    }
+    const parts = [Buffer.from([actions.length])];
+    for (const action of actions) {
+        const trace = Buffer.from(action.trace ?? "", "utf-8");
+        const record = Buffer.alloc(ACTION_BYTES);
+        record.writeUInt32LE(action.seq, 0);
+        record.writeUInt16LE(action.keymapId, 4);
+        record.writeUInt8(action.pad ?? 0, 6);
+        record.writeUInt8(action.priority, 7);
+        record.writeDoubleLE(action.ts ?? 0, 8);
+        record.writeUInt8(trace.length, 16);
+        parts.push(record, trace);
+    }
+    return frame(OP_ACTIONS, Buffer.concat(parts));
+}
+
+// Without a pad the command applies to every pad
+export function encodeCommand(command: "release_all" | "sample", pad?: number): Buffer {
+    const code = COMMAND_CODES[command];
+    return frame(OP_COMMAND, Buffer.from(pad === undefined ? [code] : [code, pad]));
+}
+
+export function decodeRegistered(payload: Buffer): { compiled: number; failed: number[] } {
+    const compiled = payload.readUInt16LE(0);
+    const failedCount = payload.readUInt16LE(2);
+    const failed: number[] = [];
+    for (let i = 0; i < failedCount; i++) {
+        failed.push(payload.readUInt16LE(4 + i * 2));
+    }
+    return { compiled, failed };
+}
+
+export function decodeAcks(payload: Buffer): AckRecord[] {
+    const count = payload.readUInt8(0);
+    const acks: AckRecord[] = [];
+    for (let i = 0; i < count; i++) {
+        const offset = 1 + i * ACK_BYTES;
+        acks.push({
+            seq: payload.readUInt32LE(offset),
+            status: payload.readUInt8(offset + 4),
+            ageMs: optionalMs(payload.readFloatLE(offset + 5)),
+        });
+    }
+    return acks;
+}
+
+export function decodeDone(payload: Buffer): DoneRecord[] {
+    const count = payload.readUInt8(0);
+    const records: DoneRecord[] = [];
+    for (let i = 0; i < count; i++) {
+        const offset = 1 + i * DONE_BYTES;
+        records.push({
+            seq: payload.readUInt32LE(offset),
+            outcome: payload.readUInt8(offset + 4),
+            startDelayMs: optionalMs(payload.readFloatLE(offset + 5)),
+            playMs: payload.readFloatLE(offset + 9),
+        });
+    }
+    return records;
+}
+
+// The command a release_all ack answers, and how many keymaps it cancelled
+export function decodeCommanded(payload: Buffer): { command: string; cancelled: number } {
+    const code = payload.readUInt8(0);
+    const command = Object.keys(COMMAND_CODES).find((name) => COMMAND_CODES[name as keyof typeof COMMAND_CODES] === code);
+    return { command: command ?? String(code), cancelled: payload.readUInt16LE(1) };
+}
+
+// Reassembles frames from stdout chunks, which can split or join frames anywhere
+export class FrameDecoder {
+    private buffer: Buffer = Buffer.alloc(0);
+
+    push(chunk: Buffer): Frame[] {
+        this.buffer = this.buffer.length ? Buffer.concat([this.buffer, chunk]) : chunk;
+        const frames: Frame[] = [];
+        while (this.buffer.length >= 4) {
+            const length = this.buffer.readUInt32LE(0);
+            if (this.buffer.length < 4 + length) {
+                break;
+            }
+            frames.push({ opcode: this.buffer[4], payload: this.buffer.subarray(5, 4 + length) });
+            this.buffer = this.buffer.subarray(4 + length);
+        }
+        return frames;
+    }
+}
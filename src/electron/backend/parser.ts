@@ -1,5 +1,7 @@
 import { AppState } from "./state.js";
-import { sendActionToController } from "./controllerBridge.js";
+import { sendActionToController, sendCommandToController } from "./controllerBridge.js";
+import { emitStat } from "./tracing.js";
+import { reservedPhrases } from "./reservedPhrases.js";
 
 // Status words to filter out (from RealtimeSTT)
 const FILTER_WORDS = [
@@ -57,7 +59,10 @@ function stripFilterWords(word: string): string | null {
     return word;
 }
 
-export function handleWord(raw: string) {
+// Trace ID of the most recent word, carried to the controller with the matched keymap
+let lastTraceId: string | undefined;
+
+export function handleWord(raw: string, traceId?: string) {
     // Strip all non-alphabetical characters and convert to lowercase
     let w = raw.toLowerCase().replace(/[^a-z]/g, "").trim();
     if (!w) return;
@@ -67,6 +72,7 @@ export function handleWord(raw: string) {
     if (!cleaned) return; // Skip if it was all filter words
     
     w = cleaned;
+    lastTraceId = traceId;
 
     AppState.recentWords.push(w);
     while (AppState.recentWords.length > 3) {
@@ -76,6 +82,31 @@ export function handleWord(raw: string) {
     checkForPhrases();
 }
 
+// Actions resolved by the speech process (--resolve): the ID is the profile keyword
+export function handleAction(actionId: string, traceId?: string) {
+    const keymap = AppState.mappings[actionId];
+    if (!keymap) {
+        console.warn("[Parser] unknown action ID:", actionId);
+        return;
+    }
+    console.log("[Parser] ACTION:", actionId, "->", keymap);
+    sendMapped(actionId, keymap, traceId);
+}
+
+// Send a phrase's keymap to the controller the profile addresses it to (the first by default)
+function sendMapped(phrase: string, keymap: string, traceId?: string) {
+    sendActionToController(keymap, traceId, AppState.pads[phrase]);
+}
+
+export function handleCommand(command: string) {
+    if (command !== "release_all") {
+        console.warn("[Parser] unknown command:", command);
+        return;
+    }
+    console.log("[Parser] RESERVED:", command);
+    sendCommandToController(command);
+}
+
 function checkForPhrases() {
     const q = AppState.recentWords;
 
@@ -103,13 +134,27 @@ function checkForPhrases() {
             const keymap = AppState.mappings[trimmed];
             console.log("[Parser] MATCH:", trimmed, "->", keymap);
             // Send the keymap action to the controller bridge
-            sendActionToController(keymap);
+            if (lastTraceId) {
+                emitStat(lastTraceId, "phrase_matched");
+            }
+            sendMapped(trimmed, keymap, lastTraceId);
             // Clear the matched words from the queue to prevent re-matching
             const matchedWordCount = trimmed.split(" ").length;
             AppState.recentWords.splice(-matchedWordCount);
             return;
         }
     }
+
+    // Reserved phrases, unless the profile maps the same phrase to its own keymap
+    for (const phrase of candidates) {
+        const command = reservedPhrases()[phrase.trim()];
+        if (command) {
+            console.log("[Parser] RESERVED:", phrase, "->", command);
+            sendCommandToController(command);
+            AppState.recentWords.splice(-phrase.trim().split(" ").length);
+            return;
+        }
+    }
     
     console.log("[Parser] No match found for:", candidates);
 }
\ No newline at end of file
@@ -2,6 +2,11 @@ import fs from "fs";
 import path from "path";
 import { AppState } from "./state.js";
 
+// Synonyms table expanded into every profile's mappings
+function synonymsFilePath(): string {
+  return path.join(process.cwd(), "src", "profiles", "synonyms", "synonyms.json");
+}
+
 export function loadProfileMappings() {
   if (!AppState.profileFilePath) {
     throw new Error("No profile selected");
@@ -14,20 +19,25 @@ export function loadProfileMappings() {
 
   // Parse profile: keywords array with keyword -> keymap mappings
   const map: Record<string, string> = {};
+  const pads: Record<string, number> = {};
 
-  // Profile format: { "keywords": [ { "keyword": "...", "keymap": [...] } ] }
+  // Profile format: { "keywords": [ { "keyword": "...", "keymap": [...], "pad": 1 } ] }
+  // "pad" is optional: which virtual controller plays the keymap (default 0, the first)
   if (Array.isArray(json.keywords)) {
     for (const entry of json.keywords) {
       if (entry.keyword && entry.keymap) {
         // Store the keymap as JSON string for now (parser will handle it)
         const keyword = entry.keyword.toLowerCase().trim();
         map[keyword] = JSON.stringify(entry.keymap);
+        if (Number.isInteger(entry.pad) && entry.pad > 0) {
+          pads[keyword] = entry.pad;
+        }
       }
     }
   }
 
   // Load synonyms and expand mappings
-  const synonymsPath = path.join(process.cwd(), "src", "profiles", "synonyms", "synonyms.json");
+  const synonymsPath = synonymsFilePath();
   if (fs.existsSync(synonymsPath)) {
     const synonymsRaw = fs.readFileSync(synonymsPath, "utf-8");
     const synonymsJson = JSON.parse(synonymsRaw);
@@ -40,6 +50,9 @@ export function loadProfileMappings() {
             const synKey = synonym.toLowerCase().trim();
             if (!map[synKey]) {
               map[synKey] = baseKeymap;
+              if (pads[baseKeyword] !== undefined) {
+                pads[synKey] = pads[baseKeyword];
+              }
             }
           }
         }
@@ -48,8 +61,42 @@ export function loadProfileMappings() {
   }
 
   AppState.mappings = map;
+  AppState.pads = pads;
   console.log("[ProfileLoader] loaded", Object.keys(map).length, "mappings");
   // Debug: show a few example mappings
   const examples = Object.keys(map).slice(0, 5);
   console.log("[ProfileLoader] example mappings:", examples);
 }
+
+// Poll the profile and synonyms files and call onChange (once per burst of writes) when either
+// changes. Polling stats survives editors that save by replacing the file. Returns an unwatch function.
+export function watchProfileFiles(onChange: () => void, intervalMs = 500): () => void {
+  if (!AppState.profileFilePath) {
+    throw new Error("No profile selected");
+  }
+  const files = [AppState.profileFilePath, synonymsFilePath()];
+  let timer: ReturnType<typeof setTimeout> | null = null;
+  const listener = (curr: fs.Stats, prev: fs.Stats) => {
+    if (curr.mtimeMs === prev.mtimeMs && curr.size === prev.size) {
+      return;
+    }
+    if (timer) {
+      clearTimeout(timer);
+    }
+    timer = setTimeout(() => {
+      timer = null;
+      onChange();
+    }, intervalMs);
+  };
+  for (const file of files) {
+    fs.watchFile(file, { interval: intervalMs }, listener);
+  }
+  return () => {
+    if (timer) {
+      clearTimeout(timer);
+    }
+    for (const file of files) {
+      fs.unwatchFile(file, listener);
+    }
+  };
+}
@@ -0,0 +1,41 @@
+import fs from "fs";
+import path from "path";
+
+// Phrases that stop every running keymap and zero the controller. The table is shared
+// with the speech process (src/python/vocabulary.py reads the same file), so the host's
+// word matching and the speech process's phrase resolver always agree on it.
+export type ReservedCommand = "release_all";
+
+let reserved: Record<string, ReservedCommand> | null = null;
+
+function reservedPhrasesFilePath(): string {
+  return path.join(process.cwd(), "src", "python", "reserved_phrases.json");
+}
+
+// Reserved phrase -> bridge command, read once
+export function reservedPhrases(): Record<string, ReservedCommand> {
+  if (!reserved) {
+    reserved = {};
+    try {
+      const json = JSON.parse(fs.readFileSync(reservedPhrasesFilePath(), "utf-8"));
+      for (const entry of json.reserved_phrases ?? []) {
+        if (entry.phrase && entry.command) {
+          reserved[entry.phrase.toLowerCase().trim()] = entry.command;
+        }
+      }
+    } catch (err) {
+      console.error("[ReservedPhrases] could not load the reserved phrases:", err);
+    }
+  }
+  return reserved;
+}
+
+// A profile keyword (or synonym) that matches a reserved phrase replaces it; say so, since
+// the phrase then no longer releases the controller
+export function warnShadowedReservedPhrases(mappings: Record<string, string>) {
+  for (const [phrase, command] of Object.entries(reservedPhrases())) {
+    if (mappings[phrase]) {
+      console.warn(`[ReservedPhrases] the profile maps "${phrase}", which replaces the reserved ${command} phrase`);
+    }
+  }
+}
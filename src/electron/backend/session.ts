@@ -1,11 +1,15 @@
 import { AppState } from "./state.js";
-import { startSpeechFromPython, stopSpeechFromPython } from "./speech.js";
-import { loadProfileMappings } from "./profileLoader.js";
-import { startControllerBridge, stopControllerBridge } from "./controllerBridge.js";
+import { startSpeechFromPython, pauseSpeechFromPython, reloadSpeechProfile } from "./speech.js";
+import { loadProfileMappings, watchProfileFiles } from "./profileLoader.js";
+import { startControllerBridge, stopControllerBridge, reloadControllerProfile } from "./controllerBridge.js";
+import { warnShadowedReservedPhrases } from "./reservedPhrases.js";
 
 // Callback to notify UI of status changes
 let onSessionStateChange: ((isRunning: boolean, error?: string) => void) | null = null;
 
+// Stops watching the session's profile files
+let unwatchProfile: (() => void) | null = null;
+
 export function setSessionStateCallback(cb: (isRunning: boolean, error?: string) => void) {
   onSessionStateChange = cb;
 }
@@ -18,16 +22,40 @@ export function startSession(window: any) {
   console.log("[Session] Starting with:", AppState.profileFilePath);
 
   loadProfileMappings();
+  warnShadowedReservedPhrases(AppState.mappings);
   startControllerBridge();
   AppState.isRunning = true;
 
   // TODO: read JSON, build AppState.mappings
   startSpeechFromPython(window);
+  unwatchProfile?.();
+  unwatchProfile = watchProfileFiles(reloadProfile);
+}
+
+// The profile (or synonyms) file changed: swap every process to it without restarting any
+function reloadProfile() {
+  if (!AppState.isRunning) return;
+  try {
+    loadProfileMappings();
+  } catch (err) {
+    // Probably saved mid-edit; keep playing with the previous version
+    console.error("[Session] profile reload failed, keeping the previous one:", err);
+    return;
+  }
+  warnShadowedReservedPhrases(AppState.mappings);
+  console.log("[Session] profile changed, reloaded");
+  reloadSpeechProfile();
+  if (!reloadControllerProfile()) {
+    console.warn("[Session] the profile now uses more controllers; restart the session to add them");
+  }
 }
 
 export function stopSession(error: boolean = false) {
   AppState.isRunning = false;
-  stopSpeechFromPython();
+  unwatchProfile?.();
+  unwatchProfile = null;
+  // The speech process stays up with its models loaded, so the next session starts warm
+  pauseSpeechFromPython();
   stopControllerBridge();
   console.log("[Session] Stopped");
 
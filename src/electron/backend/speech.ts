@@ -1,19 +1,36 @@
 import { spawn, ChildProcess } from "child_process";
 import path from "path";
 import { app } from "electron";
-import { isDev, getPythonCommand } from "../util.js";
+import { isDev, getPythonCommand, isTracing, isOpenVocabulary, isSpeculative, runtimeStatsArgs } from "../util.js";
 import { AppState } from "./state.js";
-import { handleWord } from "./parser.js";
+import { handleWord, handleAction, handleCommand } from "./parser.js";
+import { emitStat } from "./tracing.js";
 
 
 let child: ChildProcess | null = null;
 let buffer = "";
+// True once the speech process has loaded and warmed up its models
+let ready = false;
+
+// Profile the speech process should restrict itself to (null: open vocabulary)
+function speechProfilePath(): string | null {
+    return AppState.profileFilePath && !isOpenVocabulary() ? AppState.profileFilePath : null;
+}
+
+// Control messages for the long-lived speech process (see speech_stub.py)
+function sendSpeechCommand(msg: { command: "pause" | "resume" | "profile" | "shutdown"; path?: string | null }) {
+    if (!child || !child.stdin) return;
+    child.stdin.write(JSON.stringify(msg) + "\n");
+}
 
 export function startSpeechFromPython(window: any) {
     if (child) {
-        // already running
-        return;
-        // already running
+        // Already running with warm models: swap to this session's profile and listen again
+        sendSpeechCommand({ command: "profile", path: speechProfilePath() });
+        sendSpeechCommand({ command: "resume" });
+        if (ready) {
+            window.webContents.send("on-recorder-ready");
+        }
         return;
     }
 
@@ -21,8 +38,29 @@ export function startSpeechFromPython(window: any) {
         ? path.join(process.cwd(), "src", "python", "speech_stub.py")
         : path.join(path.dirname(app.getPath("exe")), "src", "python", "speech_stub.py");
 
-    child = spawn(getPythonCommand(), [scriptPath], {
-        stdio: ["ignore", "pipe", "pipe"], // we only read its stdout/stderr
+    // Each word line is "word<TAB>utteranceId<TAB>flag" (flag "p" = partial, "f" = final),
+    // plus "<TAB>confidence" when recognition is restricted to the profile vocabulary;
+    // every word of an utterance arrives once, and the utterance ID doubles as the trace ID.
+    // With a profile the speech process also resolves phrases itself and sends
+    // ">actionId<TAB>utteranceId" or "!command<TAB>utteranceId" lines instead of words
+    const args = [scriptPath];
+    if (isTracing()) {
+        args.push("--trace");
+    }
+    if (!isOpenVocabulary()) {
+        args.push("--resolve");
+        if (isSpeculative()) {
+            args.push("--speculate");
+        }
+    }
+    const profilePath = speechProfilePath();
+    if (profilePath) {
+        args.push("--profile", profilePath);
+    }
+    args.push(...runtimeStatsArgs(0));
+
+    child = spawn(getPythonCommand(), args, {
+        stdio: ["pipe", "pipe", "pipe"], // stdin carries control messages
     });
 
     console.log("[SpeechBridge] started python:", scriptPath);
@@ -45,9 +83,30 @@ export function startSpeechFromPython(window: any) {
                     continue;
                 }
 
-                console.log("[SpeechBridge] word/phrase from python:", trimmed);
+                const [word, utteranceId, , confidence] = trimmed.split("\t");
+                const traceId = isTracing() ? utteranceId : undefined;
+
+                if (word.startsWith(">") || word.startsWith("!")) {
+                    if (traceId) {
+                        emitStat(traceId, "action_received");
+                    }
+                    if (AppState.isRunning) {
+                        if (word.startsWith(">")) {
+                            handleAction(word.slice(1), traceId);
+                        } else {
+                            handleCommand(word.slice(1));
+                        }
+                    }
+                    continue;
+                }
+
+                if (traceId) {
+                    emitStat(traceId, "word_received");
+                }
+
+                console.log("[SpeechBridge] word/phrase from python:", word, confidence ? `(confidence ${confidence})` : "");
                 if (AppState.isRunning) {
-                    handleWord(trimmed);
+                    handleWord(word, traceId);
                 }
             }
         });
@@ -58,26 +117,53 @@ export function startSpeechFromPython(window: any) {
             const msg = data.toString().trim();
             // console.error("[SpeechBridge python ERR]", msg); // Optional: keep or comment out to reduce noise
 
-            // Check for ready signal
+            // Pass latency trace lines through so the session log has every stage,
+            // speculation results so a profile's hit rate shows up in the log, and runtime stats
+            for (const line of msg.split(/\r?\n/)) {
+                if (line.startsWith("[stats]") || line.startsWith("[speech] speculation") || line.startsWith("[runtime]")) {
+                    console.log(line);
+                }
+            }
+
+            // Check for ready signal (printed once the models are loaded and warm)
             if (msg.includes("[speech] ready") || msg.includes("[speech] model loaded")) {
+                ready = true;
                 console.log("[SpeechBridge] Python speech ready!");
                 window.webContents.send("on-recorder-ready");
             }
         });
     }
 
+    const exited = child;
     child.on("exit", (code) => {
         console.log("[SpeechBridge] python exited with code", code);
-        child = null;
+        if (child === exited) {
+            child = null;
+            ready = false;
+        }
     });
 }
 
+// Reload the session's profile in place, e.g. after the profile file changed on disk
+export function reloadSpeechProfile() {
+    sendSpeechCommand({ command: "profile", path: speechProfilePath() });
+}
+
+// Stop listening between sessions but keep the models loaded
+export function pauseSpeechFromPython() {
+    if (!child) return;
+    console.log("[SpeechBridge] pausing python speech process");
+    sendSpeechCommand({ command: "pause" });
+}
+
 export function stopSpeechFromPython() {
     if (!child) return;
     console.log("[SpeechBridge] stopping python speech process");
 
     const processToKill = child;
+    sendSpeechCommand({ command: "shutdown" });
     child = null;
+    ready = false;
     buffer = "";
 
     // Try graceful shutdown first
@@ -7,4 +7,7 @@ export const AppState = {
 
     // phrase → action mapping (empty stub)
     mappings: {} as Record<string, string>,
+
+    // phrase → controller index, for phrases addressed to a pad other than the first
+    pads: {} as Record<string, number>,
 }
\ No newline at end of file
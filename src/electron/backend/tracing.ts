@@ -0,0 +1,13 @@
+// Host side of end-to-end latency tracing (see src/python/tracing.py).
+// Stats lines use the same format as the Python processes so one session log
+// can be fed to `python src/python/tracing.py report`.
+
+// Monotonic time in epoch milliseconds, comparable with the Python processes' stamps
+export function nowMs(): number {
+    return performance.timeOrigin + performance.now();
+}
+
+export function emitStat(trace: string, stage: string) {
+    const t = Math.round(nowMs() * 1000) / 1000;
+    console.log(`[stats] ${JSON.stringify({ trace, stage, t })}`);
+}
@@ -4,4 +4,41 @@ export function isDev(): boolean {
 
 export function getPythonCommand(): string {
     return process.platform === 'win32' ? 'python' : 'python3';
-}
\ No newline at end of file
+}
+
+// Latency tracing: set PHONIX_TRACE=1 to carry trace IDs from speech to controller
+export function isTracing(): boolean {
+    return process.env.PHONIX_TRACE === '1';
+}
+
+// Open-vocabulary speech: set PHONIX_OPEN_VOCAB=1 to stop restricting recognition to the profile's keywords
+export function isOpenVocabulary(): boolean {
+    return process.env.PHONIX_OPEN_VOCAB === '1';
+}
+
+// Speculative dispatch: set PHONIX_SPECULATE=1 to fire actions from confident partial transcriptions
+// (the speech process rolls them back with release_all if the final transcription disagrees)
+export function isSpeculative(): boolean {
+    return process.env.PHONIX_SPECULATE === '1';
+}
+
+// Controller bridge IPC: set PHONIX_JSON_IPC=1 to use JSON lines instead of the binary framed protocol
+export function isJsonIpc(): boolean {
+    return process.env.PHONIX_JSON_IPC === '1';
+}
+
+// Runtime stats: set PHONIX_STATS_INTERVAL=<seconds> to log [runtime] stats lines from both Python processes,
+// and PHONIX_STATS_PORT=<port> to serve their stats and sampling profiler on 127.0.0.1
+// (the speech process on that port, the controller bridge on the next one)
+export function runtimeStatsArgs(portOffset: number): string[] {
+    const args: string[] = [];
+    const interval = Number(process.env.PHONIX_STATS_INTERVAL);
+    if (interval > 0) {
+        args.push("--stats-interval", String(interval));
+    }
+    const port = Number(process.env.PHONIX_STATS_PORT);
+    if (Number.isInteger(port) && port > 0) {
+        args.push("--stats-port", String(port + portOffset));
+    }
+    return args;
+}
@@ -0,0 +1,111 @@
+"""
+File and pipe audio input for the Phonix speech process.
+Feeds PCM into AudioToTextRecorder.feed_audio instead of the microphone, at
+real-time pace (or a multiple of it), so recognition can be measured
+reproducibly and run on machines without audio hardware.
+
+Inputs are WAV files (16-bit PCM, any rate, mono or multi-channel) or raw
+16 kHz mono 16-bit little-endian PCM from a pipe or FIFO ("-" is not
+accepted: stdin carries the speech process's control messages).
+"""
+import sys
+import json
+import time
+import wave
+
+import tracing
+
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2
+# Samples per feed_audio call (32 ms at 16 kHz, RealtimeSTT's default buffer size)
+CHUNK_SAMPLES = 512
+
+
+def read_wav(path: str):
+    """(mono 16-bit PCM bytes, sample rate) from a WAV file."""
+    with wave.open(path, "rb") as wav:
+        if wav.getsampwidth() != SAMPLE_WIDTH:
+            raise ValueError(f"{path}: only 16-bit PCM WAV is supported")
+        channels = wav.getnchannels()
+        rate = wav.getframerate()
+        pcm = wav.readframes(wav.getnframes())
+    if channels > 1:
+        import numpy as np
+        samples = np.frombuffer(pcm, dtype=np.int16).reshape(-1, channels)
+        pcm = samples.mean(axis=1).astype(np.int16).tobytes()
+    return pcm, rate
+
+
+def duration_seconds(pcm: bytes, rate: int) -> float:
+    return len(pcm) / SAMPLE_WIDTH / rate
+
+
+class AudioFeeder:
+    """
+    Sends PCM to feed(chunk_bytes, rate) in CHUNK_SAMPLES pieces on a fixed
+    schedule: speed 1.0 is real time, 2.0 twice as fast, 0 as fast as possible.
+    Voice activity detection measures silence in wall time, so speeds far
+    above real time shorten the pauses it sees between commands.
+    """
+
+    def __init__(self, feed, speed: float = 1.0, chunk_samples: int = CHUNK_SAMPLES, clock=time.perf_counter):
+        self._feed = feed
+        self.speed = speed
+        self.chunk_samples = chunk_samples
+        self.clock = clock
+        self._next = None
+        self.fed_seconds = 0.0
+
+    def _pace(self, seconds: float):
+        if self.speed <= 0:
+            return
+        now = self.clock()
+        if self._next is None or self._next < now:
+            self._next = now
+        delay = self._next - now
+        if delay > 0:
+            time.sleep(delay)
+        self._next += seconds / self.speed
+
+    def play(self, pcm: bytes, rate: int, paced: bool = True):
+        step = self.chunk_samples * SAMPLE_WIDTH
+        for offset in range(0, len(pcm), step):
+            chunk = pcm[offset:offset + step]
+            if paced:
+                self._pace(len(chunk) / SAMPLE_WIDTH / rate)
+            self._feed(chunk, rate)
+        self.fed_seconds += duration_seconds(pcm, rate)
+
+    def play_silence(self, seconds: float, rate: int = SAMPLE_RATE):
+        self.play(bytes(int(seconds * rate) * SAMPLE_WIDTH), rate)
+
+    def play_stream(self, stream, rate: int = SAMPLE_RATE):
+        """Raw PCM from a binary file object until EOF, fed as it arrives: a pipe keeps its own pace."""
+        step = self.chunk_samples * SAMPLE_WIDTH
+        while True:
+            chunk = stream.read(step)
+            if not chunk:
+                return
+            self.play(chunk, rate, paced=False)
+
+
+def feed_inputs(feed, paths: list, speed: float = 1.0, gap: float = 1.0, stream=None):
+    """
+    Play each input in order with `gap` seconds of silence after it, printing
+    one marker per input to stderr for benchmarks:
+        [speech] input {"file": ..., "t": <epoch ms at start>, "duration": <seconds>}
+    """
+    feeder = AudioFeeder(feed, speed)
+    for path in paths:
+        if path.lower().endswith(".wav"):
+            pcm, rate = read_wav(path)
+            marker = {"file": path, "t": round(tracing.now_ms(), 3), "duration": round(duration_seconds(pcm, rate), 4)}
+            print(f"[speech] input {json.dumps(marker)}", file=stream or sys.stderr, flush=True)
+            feeder.play(pcm, rate)
+        else:
+            marker = {"file": path, "t": round(tracing.now_ms(), 3), "duration": None}
+            print(f"[speech] input {json.dumps(marker)}", file=stream or sys.stderr, flush=True)
+            with open(path, "rb") as f:
+                feeder.play_stream(f)
+        feeder.play_silence(gap)
+    return feeder.fed_seconds
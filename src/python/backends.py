@@ -0,0 +1,118 @@
+"""
+Output backends for the Phonix controller bridge.
+A backend receives full controller state reports (see controller_state.py)
+and delivers them somewhere: a virtual Xbox controller, or a recording
+used for benchmarks and regression tests.
+"""
+import sys
+import abc
+import json
+import time
+import threading
+
+
+class OutputBackend(abc.ABC):
+    """Base class for report sinks. Subclasses implement send, and open/close if they hold a device."""
+
+    name = "base"
+
+    def open(self):
+        """Acquire the device. May raise; the bridge retries a few times."""
+
+    @abc.abstractmethod
+    def send(self, report: tuple):
+        """Deliver one (buttons, lx, ly, rx, ry, lt, rt) report."""
+
+    def close(self):
+        """Release the device."""
+
+
+class VgamepadBackend(OutputBackend):
+    """Virtual Xbox 360 controller via vgamepad (Windows, needs ViGEmBus)."""
+
+    name = "vgamepad"
+
+    def __init__(self):
+        self.gamepad = None
+        self.lock = threading.Lock()
+
+    def open(self):
+        if self.gamepad is not None:
+            return
+        # Imported here so other backends work where vgamepad isn't installed
+        import vgamepad as vg
+        try:
+            self.gamepad = vg.VX360Gamepad()
+            print("[controller_bridge] virtual Xbox controller initialized", flush=True)
+        except AssertionError as e:
+            if "ViGEmBus" in str(e):
+                print("[controller_bridge] ERROR: ViGEmBus driver not installed!", file=sys.stderr, flush=True)
+                print("[controller_bridge] Please install ViGEmBus from: https://github.com/ViGEm/ViGEmBus/releases", file=sys.stderr, flush=True)
+                print("[controller_bridge] After installation, restart your computer and try again.", file=sys.stderr, flush=True)
+            raise
+
+    def send(self, report: tuple):
+        buttons, lx, ly, rx, ry, lt, rt = report
+        gp = self.gamepad
+        with self.lock:
+            gp.report.wButtons = buttons
+            gp.left_joystick_float(x_value_float=lx, y_value_float=ly)
+            gp.right_joystick_float(x_value_float=rx, y_value_float=ry)
+            gp.left_trigger(value=lt)
+            gp.right_trigger(value=rt)
+            gp.update()
+
+    def close(self):
+        if self.gamepad is not None:
+            with self.lock:
+                self.gamepad.reset()
+                self.gamepad.update()
+            self.gamepad = None
+
+
+class RecordingBackend(OutputBackend):
+    """
+    Keeps every report with its perf_counter timestamp in self.reports and,
+    if given a path, also writes them as JSONL: {"t": ..., "report": [...]}.
+    """
+
+    name = "recording"
+
+    def __init__(self, path: str = None, clock=time.perf_counter):
+        self.path = path
+        self.clock = clock
+        self.reports = []
+        self._file = None
+        self._lock = threading.Lock()
+
+    def open(self):
+        if self.path and self._file is None:
+            self._file = open(self.path, "w", encoding="utf-8")
+
+    def send(self, report: tuple):
+        stamp = self.clock()
+        with self._lock:
+            self.reports.append((stamp, report))
+            if self._file is not None:
+                self._file.write(json.dumps({"t": stamp, "report": list(report)}) + "\n")
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+BACKENDS = {
+    VgamepadBackend.name: VgamepadBackend,
+    RecordingBackend.name: RecordingBackend,
+}
+
+
+def create_backend(name: str, record_path: str = None) -> OutputBackend:
+    """Build a backend by name ("vgamepad" or "recording")."""
+    if name not in BACKENDS:
+        raise ValueError(f"unknown backend '{name}' (expected one of: {', '.join(BACKENDS)})")
+    if name == RecordingBackend.name:
+        return RecordingBackend(record_path)
+    return BACKENDS[name]()
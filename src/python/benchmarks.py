@@ -0,0 +1,493 @@
+"""
+Microbenchmarks for the Phonix Python processes.
+Runs without vgamepad, RealtimeSTT or a microphone so it works on any dev box.
+
+Usage:
+    python benchmarks.py keymap [--profile PATH] [--iterations N]
+    python benchmarks.py timing [--holds-ms 1,4,8,16] [--samples N] [--spin-budget-ms MS]
+    python benchmarks.py filter [--iterations N]
+    python benchmarks.py fuzzy [--profile PATH] [--corpus MISHEARD.jsonl] [--iterations N]
+"""
+import sys
+import json
+import time
+import argparse
+import os
+
+from difflib import SequenceMatcher
+
+from timing import PrecisionTimer, JitterStats, DEFAULT_SPIN_BUDGET, percentile
+from keymap_compiler import load_program, OP_WAIT
+from controller_state import ControllerState
+from backends import VgamepadBackend
+from word_filter import FILTER_WORDS, extract_valid_words, is_valid_word
+from vocabulary import load_vocabulary, DEFAULT_SYNONYMS_PATH
+from keyword_index import KeywordIndex
+
+DEFAULT_PROFILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "profiles", "fighting.json")
+
+
+class _NullReport:
+    wButtons = 0
+
+
+class NullGamepad:
+    """Gamepad stand-in that accepts every vgamepad call and does nothing."""
+
+    def __init__(self):
+        self.report = _NullReport()
+
+    def press_button(self, button):
+        pass
+
+    def release_button(self, button):
+        pass
+
+    def left_joystick_float(self, x_value_float, y_value_float):
+        pass
+
+    def right_joystick_float(self, x_value_float, y_value_float):
+        pass
+
+    def left_trigger(self, value):
+        pass
+
+    def right_trigger(self, value):
+        pass
+
+    def update(self):
+        pass
+
+    def reset(self):
+        pass
+
+
+class _NullLock:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def _no_sleep(seconds):
+    pass
+
+
+_BUTTON_NAMES = [
+    "XUSB_GAMEPAD_DPAD_UP", "XUSB_GAMEPAD_DPAD_DOWN", "XUSB_GAMEPAD_DPAD_LEFT", "XUSB_GAMEPAD_DPAD_RIGHT",
+    "XUSB_GAMEPAD_A", "XUSB_GAMEPAD_B", "XUSB_GAMEPAD_X", "XUSB_GAMEPAD_Y",
+    "XUSB_GAMEPAD_LEFT_SHOULDER", "XUSB_GAMEPAD_RIGHT_SHOULDER", "XUSB_GAMEPAD_LEFT_THUMB",
+    "XUSB_GAMEPAD_RIGHT_THUMB", "XUSB_GAMEPAD_START", "XUSB_GAMEPAD_BACK", "XUSB_GAMEPAD_GUIDE",
+]
+
+
+def legacy_execute_keymap(gp, lock, keymap, sleep=_no_sleep):
+    """
+    The pre-compiler interpreter, kept as a baseline: prefix checks, numeric
+    string tests, float() conversions and a button_map rebuilt per press/release.
+    """
+    i = 0
+    while i < len(keymap):
+        command = keymap[i]
+        if isinstance(command, (int, float)) or (isinstance(command, str) and command.replace('.', '').replace('-', '').isdigit()):
+            sleep(float(command))
+            i += 1
+            continue
+        if command in ("left_joystick_float", "right_joystick_float"):
+            if i + 3 >= len(keymap):
+                break
+            stick = gp.left_joystick_float if command == "left_joystick_float" else gp.right_joystick_float
+            x = float(keymap[i + 1])
+            y = float(keymap[i + 2])
+            duration = float(keymap[i + 3])
+            with lock:
+                stick(x_value_float=x, y_value_float=y)
+                gp.update()
+            sleep(duration)
+            i += 4
+            if i + 2 < len(keymap) and keymap[i] == command:
+                with lock:
+                    stick(x_value_float=float(keymap[i + 1]), y_value_float=float(keymap[i + 2]))
+                    gp.update()
+                i += 3
+        elif command.startswith("press") and "TRIGGER" in command:
+            duration = float(keymap[i + 1])
+            with lock:
+                if command[5:] == "XUSB_GAMEPAD_LEFT_TRIGGER":
+                    gp.left_trigger(value=255)
+                else:
+                    gp.right_trigger(value=255)
+                gp.update()
+            sleep(duration)
+            i += 2
+        elif command.startswith("press"):
+            duration = float(keymap[i + 1])
+            button_map = {name: idx for idx, name in enumerate(_BUTTON_NAMES)}
+            button = button_map.get(command[5:])
+            with lock:
+                gp.press_button(button)
+                gp.update()
+            sleep(duration)
+            i += 2
+        elif command.startswith("release"):
+            name = command[7:]
+            if name == "XUSB_GAMEPAD_LEFT_TRIGGER":
+                with lock:
+                    gp.left_trigger(value=0)
+                    gp.update()
+            elif name == "XUSB_GAMEPAD_RIGHT_TRIGGER":
+                with lock:
+                    gp.right_trigger(value=0)
+                    gp.update()
+            else:
+                button_map = {name: idx for idx, name in enumerate(_BUTTON_NAMES)}
+                with lock:
+                    gp.release_button(button_map.get(name))
+                    gp.update()
+            i += 1
+        else:
+            i += 1
+
+
+def null_gamepad_state() -> ControllerState:
+    """The bridge's controller state and vgamepad backend, uncapped, sending to a NullGamepad."""
+    backend = VgamepadBackend()
+    backend.gamepad = NullGamepad()
+    return ControllerState(backend.send, max_rate_hz=0)
+
+
+def compiled_execute(state: ControllerState, program: tuple, sleep=_no_sleep, clock=time.perf_counter):
+    """
+    Play a compiled program the way the scheduler does, inline: steps up to
+    each wait are applied to the controller state and flushed as one report.
+    Only the scheduler's thread and heap are left out.
+    """
+    for op, a, b in program:
+        if op == OP_WAIT:
+            state.flush(clock())
+            sleep(a)
+            continue
+        state.apply(op, a, b)
+    state.flush(clock())
+
+
+def legacy_extract_valid_words(text: str) -> list[str]:
+    """
+    The pre-automaton status-word filter, kept as a baseline: up to 30 rounds
+    of str.replace per filter word and repetition count for long tokens.
+    """
+    if not text or not text.strip():
+        return []
+
+    # Convert to lowercase and strip non-alphabetic
+    text_lower = ''.join(c for c in text.lower() if c.isalpha() or c.isspace())
+
+    # Sort filter words by length (longest first) for better matching
+    sorted_filter_words = sorted(FILTER_WORDS, key=len, reverse=True)
+
+    # Split by spaces
+    words = text_lower.split()
+    valid_words = []
+
+    for word in words:
+        if not word or len(word) < 2:
+            continue
+
+        # If word is suspiciously long (> 14 chars), aggressively strip filter words
+        if len(word) > 14:
+            cleaned = word
+            max_iterations = 30  # More iterations for complex cases
+            iteration = 0
+
+            while iteration < max_iterations and cleaned:
+                iteration += 1
+                original = cleaned
+
+                # Remove all filter words (try multiple times to catch all patterns)
+                for fw in sorted_filter_words:
+                    # Remove all occurrences
+                    cleaned = cleaned.replace(fw, '')
+                    # Remove repeated patterns (2x, 3x, etc.)
+                    for repeat in range(10, 0, -1):  # Try up to 10 repetitions
+                        pattern = fw * repeat
+                        if pattern in cleaned:
+                            cleaned = cleaned.replace(pattern, '')
+
+                # If nothing changed, we're done
+                if cleaned == original:
+                    break
+
+            # If nothing left after stripping, skip it
+            if not cleaned or len(cleaned) < 2:
+                continue
+
+            # Final check: if it still contains any filter word, skip it
+            if any(fw in cleaned for fw in FILTER_WORDS):
+                continue
+
+            word = cleaned
+
+        # Final validation: must be reasonable length and not a status word
+        if (len(word) >= 2 and
+            len(word) <= 20 and
+            word not in FILTER_WORDS and
+            not any(fw in word for fw in FILTER_WORDS)):
+            valid_words.append(word)
+
+    return valid_words
+
+def legacy_is_valid_word(word: str) -> bool:
+    """Check if a word is a valid transcription (not a status message)."""
+    if not word or len(word) < 2:  # Too short to be meaningful
+        return False
+    if word in FILTER_WORDS:
+        return False
+    # Check if it's a repeated status message (like "speaknowspeaknow")
+    if any(filter_word in word for filter_word in FILTER_WORDS):
+        return False
+    # Check if word is suspiciously long (likely concatenated status messages)
+    if len(word) > 20:  # Normal words shouldn't be this long
+        return False
+    # Check for repeated patterns (like "speaknowspeaknow" or "recordingrecording")
+    for filter_word in FILTER_WORDS:
+        if filter_word * 2 in word:  # Repeated status word
+            return False
+    return True
+
+
+# Realtime callback texts as they arrive: clean partials, status text leaking
+# in, and status words glued onto commands
+FILTER_SAMPLES = [
+    "jump",
+    "Jump!",
+    "left punch",
+    "speak now jump",
+    "speaknowspeaknowjump",
+    "speaknowspeaknowspeaknowuppercut",
+    "recordingrecordingtranscribing left kick",
+    "listeninglisteningdodge roll",
+    "Block, block, jump forward.",
+    "modelloadedreadyspeaknow",
+    "transcribingtranscribing",
+    "warningerrorheavy punch",
+]
+
+
+# Everyday words that should not snap to any command
+FUZZY_NEGATIVES = ["hello", "the", "what", "yeah", "please", "wait", "nothing", "again", "maybe", "sorry"]
+
+
+def misrecognition_corpus(synonyms_path: str, words: set) -> list:
+    """
+    [(heard, expected)] from the synonyms table: each synonym phrase that lines
+    up word for word with its keyword gives the misheard words, kept when the
+    expected word is in the vocabulary and the heard one isn't. FUZZY_NEGATIVES
+    are added with expected None.
+    """
+    with open(synonyms_path, "r", encoding="utf-8") as f:
+        synonyms = json.load(f).get("synonyms", [])
+    pairs = {}
+    for entry in synonyms:
+        target = entry.get("keyword_match", "").lower().split()
+        for synonym in entry.get("synonym_words", []):
+            source = synonym.lower().split()
+            if len(source) == len(target):
+                for heard, expected in zip(source, target):
+                    if heard != expected and expected in words and heard not in words:
+                        pairs.setdefault(heard, expected)
+    return sorted(pairs.items()) + [(w, None) for w in FUZZY_NEGATIVES if w not in words]
+
+
+def difflib_lookup(words: list, threshold: float):
+    """The previous snapping rule, kept as a baseline: best SequenceMatcher ratio over every word."""
+    def lookup(heard):
+        best, score = None, 0.0
+        for candidate in words:
+            ratio = SequenceMatcher(None, heard, candidate).ratio()
+            if ratio > score:
+                best, score = candidate, ratio
+        return (best if score >= threshold else None), score
+    return lookup
+
+
+def _load_actions(profile_path: str) -> list:
+    """Return the profile's keymaps as the JSON strings the host sends."""
+    with open(profile_path, "r", encoding="utf-8") as f:
+        profile = json.load(f)
+    return [json.dumps(entry["keymap"]) for entry in profile.get("keywords", []) if entry.get("keymap")]
+
+
+def bench_keymap(args):
+    actions = _load_actions(args.profile)
+    if not actions:
+        print(f"no keymaps in {args.profile}", file=sys.stderr)
+        return 1
+
+    gp = NullGamepad()
+    lock = _NullLock()
+    steps = sum(len(json.loads(a)) for a in actions) * args.iterations
+
+    # Legacy path: json.loads + token interpreter per command
+    start = time.perf_counter()
+    for _ in range(args.iterations):
+        for action in actions:
+            legacy_execute_keymap(gp, lock, json.loads(action))
+    legacy = time.perf_counter() - start
+
+    # Compiled path: cached lookup by action string, then the bridge's controller state and backend
+    state = null_gamepad_state()
+    for action in actions:
+        load_program(action)  # warm the cache, as a profile load would
+    start = time.perf_counter()
+    for _ in range(args.iterations):
+        for action in actions:
+            compiled_execute(state, load_program(action))
+    compiled = time.perf_counter() - start
+
+    commands = len(actions) * args.iterations
+    print(f"profile: {os.path.basename(args.profile)} ({len(actions)} keymaps, {args.iterations} iterations)")
+    print(f"{'path':<10} {'per command':>14} {'per token':>12}")
+    for name, total in (("legacy", legacy), ("compiled", compiled)):
+        print(f"{name:<10} {total / commands * 1e6:>11.2f} us {total / steps * 1e9:>9.0f} ns")
+    print(f"speedup: {legacy / compiled:.2f}x")
+    return 0
+
+
+def bench_timing(args):
+    holds = [float(h) / 1000.0 for h in args.holds_ms.split(",") if h.strip()]
+    spin = PrecisionTimer(spin_budget=args.spin_budget_ms / 1000.0)
+    clock = time.perf_counter
+
+    print(f"{args.samples} samples per hold, spin budget {args.spin_budget_ms:g} ms")
+    print(f"{'hold':>8}  {'path':<8} {'p50 error':>11} {'p99 error':>11} {'max error':>11}")
+    for hold in holds:
+        sleep_stats = JitterStats(window=args.samples)
+        spin.stats = JitterStats(window=args.samples)
+        for _ in range(args.samples):
+            # Current path: relative time.sleep, error measured against the intended end
+            start = clock()
+            time.sleep(hold)
+            sleep_stats.record(clock() - (start + hold))
+            spin.sleep(hold)
+        for name, stats in (("sleep", sleep_stats), ("spin", spin.stats)):
+            snap = stats.snapshot()
+            print(f"{hold * 1000:>6.1f}ms  {name:<8} {snap['p50_ms']:>8.3f} ms {snap['p99_ms']:>8.3f} ms {snap['max_ms']:>8.3f} ms")
+    return 0
+
+
+def bench_filter(args):
+    mismatches = [t for t in FILTER_SAMPLES if legacy_extract_valid_words(t) != extract_valid_words(t)]
+    tokens = [w for t in FILTER_SAMPLES for w in t.lower().split()]
+
+    results = []
+    for name, extract, check in (("legacy", legacy_extract_valid_words, legacy_is_valid_word),
+                                 ("regex", extract_valid_words, is_valid_word)):
+        start = time.perf_counter()
+        for _ in range(args.iterations):
+            for text in FILTER_SAMPLES:
+                extract(text)
+        extract_total = time.perf_counter() - start
+        start = time.perf_counter()
+        for _ in range(args.iterations):
+            for token in tokens:
+                check(token)
+        check_total = time.perf_counter() - start
+        results.append((name, extract_total, check_total))
+
+    callbacks = len(FILTER_SAMPLES) * args.iterations
+    checks = len(tokens) * args.iterations
+    print(f"{len(FILTER_SAMPLES)} callback texts, {len(FILTER_WORDS)} filter words, {args.iterations} iterations")
+    print(f"{'path':<8} {'per callback':>14} {'per is_valid_word':>19}")
+    for name, extract_total, check_total in results:
+        print(f"{name:<8} {extract_total / callbacks * 1e6:>11.2f} us {check_total / checks * 1e9:>16.0f} ns")
+    print(f"speedup: {results[0][1] / results[1][1]:.2f}x per callback, {results[0][2] / results[1][2]:.2f}x per check")
+    for text in mismatches:
+        print(f"output differs for {text!r}: legacy {legacy_extract_valid_words(text)} vs regex {extract_valid_words(text)}")
+    return 0
+
+
+def bench_fuzzy(args):
+    vocabulary = load_vocabulary(args.profile, synonyms_path=None)
+    words = vocabulary.words
+    if args.corpus:
+        corpus = []
+        with open(args.corpus, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    corpus.append((entry["heard"], entry.get("expected")))
+    else:
+        corpus = misrecognition_corpus(args.synonyms, set(words))
+    if not corpus:
+        print("empty corpus", file=sys.stderr)
+        return 1
+
+    start = time.perf_counter()
+    index = KeywordIndex(words)
+    build = time.perf_counter() - start
+
+    print(f"profile: {os.path.basename(args.profile)} ({len(words)} words, index built in {build * 1000:.2f} ms)")
+    print(f"corpus: {len(corpus)} misheard words ({sum(1 for _, e in corpus if e is None)} should be rejected)")
+    print(f"{'path':<8} {'correct':>8} {'wrong':>6} {'missed':>7} {'p50':>10} {'p99':>10}")
+    clock = time.perf_counter
+    for name, lookup in (("difflib", difflib_lookup(words, 0.75)), ("index", index.lookup)):
+        correct = wrong = missed = 0
+        for heard, expected in corpus:
+            match, _ = lookup(heard)
+            if match == expected:
+                correct += 1
+            elif match is None:
+                missed += 1
+            else:
+                wrong += 1
+        samples = []
+        for _ in range(args.iterations):
+            for heard, _ in corpus:
+                before = clock()
+                lookup(heard)
+                samples.append(clock() - before)
+        samples.sort()
+        print(f"{name:<8} {correct:>8} {wrong:>6} {missed:>7} {percentile(samples, 50) * 1e6:>7.1f} us "
+              f"{percentile(samples, 99) * 1e6:>7.1f} us")
+        if args.verbose:
+            for heard, expected in corpus:
+                match, score = lookup(heard)
+                mark = "ok" if match == expected else "--"
+                print(f"    {mark} {heard:<12} -> {str(match):<10} ({score:.2f}, expected {expected})")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Phonix Python microbenchmarks")
+    sub = parser.add_subparsers(dest="bench", required=True)
+
+    keymap = sub.add_parser("keymap", help="keymap dispatch overhead: legacy interpreter vs compiled programs")
+    keymap.add_argument("--profile", default=DEFAULT_PROFILE)
+    keymap.add_argument("--iterations", type=int, default=2000)
+    keymap.set_defaults(func=bench_keymap)
+
+    timing = sub.add_parser("timing", help="hold timing error: time.sleep vs sleep-then-spin")
+    timing.add_argument("--holds-ms", default="1,4,8,16")
+    timing.add_argument("--samples", type=int, default=200)
+    timing.add_argument("--spin-budget-ms", type=float, default=DEFAULT_SPIN_BUDGET * 1000.0)
+    timing.set_defaults(func=bench_timing)
+
+    filter_ = sub.add_parser("filter", help="status-word filtering per realtime callback: legacy scans vs one regex")
+    filter_.add_argument("--iterations", type=int, default=2000)
+    filter_.set_defaults(func=bench_filter)
+
+    fuzzy = sub.add_parser("fuzzy", help="misheard-word matching: accuracy and lookup latency, difflib vs keyword index")
+    fuzzy.add_argument("--profile", default=DEFAULT_PROFILE)
+    fuzzy.add_argument("--synonyms", default=DEFAULT_SYNONYMS_PATH, help="corpus source when --corpus isn't given")
+    fuzzy.add_argument("--corpus", help='JSONL of {"heard": ..., "expected": ... or null}')
+    fuzzy.add_argument("--iterations", type=int, default=200)
+    fuzzy.add_argument("--verbose", action="store_true", help="print every corpus lookup")
+    fuzzy.set_defaults(func=bench_fuzzy)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,279 +1,383 @@
 """
 Controller emulation bridge for Phonix.
-Handles Xbox controller emulation using vgamepad library.
-Parses keymap commands from TypeScript and executes them.
+Handles Xbox controller emulation through a pluggable output backend
+(vgamepad by default, or an in-memory recording for benchmarks/tests),
+for one virtual controller or, with --pads N, several (see pads.py).
+Parses keymap commands from TypeScript and executes them, from JSON lines
+or, with --binary, from the framed protocol in ipc_frames.py.
+With --stats-interval / --stats-port it reports intake rates, queue depth,
+dispatch latency and sleep overshoot per pad, and {"command": "sample"}
+runs the sampling profiler (see runtime_stats.py).
 """
 import sys
 import json
+import struct
+import argparse
 import time
-import threading
 
 # DEBUG: Print python executable being used
 print(f"[controller_bridge] Python Executable: {sys.executable}", file=sys.stderr, flush=True)
 
-import vgamepad as vg
+from keymap_compiler import KeymapError, load_program, preload_programs
+from profile_cache import load_compiled
+from controller_state import DEFAULT_REPORT_RATE_HZ
+from timing import DEFAULT_SPIN_BUDGET
+from backends import BACKENDS, create_backend
+from pads import Pad, MAX_PADS, parse_pad, pad_record_path
+import tracing
+from queue_policy import (
+    QueuePolicy, RESERVED_COMMANDS, parse_priority, DEFAULT_MAX_AGE_MS, DEFAULT_LATE_MS,
+)
+import runtime_stats
+from runtime_stats import RuntimeStats
+import ipc_frames
+from ipc_frames import (
+    FrameError, FrameWriter, read_frame, OP_REGISTER, OP_ACTIONS, OP_COMMAND,
+    ACK_ACCEPTED, ACK_STALE, ACK_PRIORITY, ACK_UNKNOWN_KEYMAP, ACK_NOT_READY, ACK_UNKNOWN_PAD,
+    DONE_COMPLETED, DONE_PREEMPTED,
+)
 
-# Global gamepad instance
-gamepad = None
-gamepad_lock = threading.Lock()
+# Virtual controllers, each with its own backend and scheduler; created by start_playback()
+pads = []
 
-def init_gamepad():
-    """Initialize the virtual Xbox controller."""
-    global gamepad
-    if gamepad is None:
-        try:
-            gamepad = vg.VX360Gamepad()
-            print("[controller_bridge] virtual Xbox controller initialized", flush=True)
-        except AssertionError as e:
-            if "ViGEmBus" in str(e):
-                print("[controller_bridge] ERROR: ViGEmBus driver not installed!", file=sys.stderr, flush=True)
-                print("[controller_bridge] Please install ViGEmBus from: https://github.com/ViGEm/ViGEmBus/releases", file=sys.stderr, flush=True)
-                print("[controller_bridge] After installation, restart your computer and try again.", file=sys.stderr, flush=True)
-            raise
-    return gamepad
-
-def execute_keymap(keymap: list):
+# Staleness deadline and intake counters; replaced in main() with command-line settings
+policy = QueuePolicy()
+
+# Binary protocol (--binary): frames to the host, and keymaps registered by ID
+frames = None
+keymap_registry = {}
+
+# How long a command waits for its neutral report before acking anyway
+COMMAND_REPORT_TIMEOUT = 0.5
+
+# Intake, queue and timing stats (--stats-interval / --stats-port); the sampling profiler is created in main()
+stats = RuntimeStats("bridge")
+sampler = None
+
+def open_backend(out, max_retries: int = 3, retry_delay: float = 2.0):
     """
-    Execute a keymap command sequence.
-    
-    Keymap format examples:
-    - ["left_joystick_float", x, y, duration, "left_joystick_float", 0, 0]
-    - ["right_joystick_float", x, y, duration, "right_joystick_float", 0, 0]
-    - ["pressXUSB_GAMEPAD_DPAD_RIGHT", duration, "releaseXUSB_GAMEPAD_DPAD_RIGHT"]
-    
-    Commands are executed sequentially with timing delays.
+    Open an output backend with retry logic.
+    Sometimes vgamepad fails to initialize on first try, so we retry a few times.
+    Exits the process if every attempt fails.
     """
-    if not keymap or len(keymap) < 3:
-        print(f"[controller_bridge] invalid keymap: {keymap}", file=sys.stderr, flush=True)
-        return
-    
-    gp = init_gamepad()
-    
-    i = 0
-    while i < len(keymap):
-        command = keymap[i]
-        
-        # Handle numeric delays (standalone numbers between commands)
-        if isinstance(command, (int, float)) or (isinstance(command, str) and command.replace('.', '').replace('-', '').isdigit()):
-            # This is a delay value, sleep and skip it
-            delay = float(command)
-            time.sleep(delay)
-            i += 1
-            continue
-        
-        if command == "left_joystick_float":
-            if i + 3 < len(keymap):
-                x = float(keymap[i + 1])
-                y = float(keymap[i + 2])
-                duration = float(keymap[i + 3])
-                
-                with gamepad_lock:
-                    gp.left_joystick_float(x_value_float=x, y_value_float=y)
-                    gp.update()
-                
-                time.sleep(duration)
-                i += 4
-                
-                # Check if next command is a reset (same joystick command with 0, 0)
-                if i + 2 < len(keymap) and keymap[i] == "left_joystick_float":
-                    reset_x = float(keymap[i + 1])
-                    reset_y = float(keymap[i + 2])
-                    with gamepad_lock:
-                        gp.left_joystick_float(x_value_float=reset_x, y_value_float=reset_y)
-                        gp.update()
-                    i += 3  # Consume reset command, x, y
-            else:
-                print(f"[controller_bridge] invalid left_joystick_float command", file=sys.stderr, flush=True)
-                break
-                
-        elif command == "right_joystick_float":
-            if i + 3 < len(keymap):
-                x = float(keymap[i + 1])
-                y = float(keymap[i + 2])
-                duration = float(keymap[i + 3])
-                
-                with gamepad_lock:
-                    gp.right_joystick_float(x_value_float=x, y_value_float=y)
-                    gp.update()
-                
-                time.sleep(duration)
-                i += 4
-                
-                # Check if next command is a reset (same joystick command with 0, 0)
-                if i + 2 < len(keymap) and keymap[i] == "right_joystick_float":
-                    reset_x = float(keymap[i + 1])
-                    reset_y = float(keymap[i + 2])
-                    with gamepad_lock:
-                        gp.right_joystick_float(x_value_float=reset_x, y_value_float=reset_y)
-                        gp.update()
-                    i += 3  # Consume reset command, x, y
-            else:
-                print(f"[controller_bridge] invalid right_joystick_float command", file=sys.stderr, flush=True)
-                break
-                
-        elif command.startswith("press") and "TRIGGER" in command:
-            # Trigger press: "pressXUSB_GAMEPAD_LEFT_TRIGGER" or "pressXUSB_GAMEPAD_RIGHT_TRIGGER"
-            # Triggers are analog (0.0 to 1.0), not digital buttons
-            trigger_name = command[5:]  # Remove "press" prefix
-            if i + 1 < len(keymap):
-                duration = float(keymap[i + 1])
-                
-                if trigger_name == "XUSB_GAMEPAD_LEFT_TRIGGER":
-                    with gamepad_lock:
-                        gp.left_trigger(value=255)  # Full trigger press (0-255)
-                        gp.update()
-                    time.sleep(duration)
-                    # Trigger stays pressed until explicit release command
-                    i += 2
-                elif trigger_name == "XUSB_GAMEPAD_RIGHT_TRIGGER":
-                    with gamepad_lock:
-                        gp.right_trigger(value=255)  # Full trigger press (0-255)
-                        gp.update()
-                    time.sleep(duration)
-                    # Trigger stays pressed until explicit release command
-                    i += 2
-                else:
-                    print(f"[controller_bridge] unknown trigger: {trigger_name}", file=sys.stderr, flush=True)
-                    i += 1
-            else:
-                print(f"[controller_bridge] invalid trigger press command", file=sys.stderr, flush=True)
-                break
-                
-        elif command.startswith("press"):
-            # Button press: "pressXUSB_GAMEPAD_DPAD_RIGHT" -> button is "XUSB_GAMEPAD_DPAD_RIGHT"
-            button_name = command[5:]  # Remove "press" prefix
-            if i + 1 < len(keymap):
-                duration = float(keymap[i + 1])
-                
-                # Map button names to vgamepad button constants
-                button_map = {
-                    "XUSB_GAMEPAD_DPAD_UP": vg.XUSB_BUTTON.XUSB_GAMEPAD_DPAD_UP,
-                    "XUSB_GAMEPAD_DPAD_DOWN": vg.XUSB_BUTTON.XUSB_GAMEPAD_DPAD_DOWN,
-                    "XUSB_GAMEPAD_DPAD_LEFT": vg.XUSB_BUTTON.XUSB_GAMEPAD_DPAD_LEFT,
-                    "XUSB_GAMEPAD_DPAD_RIGHT": vg.XUSB_BUTTON.XUSB_GAMEPAD_DPAD_RIGHT,
-                    "XUSB_GAMEPAD_A": vg.XUSB_BUTTON.XUSB_GAMEPAD_A,
-                    "XUSB_GAMEPAD_B": vg.XUSB_BUTTON.XUSB_GAMEPAD_B,
-                    "XUSB_GAMEPAD_X": vg.XUSB_BUTTON.XUSB_GAMEPAD_X,
-                    "XUSB_GAMEPAD_Y": vg.XUSB_BUTTON.XUSB_GAMEPAD_Y,
-                    "XUSB_GAMEPAD_LEFT_SHOULDER": vg.XUSB_BUTTON.XUSB_GAMEPAD_LEFT_SHOULDER,
-                    "XUSB_GAMEPAD_RIGHT_SHOULDER": vg.XUSB_BUTTON.XUSB_GAMEPAD_RIGHT_SHOULDER,
-                    "XUSB_GAMEPAD_LEFT_THUMB": vg.XUSB_BUTTON.XUSB_GAMEPAD_LEFT_THUMB,
-                    "XUSB_GAMEPAD_RIGHT_THUMB": vg.XUSB_BUTTON.XUSB_GAMEPAD_RIGHT_THUMB,
-                    "XUSB_GAMEPAD_START": vg.XUSB_BUTTON.XUSB_GAMEPAD_START,
-                    "XUSB_GAMEPAD_BACK": vg.XUSB_BUTTON.XUSB_GAMEPAD_BACK,
-                    "XUSB_GAMEPAD_GUIDE": vg.XUSB_BUTTON.XUSB_GAMEPAD_GUIDE,
-                }
-                
-                button = button_map.get(button_name)
-                if button:
-                    with gamepad_lock:
-                        gp.press_button(button)
-                        gp.update()
-                    
-                    time.sleep(duration)
-                    i += 2
-                else:
-                    print(f"[controller_bridge] unknown button: {button_name}", file=sys.stderr, flush=True)
-                    i += 1
-            else:
-                print(f"[controller_bridge] invalid press command", file=sys.stderr, flush=True)
-                break
-                
-        elif command.startswith("release"):
-            # Button release: "releaseXUSB_GAMEPAD_DPAD_RIGHT" -> button is "XUSB_GAMEPAD_DPAD_RIGHT"
-            button_name = command[7:]  # Remove "release" prefix
-            
-            # Handle trigger releases
-            if button_name == "XUSB_GAMEPAD_LEFT_TRIGGER":
-                with gamepad_lock:
-                    gp.left_trigger(value=0)
-                    gp.update()
-                i += 1
-            elif button_name == "XUSB_GAMEPAD_RIGHT_TRIGGER":
-                with gamepad_lock:
-                    gp.right_trigger(value=0)
-                    gp.update()
-                i += 1
-            else:
-                # Map button names to vgamepad button constants
-                button_map = {
-                "XUSB_GAMEPAD_DPAD_UP": vg.XUSB_BUTTON.XUSB_GAMEPAD_DPAD_UP,
-                "XUSB_GAMEPAD_DPAD_DOWN": vg.XUSB_BUTTON.XUSB_GAMEPAD_DPAD_DOWN,
-                "XUSB_GAMEPAD_DPAD_LEFT": vg.XUSB_BUTTON.XUSB_GAMEPAD_DPAD_LEFT,
-                "XUSB_GAMEPAD_DPAD_RIGHT": vg.XUSB_BUTTON.XUSB_GAMEPAD_DPAD_RIGHT,
-                "XUSB_GAMEPAD_A": vg.XUSB_BUTTON.XUSB_GAMEPAD_A,
-                "XUSB_GAMEPAD_B": vg.XUSB_BUTTON.XUSB_GAMEPAD_B,
-                "XUSB_GAMEPAD_X": vg.XUSB_BUTTON.XUSB_GAMEPAD_X,
-                "XUSB_GAMEPAD_Y": vg.XUSB_BUTTON.XUSB_GAMEPAD_Y,
-                "XUSB_GAMEPAD_LEFT_SHOULDER": vg.XUSB_BUTTON.XUSB_GAMEPAD_LEFT_SHOULDER,
-                "XUSB_GAMEPAD_RIGHT_SHOULDER": vg.XUSB_BUTTON.XUSB_GAMEPAD_RIGHT_SHOULDER,
-                "XUSB_GAMEPAD_LEFT_THUMB": vg.XUSB_BUTTON.XUSB_GAMEPAD_LEFT_THUMB,
-                "XUSB_GAMEPAD_RIGHT_THUMB": vg.XUSB_BUTTON.XUSB_GAMEPAD_RIGHT_THUMB,
-                "XUSB_GAMEPAD_START": vg.XUSB_BUTTON.XUSB_GAMEPAD_START,
-                "XUSB_GAMEPAD_BACK": vg.XUSB_BUTTON.XUSB_GAMEPAD_BACK,
-                "XUSB_GAMEPAD_GUIDE": vg.XUSB_BUTTON.XUSB_GAMEPAD_GUIDE,
-            }
-            
-            button = button_map.get(button_name)
-            if button:
-                with gamepad_lock:
-                    gp.release_button(button)
-                    gp.update()
-            
-            i += 1
-        else:
-            # Unknown command, skip it
-            print(f"[controller_bridge] unknown command: {command}", file=sys.stderr, flush=True)
-            i += 1
-
-def main():
-    """Main function to handle controller commands from stdin."""
-    # Initialize gamepad with retry logic
-    # Sometimes vgamepad fails to initialize on first try, so we retry a few times
-    max_retries = 3
     for attempt in range(max_retries):
         try:
-            init_gamepad()
-            print("[controller_bridge] ready", flush=True)
-            break
+            out.open()
+            return out
         except (AssertionError, Exception) as e:
             if attempt < max_retries - 1:
                 print(f"[controller_bridge] WARNING: Failed to initialize (attempt {attempt+1}/{max_retries}). Retrying...", file=sys.stderr, flush=True)
-                time.sleep(2)
+                time.sleep(retry_delay)
             else:
                 print("[controller_bridge] ERROR: Failed to initialize virtual controller after retries", file=sys.stderr, flush=True)
                 print(f"[controller_bridge] Error: {e}", file=sys.stderr, flush=True)
                 sys.exit(1)
 
-    for line in sys.stdin:
-        line = line.strip()
-        if not line:
-            continue
+def announce_ready():
+    """Tell the host every controller is open."""
+    if frames is not None:
+        frames.send(ipc_frames.encode_ready())
+    else:
+        print("[controller_bridge] ready", flush=True)
+
+def start_playback(outs: list, spin_budget: float = DEFAULT_SPIN_BUDGET, report_rate_hz: float = DEFAULT_REPORT_RATE_HZ):
+    """
+    Start one scheduler per opened backend; the backend at index i is pad i.
+    Playback runs on the scheduler threads so reading stdin never waits on a hold,
+    and steps due in the same tick on a pad are coalesced into one report.
+    Returns the pads.
+    """
+    global pads
+    pads = [Pad(index, out, spin_budget=spin_budget, report_rate_hz=report_rate_hz) for index, out in enumerate(outs)]
+    for pad in pads:
+        if frames is not None:
+            pad.scheduler.on_finished = send_done
+        watch_pad(pad)
+        pad.scheduler.start()
+    return pads
+
+def watch_pad(pad: Pad):
+    """Report a pad's queue depth, reports and timing histograms in the runtime stats."""
+    name = f"pad{pad.index}"
+    stats.gauge(f"{name}.active", pad.scheduler.active_count)
+    stats.gauge(f"{name}.reports", lambda: {"sent": pad.state.reports_sent, "deferred": pad.state.reports_deferred})
+    stats.histogram(f"{name}.dispatch", pad.scheduler.dispatch_stats)
+    stats.histogram(f"{name}.sleep_overshoot", pad.scheduler.timer.stats)
+
+def pad_for(index: int):
+    """The pad at index, or None before playback has started or past the last pad."""
+    return pads[index] if 0 <= index < len(pads) else None
+
+@stats.timed("intake.line")
+def handle_line(line: str):
+    """
+    Handle one line of the stdin protocol:
+    - {"action": "<keymap JSON>", "pad": <index>, "ts": <emit epoch ms>, "priority": "low" | "normal" | "high", "trace": "<id>"}
+    - {"command": "release_all", "pad": <index>}
+    - {"command": "sample", "seconds": <n>} (see sample())
+    Everything but "action" / "command" is optional; a command without "pad" applies
+    to every pad. Returns the playback id, or None if the line was a command,
+    ignored, dropped or rejected.
+    """
+    line = line.strip()
+    if not line:
+        return None
+
+    try:
+        msg = json.loads(line)
+    except json.JSONDecodeError:
+        print(f"[controller_bridge] bad json: {line}", file=sys.stderr, flush=True)
+        return None
+
+    if not isinstance(msg, dict):
+        print(f"[controller_bridge] bad message: {line}", file=sys.stderr, flush=True)
+        return None
 
+    command = msg.get("command")
+    if command == "sample":
+        sample(msg.get("seconds"))
+        return None
+    if command:
         try:
-            msg = json.loads(line)
-        except json.JSONDecodeError:
-            print(f"[controller_bridge] bad json: {line}", file=sys.stderr, flush=True)
-            continue
+            pad = None if msg.get("pad") is None else parse_pad(msg["pad"], len(pads))
+        except ValueError as e:
+            print(f"[controller_bridge] {command}: {e}", file=sys.stderr, flush=True)
+            return None
+        handle_command(command, pad)
+        return None
+
+    action = msg.get("action")
+    if not action:
+        return None
+
+    # Old actions are worse than none in a live game
+    if not policy.admit(msg):
+        return None
+
+    try:
+        priority = parse_priority(msg.get("priority"))
+        pad = parse_pad(msg.get("pad"), max(len(pads), 1))
+    except ValueError as e:
+        print(f"[controller_bridge] rejected action: {e}", file=sys.stderr, flush=True)
+        return None
 
-        action = msg.get("action")
-        if not action:
-            continue
+    try:
+        # Action is a JSON string of the keymap array; compiled programs are cached by it
+        program = load_program(action)
+    except KeymapError as e:
+        print(f"[controller_bridge] rejected action: {e}", file=sys.stderr, flush=True)
+        return None
 
+    # Check if the controller is initialized before executing
+    if pad_for(pad) is None:
+        print(f"[controller_bridge] WARNING: Controller not initialized, cannot execute: {action}", file=sys.stderr, flush=True)
+        return None
+    return submit_program(pads[pad], program, priority, msg.get("trace"))
+
+def submit_program(pad: Pad, program: tuple, priority: int, trace_id: str = None, tag=None):
+    """Start a compiled program on a pad's scheduler and count it. Returns the playback id, or None if refused."""
+    try:
+        if trace_id:
+            tracing.emit(trace_id, "keymap_dispatched")
+        playback_id = pad.scheduler.submit(program, priority, trace=trace_id, tag=tag)
+        if playback_id is None:
+            policy.record_dropped_priority()
+        else:
+            policy.record_accepted()
+        return playback_id
+    except Exception as e:
+        print(f"[controller_bridge] error executing action: {e}", file=sys.stderr, flush=True)
+        import traceback
+        traceback.print_exc(file=sys.stderr)
+        return None
+
+def handle_command(command: str, pad: int = None):
+    """
+    Run a reserved control command on one pad, or on every pad if pad is None.
+    release_all preempts every keymap and zeroes the controller; with --binary the
+    host gets an OP_COMMANDED ack once the neutral report has been sent, so it can
+    tell when it is safe to stop the bridge.
+    """
+    if command not in RESERVED_COMMANDS:
+        print(f"[controller_bridge] unknown command: {command}", file=sys.stderr, flush=True)
+        return
+    if pad is None:
+        targets = pads
+    elif pad_for(pad) is None:
+        print(f"[controller_bridge] {command}: no pad {pad}", file=sys.stderr, flush=True)
+        return
+    else:
+        targets = [pads[pad]]
+    cancelled = sum(target.scheduler.release_all() for target in targets)
+    for target in targets:
+        if not target.scheduler.wait_reported(timeout=COMMAND_REPORT_TIMEOUT):
+            print(f"[controller_bridge] {command}: pad {target.index} not reported yet", file=sys.stderr, flush=True)
+    print(f"[controller_bridge] {command}: cancelled {cancelled} keymaps", file=sys.stderr, flush=True)
+    if frames is not None:
+        frames.send(ipc_frames.encode_commanded(command, cancelled))
+
+def sample(seconds: float = None):
+    """Run the sampling profiler for seconds (default 5); while it runs, stop it early instead."""
+    if not sampler.start(seconds or runtime_stats.DEFAULT_SAMPLE_SECONDS):
+        sampler.stop()
+
+@stats.timed("intake.frame")
+def handle_frame(opcode: int, payload: bytes):
+    """Handle one frame of the binary protocol (see ipc_frames.py)."""
+    if opcode == OP_ACTIONS:
+        acks = [submit_action(*action) for action in ipc_frames.decode_actions(payload)]
+        stats.incr("intake.actions", len(acks))
+        frames.send(ipc_frames.encode_acks(acks))
+    elif opcode == OP_REGISTER:
+        register_keymaps(ipc_frames.decode_register(payload))
+    elif opcode == OP_COMMAND:
+        command, pad = ipc_frames.decode_command(payload)
+        if command == "sample":
+            sample()
+        else:
+            handle_command(command, pad)
+    else:
+        print(f"[controller_bridge] unknown frame opcode: {opcode}", file=sys.stderr, flush=True)
+
+def register_keymaps(keymaps: list):
+    """Compile uploaded keymaps under their IDs and report which failed."""
+    failed = []
+    for keymap_id, keymap in keymaps:
         try:
-            # Action is a JSON string of the keymap array, parse it
-            keymap = json.loads(action) if isinstance(action, str) else action
-            
-            # Check if gamepad is initialized before executing
-            if gamepad is None:
-                print(f"[controller_bridge] WARNING: Controller not initialized, cannot execute: {keymap}", file=sys.stderr, flush=True)
-                continue
-                
-            execute_keymap(keymap)
-        except Exception as e:
-            print(f"[controller_bridge] error executing action: {e}", file=sys.stderr, flush=True)
-            import traceback
-            traceback.print_exc(file=sys.stderr)
+            keymap_registry[keymap_id] = load_program(keymap)
+        except KeymapError as e:
+            keymap_registry.pop(keymap_id, None)
+            failed.append(keymap_id)
+            print(f"[controller_bridge] keymap {keymap_id} rejected: {e}", file=sys.stderr, flush=True)
+    print(f"[controller_bridge] registered {len(keymaps) - len(failed)} keymaps", file=sys.stderr, flush=True)
+    frames.send(ipc_frames.encode_registered(len(keymaps) - len(failed), failed))
+
+def submit_action(seq: int, keymap_id: int, pad: int, priority: int, ts: float, trace_id: str) -> tuple:
+    """Play one framed action; returns its ack record (seq, status, age ms)."""
+    msg = {"ts": ts}
+    age = policy.age_ms(msg)
+    program = keymap_registry.get(keymap_id)
+    if program is None:
+        return seq, ACK_UNKNOWN_KEYMAP, age
+    if not pads:
+        return seq, ACK_NOT_READY, age
+    if pad_for(pad) is None:
+        return seq, ACK_UNKNOWN_PAD, age
+    if not policy.admit(msg):
+        return seq, ACK_STALE, age
+    if submit_program(pads[pad], program, parse_priority(priority), trace_id, tag=seq) is None:
+        return seq, ACK_PRIORITY, age
+    return seq, ACK_ACCEPTED, age
+
+def send_done(finished: list):
+    """Scheduler callback (from every pad's thread): report ended playbacks of framed actions (tagged with their seq) to the host."""
+    records = [(seq, DONE_COMPLETED if completed else DONE_PREEMPTED,
+                None if start_delay is None else start_delay * 1000.0, play_time * 1000.0)
+               for seq, completed, start_delay, play_time in finished]
+    # A count is one byte: split big batches (e.g. release_all cancelling many keymaps)
+    for i in range(0, len(records), ipc_frames.MAX_BATCH):
+        frames.send(ipc_frames.encode_done(records[i:i + ipc_frames.MAX_BATCH]))
+
+def serve_frames(stream):
+    """Handle frames until the host closes the stream."""
+    while True:
+        try:
+            frame = read_frame(stream)
+        except FrameError as e:
+            # Framing is lost; nothing after this can be trusted
+            print(f"[controller_bridge] {e}; closing", file=sys.stderr, flush=True)
+            return
+        if frame is None:
+            return
+        try:
+            handle_frame(*frame)
+        except (FrameError, ValueError, IndexError, struct.error) as e:
+            print(f"[controller_bridge] bad frame: {e}", file=sys.stderr, flush=True)
+
+def intake_counters() -> dict:
+    """Accepted / dropped / preempted / late action counts for this session."""
+    counters = policy.snapshot()
+    counters["preempted"] = sum(pad.scheduler.preempted for pad in pads)
+    return counters
+
+def print_playback_summary():
+    """Print timing and report counters for the finished session to stderr, per pad when there are several."""
+    for pad in pads:
+        prefix = f"[controller_bridge] pad {pad.index} " if len(pads) > 1 else "[controller_bridge] "
+        jitter = pad.scheduler.timer.stats.snapshot()
+        print(f"{prefix}timing: {jitter['count']} timed steps, p50 {jitter['p50_ms']:.3f} ms, "
+              f"p99 {jitter['p99_ms']:.3f} ms, max {jitter['max_ms']:.3f} ms late", file=sys.stderr, flush=True)
+        state = pad.state
+        print(f"{prefix}reports: {state.reports_sent} sent, {state.reports_deferred} deferred by rate cap",
+              file=sys.stderr, flush=True)
+    counters = intake_counters()
+    print(f"[controller_bridge] actions: {counters['accepted']} accepted, {counters['dropped_stale']} dropped stale, "
+          f"{counters['dropped_priority']} dropped by priority, {counters['preempted']} preempted, {counters['late']} late",
+          file=sys.stderr, flush=True)
+
+def main():
+    """Main function to handle controller commands from stdin."""
+    parser = argparse.ArgumentParser(description="Phonix controller bridge")
+    parser.add_argument("--profile", help="profile JSON whose keymaps are compiled at startup")
+    parser.add_argument("--spin-budget-ms", type=float, default=DEFAULT_SPIN_BUDGET * 1000.0,
+                        help="spin this long before each deadline instead of sleeping (0 = plain sleep)")
+    parser.add_argument("--report-rate-hz", type=float, default=DEFAULT_REPORT_RATE_HZ,
+                        help="maximum gamepad reports per second (0 = uncapped)")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="vgamepad",
+                        help="where controller reports go (default: virtual Xbox controller)")
+    parser.add_argument("--record", help="with --backend recording, also write reports to this JSONL file "
+                                         "(one file per pad, out.pad0.jsonl, ..., with several pads)")
+    parser.add_argument("--pads", type=int, default=1, help=f"number of virtual controllers (1-{MAX_PADS})")
+    parser.add_argument("--max-age-ms", type=float, default=DEFAULT_MAX_AGE_MS,
+                        help="drop actions emitted longer ago than this (0 = never drop)")
+    parser.add_argument("--late-ms", type=float, default=DEFAULT_LATE_MS,
+                        help="count actions older than this as late")
+    parser.add_argument("--binary", action="store_true",
+                        help="speak the framed binary protocol (ipc_frames.py) instead of JSON lines")
+    runtime_stats.add_arguments(parser)
+    args = parser.parse_args()
+    if not 1 <= args.pads <= MAX_PADS:
+        parser.error(f"--pads must be between 1 and {MAX_PADS}")
+
+    global policy, frames, sampler
+    policy = QueuePolicy(max_age_ms=args.max_age_ms, late_ms=args.late_ms)
+    stats.gauge("actions", intake_counters)
+    if args.binary:
+        # stdout carries frames only; any other print goes to stderr
+        frames = FrameWriter(sys.stdout.buffer)
+        sys.stdout = sys.stderr
+
+    if args.profile:
+        try:
+            # Compiled once per profile version, shared with the speech process through the cache
+            compiled = load_compiled(args.profile)
+            preload_programs(compiled.programs_by_keymap())
+            source = "cached" if compiled.from_cache else "compiled"
+            print(f"[controller_bridge] {len(compiled.programs)} keymaps from profile ({source})", file=sys.stderr, flush=True)
+            for keyword, error in compiled.rejected.items():
+                # Still rejected individually if they arrive
+                print(f"[controller_bridge] WARNING: keyword '{keyword}': {error}", file=sys.stderr, flush=True)
+        except (OSError, ValueError) as e:
+            print(f"[controller_bridge] WARNING: profile precompile failed: {e}", file=sys.stderr, flush=True)
+
+    outs = [open_backend(create_backend(args.backend, record_path=pad_record_path(args.record, index, args.pads)))
+            for index in range(args.pads)]
+    start_playback(outs, spin_budget=args.spin_budget_ms / 1000.0, report_rate_hz=args.report_rate_hz)
+    sampler = runtime_stats.start(stats, args)
+    announce_ready()
+
+    if frames is not None:
+        serve_frames(sys.stdin.buffer)
+    else:
+        for line in sys.stdin:
+            handle_line(line)
+
+    # stdin closed: let queued keymaps finish so nothing is left held
+    for pad in pads:
+        pad.scheduler.stop(drain=True, timeout=5.0)
+    print_playback_summary()
+    for out in outs:
+        out.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,104 @@
+"""
+Controller state model for the Phonix controller bridge.
+Collects every change made during a scheduling tick and sends the result
+as one report, at most once per report interval and only when it differs
+from the last report sent.
+
+A report is a tuple: (buttons, lx, ly, rx, ry, lt, rt)
+- buttons: XUSB button bitmask
+- lx, ly, rx, ry: stick positions in [-1, 1]
+- lt, rt: trigger values in [0, 255]
+"""
+import threading
+
+from keymap_compiler import (
+    OP_PRESS, OP_RELEASE, OP_LEFT_STICK, OP_RIGHT_STICK, OP_LEFT_TRIGGER, OP_RIGHT_TRIGGER,
+)
+
+NEUTRAL_REPORT = (0, 0.0, 0.0, 0.0, 0.0, 0, 0)
+
+# Default cap on how often reports go to the driver
+DEFAULT_REPORT_RATE_HZ = 1000.0
+
+
+class ControllerState:
+    """
+    Pending controller state plus the last report sent.
+
+    apply() only mutates the pending state and is safe from any thread;
+    flush() turns it into at most one send_report(report) call and is
+    meant to be called from the scheduler thread only.
+
+    Button presses are latched until they have been reported, so a press
+    and release that fall inside one report interval still reach the
+    driver as a one-report pulse instead of cancelling out.
+    """
+
+    def __init__(self, send_report, max_rate_hz: float = DEFAULT_REPORT_RATE_HZ):
+        self._send_report = send_report
+        self.min_interval = 1.0 / max_rate_hz if max_rate_hz and max_rate_hz > 0 else 0.0
+        self._lock = threading.Lock()
+        self._pending = list(NEUTRAL_REPORT)
+        self._latched = 0  # buttons pressed since the last report
+        self.last_report = NEUTRAL_REPORT
+        self._last_sent_at = None
+        self.reports_sent = 0
+        self.reports_deferred = 0
+
+    def apply(self, op, a, b):
+        """Apply one compiled program step to the pending state."""
+        with self._lock:
+            s = self._pending
+            if op == OP_PRESS:
+                s[0] |= a
+                self._latched |= a
+            elif op == OP_RELEASE:
+                s[0] &= ~a
+            elif op == OP_LEFT_STICK:
+                s[1] = a
+                s[2] = b
+            elif op == OP_RIGHT_STICK:
+                s[3] = a
+                s[4] = b
+            elif op == OP_LEFT_TRIGGER:
+                s[5] = a
+            elif op == OP_RIGHT_TRIGGER:
+                s[6] = a
+            else:
+                raise ValueError(f"not a controller step: {op}")
+
+    def reset(self):
+        """Return every pending input to rest (sent on the next flush)."""
+        with self._lock:
+            self._pending[:] = NEUTRAL_REPORT
+            self._latched = 0
+
+    def flush(self, now: float):
+        """
+        Send the pending state if it changed and the rate cap allows.
+        Returns None when nothing is left to send, or the time at which to
+        retry when the report was held back by the rate cap.
+        """
+        with self._lock:
+            report = tuple(self._pending)
+            if self._latched:
+                report = (report[0] | self._latched,) + report[1:]
+            if report == self.last_report:
+                # Presses already showing in the last report; what's left is any
+                # change since then (e.g. a repeated tap's release)
+                self._latched = 0
+                report = tuple(self._pending)
+                if report == self.last_report:
+                    return None
+            if self._last_sent_at is not None and now < self._last_sent_at + self.min_interval:
+                self.reports_deferred += 1
+                return self._last_sent_at + self.min_interval
+            self.last_report = report
+            self._last_sent_at = now
+            self.reports_sent += 1
+            self._latched = 0
+            # A latched press that was already released still needs its release reported
+            retry = now + self.min_interval if report != tuple(self._pending) else None
+        # Outside the lock: the driver call may take a while
+        self._send_report(report)
+        return retry
@@ -0,0 +1,51 @@
+"""
+CPU inference settings for the Phonix speech process.
+The speech process shares the machine with a game, so it can be kept to a
+compute type, a number of inference threads and a set of cores
+(see the CPU entries of CONFIG in speech_stub.py). speech_autotune.py
+measures the combinations on the local machine and writes the best one to
+TUNED_CONFIG_PATH, which the speech process reads at startup.
+"""
+import os
+import sys
+import json
+
+# Written by speech_autotune.py, read by speech_stub.py before --config overrides
+TUNED_CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "speech_config.json")
+
+
+def load_config_file(path: str) -> dict:
+    """CONFIG overrides from a JSON object file; {} if the file doesn't exist."""
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def set_cpu_affinity(cores: list) -> bool:
+    """
+    Restrict this process to the given core indexes; model worker processes
+    started afterwards inherit it. Returns False where it isn't supported.
+    """
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, set(cores))
+        return True
+    if sys.platform == "win32":
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        mask = sum(1 << core for core in cores)
+        return bool(kernel32.SetProcessAffinityMask(kernel32.GetCurrentProcess(), mask))
+    return False
+
+
+def set_inference_threads(threads: int):
+    """
+    Thread count for models created from now on, in this process and in
+    worker processes it starts: CTranslate2 (faster-whisper) reads
+    OMP_NUM_THREADS when a model is built with the default cpu_threads=0.
+    Set it before the recorder is constructed, so both of its models are
+    built with it and never need rebuilding.
+    """
+    if threads > 0:
+        os.environ["OMP_NUM_THREADS"] = str(threads)
+
@@ -0,0 +1,144 @@
+"""
+Vocabulary-aware endpointing and ambient-noise VAD calibration for the
+Phonix speech process.
+
+A fixed post-speech silence is a compromise: long enough not to split
+"soft upper left", too long for "throw". With a profile loaded, Endpointer
+watches each realtime partial and adjusts the running recorder:
+- the partial ends a complete phrase nothing extends: the recording closes
+  on the next silent frame
+- the partial is a strict prefix of a longer phrase: the silence window
+  stretches so the rest of the command isn't cut off
+- anything else: the configured values
+
+NoiseCalibrator measures the ambient level from the first recorded chunks
+after listening starts and sets the VAD sensitivities from it, instead of
+one hard-coded pair for every room.
+"""
+import math
+
+from phrase_resolver import PHRASE_COMPLETE, PHRASE_PREFIX
+
+SAMPLE_RATE = 16000
+
+# Ambient noise floor (dBFS) -> (silero_sensitivity, webrtc_sensitivity), quietest first:
+# quiet rooms can listen harder, noisy ones need stricter VADs to avoid false starts
+VAD_LEVELS = (
+    (-60.0, 0.7, 0),
+    (-50.0, 0.6, 1),
+    (-40.0, 0.5, 2),
+    (float("inf"), 0.4, 3),
+)
+
+# Percentile of chunk levels taken as the noise floor (speech during calibration only raises the top)
+NOISE_PERCENTILE = 20
+
+
+class Endpointer:
+    """
+    Adjusts post_speech_silence_duration and min_length_of_recording on a
+    recorder per recording, from where the running partial stands in the
+    phrase trie. The recorder reads both on every audio chunk, so changes
+    apply to the recording in progress.
+    """
+
+    def __init__(self, recorder, trie, silence: float, min_length: float,
+                 complete_silence: float, prefix_silence: float):
+        self.recorder = recorder
+        self.trie = trie
+        self.silence = silence
+        self.min_length = min_length
+        self.complete_silence = complete_silence
+        self.prefix_silence = prefix_silence
+        self.state = None
+        self.closed_early = 0  # recordings whose last partial was a complete phrase
+        self.stretched = 0     # recordings whose silence window was stretched at least once
+
+    def _set(self, silence: float, min_length: float):
+        if self.recorder is None:
+            return
+        self.recorder.post_speech_silence_duration = silence
+        self.recorder.min_length_of_recording = min_length
+
+    def start(self):
+        """A recording started: back to the configured values."""
+        self.state = None
+        self._set(self.silence, self.min_length)
+
+    def update(self, words: list):
+        """A realtime partial (vocabulary words) for the current recording."""
+        state = self.trie.state(words) if self.trie is not None else None
+        if state == self.state:
+            return
+        if state == PHRASE_COMPLETE:
+            self._set(self.complete_silence, 0.0)
+        elif state == PHRASE_PREFIX:
+            if self.state != PHRASE_PREFIX:
+                self.stretched += 1
+            self._set(max(self.silence, self.prefix_silence), self.min_length)
+        else:
+            self._set(self.silence, self.min_length)
+        self.state = state
+
+    def stop(self):
+        """The recording ended: count how it was closed."""
+        if self.state == PHRASE_COMPLETE:
+            self.closed_early += 1
+
+    def summary(self) -> str:
+        return f"{self.closed_early} recordings closed on a complete phrase, {self.stretched} stretched for a longer one"
+
+
+def level_dbfs(chunk: bytes) -> float:
+    """RMS level of 16-bit PCM in dB relative to full scale."""
+    import numpy as np
+
+    samples = np.frombuffer(chunk, dtype=np.int16).astype(np.float32)
+    if not len(samples):
+        return -120.0
+    rms = math.sqrt(float(np.mean(samples * samples)))
+    return 20.0 * math.log10(max(rms, 1.0) / 32768.0)
+
+
+def vad_settings(noise_dbfs: float):
+    """(silero_sensitivity, webrtc_sensitivity) for an ambient noise floor."""
+    for ceiling, silero, webrtc in VAD_LEVELS:
+        if noise_dbfs < ceiling:
+            return silero, webrtc
+    return VAD_LEVELS[-1][1:]
+
+
+class NoiseCalibrator:
+    """
+    Collects recorded chunks for `seconds` after start(), then calls
+    apply(noise_dbfs, silero_sensitivity, webrtc_sensitivity) once. chunk()
+    is meant for the recorder's on_recorded_chunk callback and does nothing
+    when no calibration is running.
+    """
+
+    def __init__(self, apply, seconds: float):
+        self._apply = apply
+        self.seconds = seconds
+        self._levels = []
+        self._collected = 0.0
+        self.active = False
+        self.noise_dbfs = None
+
+    def start(self):
+        if self.seconds <= 0:
+            return
+        self._levels = []
+        self._collected = 0.0
+        self.active = True
+
+    def chunk(self, data: bytes):
+        if not self.active:
+            return
+        self._levels.append(level_dbfs(data))
+        self._collected += len(data) / 2 / SAMPLE_RATE
+        if self._collected < self.seconds:
+            return
+        self.active = False
+        levels = sorted(self._levels)
+        self.noise_dbfs = levels[min(len(levels) - 1, len(levels) * NOISE_PERCENTILE // 100)]
+        self._apply(self.noise_dbfs, *vad_settings(self.noise_dbfs))
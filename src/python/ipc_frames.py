@@ -0,0 +1,251 @@
+"""
+Binary framed protocol between the host and the controller bridge (--binary).
+The JSON line protocol parses every action twice (the message, then the
+keymap string inside it) and carries the whole keymap each time. Here the
+host uploads each keymap once under a small integer ID, then sends batches
+of (sequence number, keymap ID) records; the bridge answers every batch
+with ack records and reports each playback's end with timing.
+
+Every frame is a little-endian u32 length (of what follows), a u8 opcode
+and the opcode's payload:
+
+Host -> bridge
+    OP_REGISTER    u16 count, then per keymap: u16 id, u32 length, UTF-8 keymap JSON
+    OP_ACTIONS     u8 count, then per action: u32 seq, u16 keymap id, u8 pad, u8 priority,
+                   f64 emit time in epoch ms (0 = none), u8 length, UTF-8 trace ID
+    OP_COMMAND     u8 COMMAND_RELEASE_ALL, then optionally u8 pad (absent = every pad),
+                   or u8 COMMAND_SAMPLE (run the sampling profiler, see runtime_stats.py)
+
+Bridge -> host
+    OP_READY       (empty) the controller is open
+    OP_REGISTERED  u16 compiled, u16 failed count, then u16 per failed id
+    OP_ACKS        u8 count, then per action: u32 seq, u8 ACK_* status, f32 age ms (NaN = unknown)
+    OP_DONE        u8 count, then per playback: u32 seq, u8 DONE_* outcome,
+                   f32 submit-to-first-step ms (NaN = never started), f32 play ms
+    OP_COMMANDED   u8 command code, u16 keymaps cancelled; sent once a COMMAND_RELEASE_ALL's
+                   neutral report has reached the controller
+
+The host side lives in src/electron/backend/ipcFrames.ts.
+"""
+import math
+import struct
+import threading
+
+OP_REGISTER = 0x01
+OP_ACTIONS = 0x02
+OP_COMMAND = 0x03
+
+OP_READY = 0x81
+OP_REGISTERED = 0x82
+OP_ACKS = 0x83
+OP_DONE = 0x84
+OP_COMMANDED = 0x85
+
+COMMAND_RELEASE_ALL = 1
+COMMAND_SAMPLE = 2
+COMMANDS = {COMMAND_RELEASE_ALL: "release_all", COMMAND_SAMPLE: "sample"}
+
+ACK_ACCEPTED = 0
+ACK_STALE = 1           # older than the bridge's --max-age-ms
+ACK_PRIORITY = 2        # refused: a higher-priority keymap owns one of its inputs
+ACK_UNKNOWN_KEYMAP = 3  # keymap ID was never registered (or failed to compile)
+ACK_NOT_READY = 4       # controller not open yet
+ACK_UNKNOWN_PAD = 5     # pad index beyond the bridge's --pads
+
+DONE_COMPLETED = 0
+DONE_PREEMPTED = 1      # stopped early by a conflicting keymap or release_all
+
+# Frames are small; anything larger than this is a corrupt stream
+MAX_FRAME_BYTES = 1 << 20
+# Counts are one byte on the wire: bigger batches go out as several frames
+MAX_BATCH = 255
+
+_HEADER = struct.Struct("<IB")
+_U8 = struct.Struct("<B")
+_U16 = struct.Struct("<H")
+_REGISTER_ENTRY = struct.Struct("<HI")
+_ACTION = struct.Struct("<IHBBdB")
+_ACK = struct.Struct("<IBf")
+_DONE = struct.Struct("<IBff")
+_REGISTERED = struct.Struct("<HH")
+_COMMANDED = struct.Struct("<BH")
+
+
+class FrameError(ValueError):
+    """Raised for a malformed or oversized frame."""
+
+
+class FrameWriter:
+    """Writes whole frames to a binary stream; safe to share between threads."""
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._lock = threading.Lock()
+
+    def send(self, frame: bytes):
+        with self._lock:
+            self._stream.write(frame)
+            self._stream.flush()
+
+
+def encode_frame(opcode: int, payload: bytes = b"") -> bytes:
+    return _HEADER.pack(len(payload) + 1, opcode) + payload
+
+
+def _read_exact(stream, size: int) -> bytes:
+    data = stream.read(size)
+    while data is not None and 0 < len(data) < size:
+        more = stream.read(size - len(data))
+        if not more:
+            break
+        data += more
+    return data or b""
+
+
+def read_frame(stream):
+    """(opcode, payload) of the next frame from a binary stream, or None at end of stream."""
+    header = _read_exact(stream, 4)
+    if len(header) < 4:
+        return None
+    (length,) = struct.unpack("<I", header)
+    if not 1 <= length <= MAX_FRAME_BYTES:
+        raise FrameError(f"bad frame length {length}")
+    body = _read_exact(stream, length)
+    if len(body) < length:
+        return None
+    return body[0], body[1:]
+
+
+def _count(records: list) -> bytes:
+    if len(records) > MAX_BATCH:
+        raise FrameError(f"at most {MAX_BATCH} records per frame, got {len(records)}")
+    return _U8.pack(len(records))
+
+
+def _ms(value) -> float:
+    return float("nan") if value is None else value
+
+
+def _optional(value: float):
+    return None if math.isnan(value) else value
+
+
+# Host -> bridge
+
+def encode_register(keymaps: list) -> bytes:
+    """OP_REGISTER frame for [(keymap id, keymap JSON string)]."""
+    parts = [_U16.pack(len(keymaps))]
+    for keymap_id, keymap in keymaps:
+        data = keymap.encode("utf-8")
+        parts.append(_REGISTER_ENTRY.pack(keymap_id, len(data)))
+        parts.append(data)
+    return encode_frame(OP_REGISTER, b"".join(parts))
+
+
+def decode_register(payload: bytes) -> list:
+    (count,) = _U16.unpack_from(payload, 0)
+    offset = _U16.size
+    keymaps = []
+    for _ in range(count):
+        keymap_id, size = _REGISTER_ENTRY.unpack_from(payload, offset)
+        offset += _REGISTER_ENTRY.size
+        keymaps.append((keymap_id, payload[offset:offset + size].decode("utf-8")))
+        offset += size
+    return keymaps
+
+
+def encode_actions(actions: list) -> bytes:
+    """OP_ACTIONS frame for [(seq, keymap id, pad, priority, ts or None, trace or None)]."""
+    parts = [_count(actions)]
+    for seq, keymap_id, pad, priority, ts, trace in actions:
+        trace_bytes = (trace or "").encode("utf-8")
+        if len(trace_bytes) > 255:
+            raise FrameError(f"trace ID longer than 255 bytes: {trace!r}")
+        parts.append(_ACTION.pack(seq, keymap_id, pad, priority, ts or 0.0, len(trace_bytes)))
+        parts.append(trace_bytes)
+    return encode_frame(OP_ACTIONS, b"".join(parts))
+
+
+def decode_actions(payload: bytes) -> list:
+    """[(seq, keymap id, pad, priority, ts or None, trace or None)] from an OP_ACTIONS payload."""
+    (count,) = _U8.unpack_from(payload, 0)
+    offset = _U8.size
+    actions = []
+    for _ in range(count):
+        seq, keymap_id, pad, priority, ts, trace_size = _ACTION.unpack_from(payload, offset)
+        offset += _ACTION.size
+        trace = payload[offset:offset + trace_size].decode("utf-8") if trace_size else None
+        offset += trace_size
+        actions.append((seq, keymap_id, pad, priority, ts or None, trace))
+    return actions
+
+
+def _command_code(command: str) -> int:
+    for code, name in COMMANDS.items():
+        if name == command:
+            return code
+    raise FrameError(f"unknown command '{command}'")
+
+
+def encode_command(command: str, pad: int = None) -> bytes:
+    """OP_COMMAND frame for one pad, or for every pad if pad is None."""
+    code = _command_code(command)
+    payload = _U8.pack(code) if pad is None else bytes((code, pad))
+    return encode_frame(OP_COMMAND, payload)
+
+
+def decode_command(payload: bytes) -> tuple:
+    """(command, pad or None for every pad) from an OP_COMMAND payload."""
+    code = payload[0] if payload else None
+    if code not in COMMANDS:
+        raise FrameError(f"unknown command code {code}")
+    return COMMANDS[code], (payload[1] if len(payload) > 1 else None)
+
+
+# Bridge -> host
+
+def encode_ready() -> bytes:
+    return encode_frame(OP_READY)
+
+
+def encode_registered(compiled: int, failed_ids: list) -> bytes:
+    payload = _REGISTERED.pack(compiled, len(failed_ids)) + b"".join(_U16.pack(i) for i in failed_ids)
+    return encode_frame(OP_REGISTERED, payload)
+
+
+def encode_acks(acks: list) -> bytes:
+    """OP_ACKS frame for [(seq, status, age ms or None)]."""
+    payload = _count(acks) + b"".join(_ACK.pack(seq, status, _ms(age)) for seq, status, age in acks)
+    return encode_frame(OP_ACKS, payload)
+
+
+def decode_acks(payload: bytes) -> list:
+    (count,) = _U8.unpack_from(payload, 0)
+    return [(seq, status, _optional(age))
+            for seq, status, age in (_ACK.unpack_from(payload, 1 + i * _ACK.size) for i in range(count))]
+
+
+def encode_done(records: list) -> bytes:
+    """OP_DONE frame for [(seq, outcome, start delay ms or None, play ms)]."""
+    payload = _count(records) + b"".join(
+        _DONE.pack(seq, outcome, _ms(start), play) for seq, outcome, start, play in records)
+    return encode_frame(OP_DONE, payload)
+
+
+def decode_done(payload: bytes) -> list:
+    (count,) = _U8.unpack_from(payload, 0)
+    return [(seq, outcome, _optional(start), play)
+            for seq, outcome, start, play in (_DONE.unpack_from(payload, 1 + i * _DONE.size) for i in range(count))]
+
+
+def encode_commanded(command: str, cancelled: int) -> bytes:
+    """OP_COMMANDED frame acknowledging a command that cancelled this many keymaps."""
+    return encode_frame(OP_COMMANDED, _COMMANDED.pack(_command_code(command), min(cancelled, 0xFFFF)))
+
+
+def decode_commanded(payload: bytes) -> tuple:
+    """(command, keymaps cancelled) from an OP_COMMANDED payload."""
+    code, cancelled = _COMMANDED.unpack_from(payload, 0)
+    if code not in COMMANDS:
+        raise FrameError(f"unknown command code {code}")
+    return COMMANDS[code], cancelled
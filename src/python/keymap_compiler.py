@@ -0,0 +1,236 @@
+"""
+Keymap compiler for the Phonix controller bridge.
+Turns profile keymap arrays into compact, validated opcode programs so the
+bridge doesn't re-parse strings and rebuild lookup tables on every step.
+
+A program is a tuple of (opcode, arg1, arg2) steps:
+- (OP_WAIT, seconds, None)
+- (OP_LEFT_STICK, x, y) / (OP_RIGHT_STICK, x, y)
+- (OP_PRESS, button_mask, None) / (OP_RELEASE, button_mask, None)
+- (OP_LEFT_TRIGGER, value, None) / (OP_RIGHT_TRIGGER, value, None)
+"""
+import json
+import math
+from functools import lru_cache
+
+OP_WAIT = 0
+OP_LEFT_STICK = 1
+OP_RIGHT_STICK = 2
+OP_PRESS = 3
+OP_RELEASE = 4
+OP_LEFT_TRIGGER = 5
+OP_RIGHT_TRIGGER = 6
+
+OP_NAMES = {
+    OP_WAIT: "wait",
+    OP_LEFT_STICK: "left_stick",
+    OP_RIGHT_STICK: "right_stick",
+    OP_PRESS: "press",
+    OP_RELEASE: "release",
+    OP_LEFT_TRIGGER: "left_trigger",
+    OP_RIGHT_TRIGGER: "right_trigger",
+}
+
+# XUSB button bitmasks (same values as vgamepad.XUSB_BUTTON)
+BUTTONS = {
+    "XUSB_GAMEPAD_DPAD_UP": 0x0001,
+    "XUSB_GAMEPAD_DPAD_DOWN": 0x0002,
+    "XUSB_GAMEPAD_DPAD_LEFT": 0x0004,
+    "XUSB_GAMEPAD_DPAD_RIGHT": 0x0008,
+    "XUSB_GAMEPAD_START": 0x0010,
+    "XUSB_GAMEPAD_BACK": 0x0020,
+    "XUSB_GAMEPAD_LEFT_THUMB": 0x0040,
+    "XUSB_GAMEPAD_RIGHT_THUMB": 0x0080,
+    "XUSB_GAMEPAD_LEFT_SHOULDER": 0x0100,
+    "XUSB_GAMEPAD_RIGHT_SHOULDER": 0x0200,
+    "XUSB_GAMEPAD_GUIDE": 0x0400,
+    "XUSB_GAMEPAD_A": 0x1000,
+    "XUSB_GAMEPAD_B": 0x2000,
+    "XUSB_GAMEPAD_X": 0x4000,
+    "XUSB_GAMEPAD_Y": 0x8000,
+}
+
+TRIGGER_MAX = 255
+
+# Operand kinds a command word takes after it
+_NO_OPERANDS = 0
+_STICK_XY = 1     # x, y floats in [-1, 1]
+_TRIGGER_FLOAT = 2  # one float in [0, 1], scaled to 0-255
+_TRIGGER_BYTE = 3   # one number in [0, 255]
+
+# Command word -> (opcode, fixed argument, operand kind)
+_COMMANDS = {
+    "left_joystick_float": (OP_LEFT_STICK, None, _STICK_XY),
+    "right_joystick_float": (OP_RIGHT_STICK, None, _STICK_XY),
+    "left_trigger_float": (OP_LEFT_TRIGGER, None, _TRIGGER_FLOAT),
+    "right_trigger_float": (OP_RIGHT_TRIGGER, None, _TRIGGER_FLOAT),
+    "left_trigger": (OP_LEFT_TRIGGER, None, _TRIGGER_BYTE),
+    "right_trigger": (OP_RIGHT_TRIGGER, None, _TRIGGER_BYTE),
+    "pressXUSB_GAMEPAD_LEFT_TRIGGER": (OP_LEFT_TRIGGER, TRIGGER_MAX, _NO_OPERANDS),
+    "pressXUSB_GAMEPAD_RIGHT_TRIGGER": (OP_RIGHT_TRIGGER, TRIGGER_MAX, _NO_OPERANDS),
+    "releaseXUSB_GAMEPAD_LEFT_TRIGGER": (OP_LEFT_TRIGGER, 0, _NO_OPERANDS),
+    "releaseXUSB_GAMEPAD_RIGHT_TRIGGER": (OP_RIGHT_TRIGGER, 0, _NO_OPERANDS),
+}
+for _name, _mask in BUTTONS.items():
+    _COMMANDS["press" + _name] = (OP_PRESS, _mask, _NO_OPERANDS)
+    _COMMANDS["release" + _name] = (OP_RELEASE, _mask, _NO_OPERANDS)
+
+
+class KeymapError(ValueError):
+    """Raised when a keymap can't be compiled into a program."""
+
+
+def _as_number(token):
+    """Return token as a float if it is numeric (number or numeric string), else None."""
+    if isinstance(token, bool):
+        return None
+    if isinstance(token, (int, float)):
+        value = float(token)
+    elif isinstance(token, str):
+        try:
+            value = float(token)
+        except ValueError:
+            return None
+    else:
+        return None
+    if not math.isfinite(value):
+        raise KeymapError(f"non-finite number in keymap: {token!r}")
+    return value
+
+
+def compile_keymap(keymap) -> tuple:
+    """
+    Compile a keymap list into an opcode program.
+
+    Keymap format examples:
+    - ["left_joystick_float", x, y, duration, "left_joystick_float", 0, 0]
+    - ["pressXUSB_GAMEPAD_DPAD_RIGHT", duration, "releaseXUSB_GAMEPAD_DPAD_RIGHT"]
+    - ["left_trigger_float", value, duration, "left_trigger_float", 0]
+
+    Standalone numbers compile to waits, so a joystick, trigger or button
+    command followed by a duration holds that state for the duration.
+    Raises KeymapError for anything the interpreter couldn't play in full.
+    """
+    if not isinstance(keymap, (list, tuple)) or not keymap:
+        raise KeymapError(f"invalid keymap: {keymap}")
+
+    program = []
+    i = 0
+    n = len(keymap)
+    while i < n:
+        token = keymap[i]
+
+        delay = _as_number(token)
+        if delay is not None:
+            if delay < 0:
+                raise KeymapError(f"negative delay at position {i}: {token!r}")
+            # Merge back-to-back waits into one step
+            if program and program[-1][0] == OP_WAIT:
+                program[-1] = (OP_WAIT, program[-1][1] + delay, None)
+            elif delay > 0:
+                program.append((OP_WAIT, delay, None))
+            i += 1
+            continue
+
+        if not isinstance(token, str) or token not in _COMMANDS:
+            raise KeymapError(f"unknown command at position {i}: {token!r}")
+
+        opcode, arg, kind = _COMMANDS[token]
+        if kind == _STICK_XY:
+            x = _as_number(keymap[i + 1]) if i + 1 < n else None
+            y = _as_number(keymap[i + 2]) if i + 2 < n else None
+            if x is None or y is None:
+                raise KeymapError(f"{token} at position {i} expects numeric x, y")
+            if not (-1.0 <= x <= 1.0 and -1.0 <= y <= 1.0):
+                raise KeymapError(f"{token} at position {i} is out of range [-1, 1]: ({x}, {y})")
+            program.append((opcode, x, y))
+            i += 3
+        elif kind == _NO_OPERANDS:
+            program.append((opcode, arg, None))
+            i += 1
+        else:
+            value = _as_number(keymap[i + 1]) if i + 1 < n else None
+            if value is None:
+                raise KeymapError(f"{token} at position {i} expects a numeric value")
+            if kind == _TRIGGER_FLOAT:
+                if not 0.0 <= value <= 1.0:
+                    raise KeymapError(f"{token} at position {i} is out of range [0, 1]: {value}")
+                value = round(value * TRIGGER_MAX)
+            elif not 0 <= value <= TRIGGER_MAX:
+                raise KeymapError(f"{token} at position {i} is out of range [0, {TRIGGER_MAX}]: {value}")
+            program.append((opcode, int(value), None))
+            i += 2
+
+    if all(op == OP_WAIT for op, _, _ in program):
+        raise KeymapError(f"keymap has no controller commands: {keymap}")
+    return tuple(program)
+
+
+# Programs loaded from a compiled profile (profile_cache.py), by keymap tokens
+_preloaded = {}
+
+
+def preload_programs(programs: dict):
+    """Make already compiled programs ({keymap tokens tuple: program}) available to load_program."""
+    _preloaded.update(programs)
+
+
+@lru_cache(maxsize=1024)
+def _compile_tokens(tokens: tuple) -> tuple:
+    program = _preloaded.get(tokens)
+    return program if program is not None else compile_keymap(tokens)
+
+
+@lru_cache(maxsize=1024)
+def _compile_action_string(action: str) -> tuple:
+    try:
+        keymap = json.loads(action)
+    except json.JSONDecodeError as e:
+        raise KeymapError(f"action is not valid JSON: {action}") from e
+    return load_program(keymap)
+
+
+def load_program(action) -> tuple:
+    """
+    Return the compiled program for an action, compiling it on first sight.
+    Accepts the JSON-encoded keymap string sent by the host or a keymap list.
+    Programs are cached by action string and by keymap contents.
+    """
+    if isinstance(action, str):
+        return _compile_action_string(action)
+    if not isinstance(action, (list, tuple)):
+        raise KeymapError(f"invalid keymap: {action}")
+    try:
+        return _compile_tokens(tuple(action))
+    except TypeError as e:
+        # Unhashable tokens (nested lists, dicts) can't be cached or played
+        raise KeymapError(f"invalid keymap: {action}") from e
+
+
+def program_resources(program: tuple) -> frozenset:
+    """
+    Controller inputs a program touches: button masks for buttons and
+    OP_NAMES entries ("left_stick", "right_trigger", ...) for analog inputs.
+    """
+    resources = set()
+    for op, a, _ in program:
+        if op == OP_PRESS or op == OP_RELEASE:
+            resources.add(a)
+        elif op != OP_WAIT:
+            resources.add(OP_NAMES[op])
+    return frozenset(resources)
+
+
+_NEUTRAL_STEPS = {
+    "left_stick": (OP_LEFT_STICK, 0.0, 0.0),
+    "right_stick": (OP_RIGHT_STICK, 0.0, 0.0),
+    "left_trigger": (OP_LEFT_TRIGGER, 0, None),
+    "right_trigger": (OP_RIGHT_TRIGGER, 0, None),
+}
+
+
+def neutral_step(resource) -> tuple:
+    """The program step that returns a resource to rest (released / centered / zero)."""
+    if isinstance(resource, int):
+        return (OP_RELEASE, resource, None)
+    return _NEUTRAL_STEPS[resource]
@@ -0,0 +1,245 @@
+"""
+Phonetic and fuzzy lookup over a profile's vocabulary.
+Speech models mishear commands in predictable ways ("heart" for "hard",
+"write" for "right", "dump" for "jump"). Instead of listing every near-miss
+by hand, KeywordIndex scores a heard word against each vocabulary word by
+spelling (Levenshtein) and by sound (a Metaphone key), and returns the best
+match with a confidence, rejecting weak or ambiguous matches.
+
+Candidates come from precomputed deletion neighbourhoods of every spelling
+and phonetic key (two strings within d edits always share a string reachable
+by at most d deletions from each), so a lookup is a handful of dict probes
+and only the few nearby words are scored.
+"""
+from functools import lru_cache
+
+DEFAULT_THRESHOLD = 0.7
+DEFAULT_AMBIGUITY_MARGIN = 0.05
+# Weight of the phonetic score in a word's blended score (the rest is spelling)
+PHONETIC_WEIGHT = 0.7
+# Spelling search radius: at most this many edits, and at most half the word
+MAX_EDITS = 3
+# Phonetic keys are short, so one edit is already a loose match
+MAX_KEY_EDITS = 1
+
+# How single-letter keywords ("a", "b", "x", "y") are spoken
+LETTER_NAMES = {
+    "a": ("ay",), "b": ("bee", "be"), "c": ("see", "sea"), "d": ("dee",), "e": ("ee",),
+    "f": ("ef",), "g": ("gee",), "h": ("aitch",), "i": ("eye",), "j": ("jay",),
+    "k": ("kay",), "l": ("el",), "m": ("em",), "n": ("en",), "o": ("oh",),
+    "p": ("pee",), "q": ("cue", "queue"), "r": ("ar", "are"), "s": ("es", "ess"), "t": ("tee", "tea"),
+    "u": ("you",), "v": ("vee",), "w": ("double",), "x": ("ex",), "y": ("why",), "z": ("zee", "zed"),
+}
+
+_VOWELS = frozenset("AEIOU")
+_FRONT_VOWELS = frozenset("EIY")
+
+
+def levenshtein(a: str, b: str) -> int:
+    """Edit distance (insert, delete, substitute)."""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+@lru_cache(maxsize=4096)
+def metaphone(word: str) -> str:
+    """
+    Phonetic key for a word, following the original Metaphone rules closely
+    enough for command words ("th" is "0", "sh"/"ch" are "X").
+    """
+    w = "".join(c for c in word.upper() if "A" <= c <= "Z")
+    if not w:
+        return ""
+    if w[:2] in ("AE", "GN", "KN", "PN", "WR"):
+        w = w[1:]
+    elif w[0] == "X":
+        w = "S" + w[1:]
+    elif w[:2] == "WH":
+        w = "W" + w[2:]
+
+    key = []
+    n = len(w)
+    for i, c in enumerate(w):
+        prev = w[i - 1] if i > 0 else ""
+        nxt = w[i + 1] if i + 1 < n else ""
+        after = w[i + 2] if i + 2 < n else ""
+        if c == prev and c != "C":
+            continue
+        if c in _VOWELS:
+            if i == 0:
+                key.append(c)
+        elif c == "B":
+            if not (prev == "M" and i == n - 1):
+                key.append("B")
+        elif c == "C":
+            if nxt == "I" and after == "A" or nxt == "H":
+                key.append("K" if prev == "S" else "X")
+            elif nxt in _FRONT_VOWELS:
+                if prev != "S":
+                    key.append("S")
+            else:
+                key.append("K")
+        elif c == "D":
+            key.append("J" if nxt == "G" and after in _FRONT_VOWELS else "T")
+        elif c == "G":
+            if nxt == "H" and after not in _VOWELS:
+                continue
+            if nxt == "N" and (i + 2 == n or w[i + 2:] == "ED"):
+                continue
+            if prev == "D" and nxt in _FRONT_VOWELS:
+                continue
+            key.append("J" if nxt in _FRONT_VOWELS and prev != "G" else "K")
+        elif c == "H":
+            if nxt in _VOWELS and prev not in ("C", "G", "P", "S", "T"):
+                key.append("H")
+        elif c == "K":
+            if prev != "C":
+                key.append("K")
+        elif c == "P":
+            key.append("F" if nxt == "H" else "P")
+        elif c == "Q":
+            key.append("K")
+        elif c == "S":
+            key.append("X" if nxt == "H" or nxt == "I" and after in ("O", "A") else "S")
+        elif c == "T":
+            if nxt == "I" and after in ("O", "A"):
+                key.append("X")
+            elif nxt == "H":
+                key.append("0")
+            elif not (nxt == "C" and after == "H"):
+                key.append("T")
+        elif c == "V":
+            key.append("F")
+        elif c in ("W", "Y"):
+            if nxt in _VOWELS:
+                key.append(c)
+        elif c == "X":
+            key.append("KS")
+        elif c == "Z":
+            key.append("S")
+        else:
+            key.append(c)
+    return "".join(key)
+
+
+def deletes(word: str, depth: int) -> set:
+    """The word and every string reachable from it by up to depth single-character deletions."""
+    found = {word}
+    frontier = {word}
+    for _ in range(depth):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        found |= frontier
+    return found
+
+
+class KeywordIndex:
+    """
+    Fuzzy matcher for a fixed set of vocabulary words. Each word is indexed
+    under its spelling and, for single letters, under their spoken names.
+    """
+
+    def __init__(self, words, threshold: float = DEFAULT_THRESHOLD, ambiguity_margin: float = DEFAULT_AMBIGUITY_MARGIN):
+        self.threshold = threshold
+        self.ambiguity_margin = ambiguity_margin
+        self._forms = {}   # spoken form -> vocabulary word
+        self._by_key = {}  # phonetic key -> [forms]
+        for word in words:
+            forms = (word,) + LETTER_NAMES.get(word, ()) if len(word) == 1 else (word,)
+            for form in forms:
+                self._forms.setdefault(form, word)
+        for form in self._forms:
+            self._by_key.setdefault(metaphone(form), []).append(form)
+        # deletion variant -> forms / keys it came from
+        self._spelling_deletes = {}
+        for form in self._forms:
+            for variant in deletes(form, MAX_EDITS):
+                self._spelling_deletes.setdefault(variant, set()).add(form)
+        self._key_deletes = {}
+        for key in self._by_key:
+            if key:
+                for variant in deletes(key, MAX_KEY_EDITS):
+                    self._key_deletes.setdefault(variant, set()).add(key)
+
+    def tables(self) -> tuple:
+        """The precomputed lookup tables, for from_tables (plain dicts, lists and sets)."""
+        return self._forms, self._by_key, self._spelling_deletes, self._key_deletes
+
+    @classmethod
+    def from_tables(cls, tables: tuple, threshold: float = DEFAULT_THRESHOLD,
+                    ambiguity_margin: float = DEFAULT_AMBIGUITY_MARGIN) -> "KeywordIndex":
+        """Rebuild an index from tables() without recomputing the deletion neighbourhoods."""
+        index = cls.__new__(cls)
+        index.threshold = threshold
+        index.ambiguity_margin = ambiguity_margin
+        index._forms, index._by_key, index._spelling_deletes, index._key_deletes = tables
+        return index
+
+    @staticmethod
+    def score(heard: str, form: str) -> float:
+        """
+        Blend of spelling and phonetic similarity in [0, 1]; never below
+        spelling alone. One-letter keys say little ("yeah" and "you" are both
+        "Y"), so the phonetic weight is halved for them.
+        """
+        spelling = 1.0 - levenshtein(heard, form) / max(len(heard), len(form))
+        heard_key, form_key = metaphone(heard), metaphone(form)
+        longest = max(len(heard_key), len(form_key))
+        if not longest:
+            return spelling
+        phonetic = 1.0 - levenshtein(heard_key, form_key) / longest
+        weight = PHONETIC_WEIGHT if longest > 1 else PHONETIC_WEIGHT / 2
+        return max(spelling, weight * phonetic + (1.0 - weight) * spelling)
+
+    def candidates(self, heard: str) -> set:
+        """Forms close to the heard word by spelling or by phonetic key."""
+        radius = min(MAX_EDITS, max(1, len(heard) // 2))
+        forms = set()
+        for variant in deletes(heard, radius):
+            for form in self._spelling_deletes.get(variant, ()):
+                if abs(len(form) - len(heard)) <= radius:
+                    forms.add(form)
+        key = metaphone(heard)
+        if key:
+            for variant in deletes(key, MAX_KEY_EDITS):
+                for near_key in self._key_deletes.get(variant, ()):
+                    forms.update(self._by_key[near_key])
+        return forms
+
+    def lookup(self, heard: str):
+        """
+        (vocabulary word, confidence). The word is None when the best match is
+        below the threshold, or when a different word scores within the
+        ambiguity margin of it.
+        """
+        target = self._forms.get(heard)
+        if target is not None:
+            return target, 1.0
+        best = {}
+        for form in self.candidates(heard):
+            word = self._forms[form]
+            s = self.score(heard, form)
+            if s > best.get(word, 0.0):
+                best[word] = s
+        if not best:
+            return None, 0.0
+        ranked = sorted(best.items(), key=lambda item: item[1], reverse=True)
+        word, confidence = ranked[0]
+        if confidence < self.threshold:
+            return None, confidence
+        if len(ranked) > 1 and ranked[1][1] >= confidence - self.ambiguity_margin:
+            return None, confidence
+        return word, confidence
+
+
+@lru_cache(maxsize=16)
+def build_index(words: tuple, threshold: float = DEFAULT_THRESHOLD,
+                ambiguity_margin: float = DEFAULT_AMBIGUITY_MARGIN) -> KeywordIndex:
+    """KeywordIndex for a vocabulary, cached so reloading the same profile reuses it."""
+    return KeywordIndex(words, threshold, ambiguity_margin)
@@ -0,0 +1,47 @@
+"""
+Virtual pads for the Phonix controller bridge.
+One bridge process can drive several virtual controllers (--pads N), e.g.
+for co-op. Each Pad has its own output backend, controller state and
+scheduler thread, and a scheduler's lock only guards its own pad, so a
+hold or a burst of commands on one pad never waits on another. Actions are
+addressed by pad index; 0 is the first pad and the default.
+"""
+import os
+
+from controller_state import ControllerState, DEFAULT_REPORT_RATE_HZ
+from scheduler import ActionScheduler
+from timing import PrecisionTimer, DEFAULT_SPIN_BUDGET
+
+# XInput games see at most four controllers
+MAX_PADS = 4
+
+
+class Pad:
+    """One virtual controller and the scheduler lane that plays keymaps into it."""
+
+    def __init__(self, index: int, backend, spin_budget: float = DEFAULT_SPIN_BUDGET,
+                 report_rate_hz: float = DEFAULT_REPORT_RATE_HZ):
+        self.index = index
+        self.backend = backend
+        self.state = ControllerState(backend.send, max_rate_hz=report_rate_hz)
+        self.scheduler = ActionScheduler(self.state, PrecisionTimer(spin_budget=spin_budget),
+                                         name=f"action-scheduler-pad{index}")
+
+
+def parse_pad(value, count: int) -> int:
+    """Pad index from a protocol message (None = first pad). Raises ValueError if it isn't one of count pads."""
+    if value is None:
+        return 0
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ValueError(f"bad pad {value!r}")
+    if not 0 <= value < count:
+        raise ValueError(f"no pad {value} (bridge has {count})")
+    return value
+
+
+def pad_record_path(path: str, index: int, count: int) -> str:
+    """--record file for one pad: the path as given for a single pad, else out.pad0.jsonl, out.pad1.jsonl, ..."""
+    if not path or count <= 1:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.pad{index}{ext}"
@@ -0,0 +1,203 @@
+"""
+Streaming phrase resolver for the Phonix speech process.
+Compiles a profile's keywords (plus synonyms and the host-reserved phrases)
+into a word-level trie and resolves the word stream into action IDs, so
+the speech process can send resolved actions instead of raw words.
+
+A phrase fires as soon as it is decided:
+- a complete phrase that no other phrase extends fires on its last word
+- a word that leaves only one phrase reachable fires that phrase early
+  ("sliding" when the only phrase starting with it is "sliding kick");
+  the rest of the phrase is then consumed silently as it arrives
+- a complete phrase that a longer one extends ("jump" vs "jump forward")
+  waits for the next word, or for the end of the utterance
+"""
+import os
+import json
+import threading
+
+from vocabulary import DEFAULT_SYNONYMS_PATH, RESERVED_COMMANDS
+
+KIND_ACTION = "action"
+KIND_COMMAND = "command"
+
+# Where a word sequence ends up in the trie (PhraseTrie.state)
+PHRASE_NONE = "none"          # the last word is not part of any phrase
+PHRASE_PREFIX = "prefix"      # a longer phrase may still follow
+PHRASE_COMPLETE = "complete"  # a phrase ended and nothing extends it
+
+
+class _Node:
+    __slots__ = ("children", "target", "targets_below")
+
+    def __init__(self):
+        self.children = {}
+        self.target = None       # (kind, id) if a phrase ends here
+        self.targets_below = 0   # phrases ending at or below this node
+
+
+class PhraseTrie:
+    """Word-level trie of phrases; read-only once built, so it can be shared across threads."""
+
+    def __init__(self, phrases: dict):
+        self.root = _Node()
+        for phrase, target in phrases.items():
+            self._insert(phrase.split(), target)
+
+    def _insert(self, words: list, target: tuple):
+        if not words:
+            return
+        node = self.root
+        node.targets_below += 1
+        for word in words:
+            node = node.children.setdefault(word, _Node())
+            node.targets_below += 1
+        node.target = target
+
+    def state(self, words: list) -> str:
+        """
+        PHRASE_COMPLETE, PHRASE_PREFIX or PHRASE_NONE for the end of a word
+        sequence, walking it like the resolver does (a word that can't extend
+        the current path starts a new one).
+        """
+        node = self.root
+        state = PHRASE_NONE
+        for word in words:
+            child = node.children.get(word)
+            if child is None and node is not self.root:
+                child = self.root.children.get(word)
+            if child is None:
+                node, state = self.root, PHRASE_NONE
+            elif child.children:
+                node, state = child, PHRASE_PREFIX
+            else:
+                # A finished phrase: the next word starts over
+                node, state = self.root, PHRASE_COMPLETE
+        return state
+
+
+def load_phrases(profile_path: str, synonyms_path: str = DEFAULT_SYNONYMS_PATH) -> dict:
+    """{phrase: (kind, id)} for a profile file; see profile_phrases."""
+    with open(profile_path, "r", encoding="utf-8") as f:
+        profile = json.load(f)
+    synonyms = []
+    if synonyms_path and os.path.exists(synonyms_path):
+        with open(synonyms_path, "r", encoding="utf-8") as f:
+            synonyms = json.load(f).get("synonyms", [])
+    return profile_phrases(profile, synonyms)
+
+
+def profile_phrases(profile: dict, synonyms: list) -> dict:
+    """
+    {phrase: (kind, id)} for a parsed profile, expanded like profileLoader.ts:
+    action IDs are the profile keywords, synonyms map to their base keyword
+    when it is in the profile and the synonym isn't a keyword itself.
+    """
+    phrases = {}
+    for entry in profile.get("keywords", []):
+        if entry.get("keyword") and entry.get("keymap"):
+            keyword = entry["keyword"].lower().strip()
+            phrases[keyword] = (KIND_ACTION, keyword)
+
+    for entry in synonyms:
+        base = entry.get("keyword_match", "").lower().strip()
+        if base not in phrases:
+            continue
+        for synonym in entry.get("synonym_words", []):
+            phrases.setdefault(synonym.lower().strip(), phrases[base])
+
+    # Reserved phrases (reserved_phrases.json); a profile keyword with the same phrase takes precedence
+    for phrase, command in RESERVED_COMMANDS.items():
+        phrases.setdefault(phrase, (KIND_COMMAND, command))
+    return phrases
+
+
+class PhraseResolver:
+    """
+    Feeds words through the phrase trie and calls fire(kind, id, utterance_id)
+    for each resolved phrase. Word state carries across utterances, so a
+    command split by a pause still resolves; end_utterance() only settles a
+    complete phrase that was waiting for a possible longer match.
+    """
+
+    def __init__(self, phrases: dict, fire, early: bool = True):
+        self._fire = fire
+        self.early = early
+        self.trie = PhraseTrie(phrases)
+        self._root = self.trie.root
+        self._lock = threading.Lock()
+        self._path = []          # words matched so far from the root
+        self._node = self._root
+        self._fired_early = False
+        self.fired = 0
+        self.fired_early = 0
+
+    def feed(self, word: str, utterance_id: str = None):
+        """Advance by one word, firing whatever it decides."""
+        with self._lock:
+            fired = self._advance(word)
+        for kind, target_id in fired:
+            self._fire(kind, target_id, utterance_id)
+
+    def end_utterance(self, utterance_id: str = None):
+        """End of an utterance: fire a complete phrase that was waiting on a longer match."""
+        with self._lock:
+            fired = self._settle() if self._node.target is not None else []
+        for kind, target_id in fired:
+            self._fire(kind, target_id, utterance_id)
+
+    def reset(self):
+        with self._lock:
+            self._restart()
+
+    def _advance(self, word: str) -> list:
+        fired = []
+        child = self._node.children.get(word)
+        if child is None:
+            # The current path can't continue: settle it, then retry the words it
+            # didn't use plus this one from the root (a sliding window over the stream)
+            leftover = self._path[1:] if not self._fired_early else []
+            fired.extend(self._settle())
+            words = [word] if fired else leftover + [word]
+            for i in range(len(words)):
+                if words[i] in self._root.children:
+                    for w in words[i:]:
+                        fired.extend(self._advance(w))
+                    break
+            return fired
+
+        self._path.append(word)
+        self._node = child
+        if child.target is not None and not child.children:
+            # Complete and unambiguous
+            if not self._fired_early:
+                fired.append(self._count(child.target))
+            self._restart()
+        elif self.early and not self._fired_early and child.target is None and child.targets_below == 1:
+            # Only one phrase is still reachable: fire it now, consume the rest silently
+            target = self._only_target(child)
+            fired.append(self._count(target))
+            self.fired_early += 1
+            self._fired_early = True
+        return fired
+
+    def _settle(self) -> list:
+        """Fire the current node's phrase if one ends here, then start over."""
+        target = self._node.target if not self._fired_early else None
+        self._restart()
+        return [self._count(target)] if target is not None else []
+
+    def _restart(self):
+        self._path = []
+        self._node = self._root
+        self._fired_early = False
+
+    def _count(self, target: tuple) -> tuple:
+        self.fired += 1
+        return target
+
+    @staticmethod
+    def _only_target(node: _Node) -> tuple:
+        while node.target is None:
+            node = next(iter(node.children.values()))
+        return node.target
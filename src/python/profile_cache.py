@@ -0,0 +1,211 @@
+"""
+Compiled profile cache for the Phonix speech process and controller bridge.
+Both processes used to re-read the profile and synonyms JSON on every
+session start and rebuild the same structures from them. compile_profile
+turns a profile plus its synonyms into everything either process needs:
+- the vocabulary phrases, word aliases and the keyword index tables
+  (the deletion neighbourhoods are most of the build time)
+- the resolver's phrase -> (kind, action ID) map, synonyms expanded
+- every keymap compiled to its opcode program
+
+load_compiled stores that as a versioned binary artifact in CACHE_DIR,
+named by a hash of the profile, synonyms and reserved phrase contents, so an unchanged
+profile is compiled once and then only read back (memory-mapped, and
+deserialized with marshal). A changed profile hashes differently and is
+recompiled on its next load, which is what a hot reload relies on.
+
+Usage (compile ahead of time and compare compile vs load times):
+    python profile_cache.py ../profiles/fighting.json [--synonyms PATH] [--force]
+"""
+import os
+import sys
+import json
+import mmap
+import time
+import struct
+import marshal
+import hashlib
+import argparse
+
+from keymap_compiler import KeymapError, load_program
+from keyword_index import KeywordIndex, DEFAULT_AMBIGUITY_MARGIN
+from phrase_resolver import profile_phrases
+from vocabulary import Vocabulary, profile_vocabulary, DEFAULT_MIN_CONFIDENCE, DEFAULT_SYNONYMS_PATH, RESERVED_COMMANDS
+
+# Bump when the artifact layout changes
+FORMAT_VERSION = 1
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".profile_cache")
+
+# Magic and format version, then the marshalled tables
+_HEADER = struct.Struct("<8sH")
+_MAGIC = b"PHXPROF\0"
+_SUFFIX = ".phxprof"
+
+
+class CompiledProfile:
+    """
+    A profile compiled for the speech process and the controller bridge.
+    phrases maps phrase -> (kind, id) for the resolver; programs maps each
+    keyword to its compiled keymap and keymaps to the keymap tokens it was
+    compiled from; rejected maps keywords whose keymap failed to compile to
+    the error.
+    """
+
+    def __init__(self, tables: dict, key: str = None, from_cache: bool = False):
+        self.key = key
+        self.from_cache = from_cache
+        self.vocabulary_phrases = tables["vocabulary_phrases"]
+        self.aliases = tables["aliases"]
+        self.index_tables = tables["index"]
+        self.phrases = tables["phrases"]
+        self.programs = tables["programs"]
+        self.keymaps = tables["keymaps"]
+        self.rejected = tables["rejected"]
+
+    def vocabulary(self, min_confidence: float = DEFAULT_MIN_CONFIDENCE,
+                   ambiguity_margin: float = DEFAULT_AMBIGUITY_MARGIN) -> Vocabulary:
+        """A fresh Vocabulary (own match cache and counters) over the precomputed index."""
+        index = KeywordIndex.from_tables(self.index_tables, min_confidence, ambiguity_margin)
+        return Vocabulary(self.vocabulary_phrases, self.aliases, min_confidence, ambiguity_margin, index=index)
+
+    def programs_by_keymap(self) -> dict:
+        """{keymap tokens: program}, for keymap_compiler.preload_programs."""
+        return {self.keymaps[keyword]: program for keyword, program in self.programs.items()}
+
+
+def compile_profile(profile: dict, synonyms: list) -> dict:
+    """The artifact tables for a parsed profile and synonyms table."""
+    vocabulary_phrases, aliases = profile_vocabulary(profile, synonyms)
+    programs, keymaps, rejected = {}, {}, {}
+    for entry in profile.get("keywords", []):
+        keyword, keymap = entry.get("keyword"), entry.get("keymap")
+        if not keyword or not keymap:
+            continue
+        keyword = keyword.lower().strip()
+        try:
+            programs[keyword] = load_program(keymap)
+            keymaps[keyword] = tuple(keymap)
+        except KeymapError as e:
+            rejected[keyword] = str(e)
+    return {
+        "vocabulary_phrases": vocabulary_phrases,
+        "aliases": aliases,
+        "index": Vocabulary(vocabulary_phrases, aliases).index.tables(),
+        "phrases": profile_phrases(profile, synonyms),
+        "programs": programs,
+        "keymaps": keymaps,
+        "rejected": rejected,
+    }
+
+
+def content_key(profile_data: bytes, synonyms_data: bytes) -> str:
+    """Cache key: the inputs plus everything the artifact's encoding depends on."""
+    digest = hashlib.sha256()
+    digest.update(f"{FORMAT_VERSION}:{marshal.version}:{sys.version_info[0]}.{sys.version_info[1]}\0".encode())
+    digest.update(profile_data)
+    digest.update(b"\0")
+    digest.update(synonyms_data)
+    # Reserved phrases are compiled into the vocabulary and phrase tables too
+    digest.update(b"\0")
+    digest.update(json.dumps(RESERVED_COMMANDS, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def _artifact_prefix(profile_path: str) -> str:
+    """File name prefix shared by every artifact of one profile file."""
+    stem = os.path.splitext(os.path.basename(profile_path))[0]
+    where = hashlib.sha256(os.path.abspath(profile_path).encode()).hexdigest()[:8]
+    return f"{stem}-{where}-"
+
+
+def _read_artifact(path: str) -> dict:
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        magic, version = _HEADER.unpack_from(data, 0)
+        if magic != _MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"not a version {FORMAT_VERSION} compiled profile")
+        with memoryview(data) as view, view[_HEADER.size:] as body:
+            return marshal.loads(body)
+
+
+def _write_artifact(path: str, tables: dict):
+    """Write atomically, so a process loading concurrently never sees half a file."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp = f"{path}.{os.getpid()}.tmp"
+    with open(temp, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, FORMAT_VERSION))
+        f.write(marshal.dumps(tables))
+    os.replace(temp, path)
+
+
+def _prune(cache_dir: str, prefix: str, keep: str):
+    """Remove this profile's artifacts for older contents."""
+    for name in os.listdir(cache_dir):
+        if name.startswith(prefix) and name.endswith(_SUFFIX) and name != keep:
+            try:
+                os.remove(os.path.join(cache_dir, name))
+            except OSError:
+                pass
+
+
+def load_compiled(profile_path: str, synonyms_path: str = DEFAULT_SYNONYMS_PATH, cache_dir: str = CACHE_DIR,
+                  force: bool = False) -> CompiledProfile:
+    """
+    The compiled profile for the current contents of a profile file (and
+    synonyms file; None skips synonyms), from the cache if it has been
+    compiled before, else compiled and cached. A cache that can't be read
+    or written is skipped. Raises OSError / ValueError for a missing or
+    malformed profile.
+    """
+    with open(profile_path, "rb") as f:
+        profile_data = f.read()
+    synonyms_data = b""
+    if synonyms_path and os.path.exists(synonyms_path):
+        with open(synonyms_path, "rb") as f:
+            synonyms_data = f.read()
+    key = content_key(profile_data, synonyms_data)
+    prefix = _artifact_prefix(profile_path)
+    name = f"{prefix}{key[:16]}{_SUFFIX}"
+    path = os.path.join(cache_dir, name)
+
+    if not force and os.path.exists(path):
+        try:
+            return CompiledProfile(_read_artifact(path), key, from_cache=True)
+        except (OSError, ValueError, EOFError, TypeError, KeyError) as e:
+            print(f"[profile_cache] recompiling {os.path.basename(profile_path)}: {e}", file=sys.stderr, flush=True)
+
+    profile = json.loads(profile_data)
+    synonyms = json.loads(synonyms_data).get("synonyms", []) if synonyms_data else []
+    tables = compile_profile(profile, synonyms)
+    try:
+        _write_artifact(path, tables)
+        _prune(cache_dir, prefix, keep=name)
+    except OSError as e:
+        print(f"[profile_cache] not cached: {e}", file=sys.stderr, flush=True)
+    return CompiledProfile(tables, key)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile a Phonix profile into the profile cache")
+    parser.add_argument("profile", help="profile JSON")
+    parser.add_argument("--synonyms", default=DEFAULT_SYNONYMS_PATH, help="synonyms table JSON ('' to skip)")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--force", action="store_true", help="recompile even if the cache is current")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    compiled = load_compiled(args.profile, args.synonyms or None, args.cache_dir, force=args.force)
+    first = (time.perf_counter() - start) * 1000.0
+    start = time.perf_counter()
+    load_compiled(args.profile, args.synonyms or None, args.cache_dir)
+    cached = (time.perf_counter() - start) * 1000.0
+
+    print(f"{os.path.basename(args.profile)}: {len(compiled.phrases)} phrases, "
+          f"{len(compiled.vocabulary_phrases)} vocabulary phrases, {len(compiled.programs)} keymaps")
+    for keyword, error in compiled.rejected.items():
+        print(f"  rejected '{keyword}': {error}")
+    print(f"{'loaded from cache' if compiled.from_cache else 'compiled'} in {first:.1f} ms, cached load {cached:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
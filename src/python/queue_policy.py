@@ -0,0 +1,92 @@
+"""
+Intake policy for the Phonix controller bridge.
+Decides whether an incoming action is still worth playing: actions carry
+the host's emit timestamp and are dropped once older than a deadline, and
+each action has a priority class used when keymaps conflict.
+"""
+import time
+import threading
+
+PRIORITY_LOW = 0
+PRIORITY_NORMAL = 1
+PRIORITY_HIGH = 2
+
+PRIORITIES = {
+    "low": PRIORITY_LOW,
+    "normal": PRIORITY_NORMAL,
+    "high": PRIORITY_HIGH,
+}
+
+# Control commands that stop every running keymap and zero the controller
+RESERVED_COMMANDS = {"release_all"}
+
+# Defaults: drop actions emitted more than 500 ms ago, count them late past 100 ms
+DEFAULT_MAX_AGE_MS = 500.0
+DEFAULT_LATE_MS = 100.0
+
+
+def parse_priority(value) -> int:
+    """Priority from a message field: a class name ("low"/"normal"/"high") or an int. Defaults to normal."""
+    if value is None:
+        return PRIORITY_NORMAL
+    if isinstance(value, str):
+        if value.lower() not in PRIORITIES:
+            raise ValueError(f"unknown priority '{value}'")
+        return PRIORITIES[value.lower()]
+    if isinstance(value, int) and not isinstance(value, bool):
+        return max(PRIORITY_LOW, min(PRIORITY_HIGH, value))
+    raise ValueError(f"invalid priority: {value!r}")
+
+
+class QueuePolicy:
+    """
+    Staleness checks and counters for incoming actions.
+
+    Messages may carry "ts", the host's emit time in epoch milliseconds
+    (JavaScript Date.now()). Messages without one are never dropped as stale.
+    """
+
+    def __init__(self, max_age_ms: float = DEFAULT_MAX_AGE_MS, late_ms: float = DEFAULT_LATE_MS, clock=time.time):
+        self.max_age_ms = max_age_ms
+        self.late_ms = late_ms
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.accepted = 0
+        self.dropped_stale = 0
+        self.dropped_priority = 0
+        self.late = 0
+
+    def age_ms(self, msg: dict):
+        """Milliseconds since the message was emitted, or None if it has no timestamp."""
+        ts = msg.get("ts")
+        if not isinstance(ts, (int, float)) or isinstance(ts, bool):
+            return None
+        return self.clock() * 1000.0 - ts
+
+    def admit(self, msg: dict) -> bool:
+        """True if the action is fresh enough to play; counts stale drops and late admits."""
+        age = self.age_ms(msg)
+        with self._lock:
+            if age is not None and self.max_age_ms and age > self.max_age_ms:
+                self.dropped_stale += 1
+                return False
+            if age is not None and age > self.late_ms:
+                self.late += 1
+            return True
+
+    def record_accepted(self):
+        with self._lock:
+            self.accepted += 1
+
+    def record_dropped_priority(self):
+        with self._lock:
+            self.dropped_priority += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "accepted": self.accepted,
+                "dropped_stale": self.dropped_stale,
+                "dropped_priority": self.dropped_priority,
+                "late": self.late,
+            }
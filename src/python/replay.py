@@ -0,0 +1,185 @@
+"""
+Replay harness for the Phonix controller bridge.
+Feeds a JSONL command trace through the bridge's stdin protocol handler
+into the recording backend, then reports throughput, dispatch latency and
+hold timing accuracy. Needs no controller driver, so it runs in CI.
+With --pads N it is a load test of one bridge driving several controllers:
+trace lines go to their "pad" and every pad is summarised on its own.
+
+Trace lines are bridge protocol messages with an optional "t" field, the
+time in seconds from the start of the trace at which to send the line:
+    {"t": 0.12, "action": "[\\"pressXUSB_GAMEPAD_A\\", 0.25, \\"releaseXUSB_GAMEPAD_A\\"]"}
+
+Usage:
+    python replay.py TRACE.jsonl [--fast] [--speed 2.0] [--record OUT.jsonl] [--json]
+    python replay.py --profile ../profiles/fighting.json --count 200 --rate 20 [--pads 4] [--json]
+"""
+import sys
+import json
+import time
+import random
+import argparse
+
+import controller_bridge
+from backends import RecordingBackend
+from pads import pad_record_path
+from timing import DEFAULT_SPIN_BUDGET, JitterStats
+
+
+def load_trace(path: str) -> list:
+    """Read a trace file into [(t, line)], keeping each line verbatim for the protocol handler."""
+    trace = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            t = json.loads(line).get("t", 0.0)
+            trace.append((float(t), line))
+    trace.sort(key=lambda item: item[0])
+    return trace
+
+
+def synthesize_trace(profile_path: str, count: int, rate: float, seed: int = 0, pads: int = 1) -> list:
+    """
+    Random commands from a profile's keymaps, sent at a fixed rate (commands
+    per second) and spread round-robin over the pads.
+    """
+    with open(profile_path, "r", encoding="utf-8") as f:
+        profile = json.load(f)
+    keymaps = [entry["keymap"] for entry in profile.get("keywords", []) if entry.get("keymap")]
+    if not keymaps:
+        raise ValueError(f"no keymaps in {profile_path}")
+    rng = random.Random(seed)
+    interval = 1.0 / rate if rate > 0 else 0.0
+    trace = []
+    for i in range(count):
+        msg = {"action": json.dumps(rng.choice(keymaps))}
+        if pads > 1:
+            msg["pad"] = i % pads
+        trace.append((i * interval, json.dumps(msg)))
+    return trace
+
+
+def replay(trace: list, speed: float = 1.0, fast: bool = False, record_path: str = None,
+           spin_budget: float = DEFAULT_SPIN_BUDGET, report_rate_hz: float = None, pads: int = 1) -> dict:
+    """
+    Play a trace through controller_bridge.handle_line and return a summary
+    dict, with a per-pad breakdown under "pads" when there are several.
+    """
+    recorders = [RecordingBackend(pad_record_path(record_path, index, pads)) for index in range(pads)]
+    for recorder in recorders:
+        recorder.open()
+    kwargs = {"spin_budget": spin_budget}
+    if report_rate_hz is not None:
+        kwargs["report_rate_hz"] = report_rate_hz
+    lanes = controller_bridge.start_playback(recorders, **kwargs)
+
+    clock = time.perf_counter
+    accepted = 0
+    handle_time = 0.0
+    start = clock()
+    for t, line in trace:
+        if not fast:
+            delay = start + t / speed - clock()
+            if delay > 0:
+                time.sleep(delay)
+        before = clock()
+        if controller_bridge.handle_line(line) is not None:
+            accepted += 1
+        handle_time += clock() - before
+    fed = clock() - start
+
+    for lane in lanes:
+        lane.scheduler.stop(drain=True, timeout=60.0)
+    elapsed = clock() - start
+    for recorder in recorders:
+        recorder.close()
+
+    dispatch = JitterStats()
+    timing = JitterStats()
+    for lane in lanes:
+        dispatch.merge(lane.scheduler.dispatch_stats)
+        timing.merge(lane.scheduler.timer.stats)
+    summary = {
+        "commands": len(trace),
+        "accepted": accepted,
+        "feed_seconds": fed,
+        "session_seconds": elapsed,
+        "handle_throughput_cps": (len(trace) / handle_time) if handle_time > 0 else 0.0,
+        **_latency_fields(dispatch, timing),
+        "reports": sum(len(recorder.reports) for recorder in recorders),
+        "reports_deferred": sum(lane.state.reports_deferred for lane in lanes),
+    }
+    if pads > 1:
+        summary["pads"] = [
+            {
+                "pad": lane.index,
+                "started": lane.scheduler.dispatch_stats.count,
+                **_latency_fields(lane.scheduler.dispatch_stats, lane.scheduler.timer.stats),
+                "reports": len(lane.backend.reports),
+            }
+            for lane in lanes
+        ]
+    return summary
+
+
+def _latency_fields(dispatch: JitterStats, timing: JitterStats) -> dict:
+    dispatch = dispatch.snapshot()
+    timing = timing.snapshot()
+    return {
+        "dispatch_p50_ms": dispatch["p50_ms"],
+        "dispatch_p99_ms": dispatch["p99_ms"],
+        "timing_p50_ms": timing["p50_ms"],
+        "timing_p99_ms": timing["p99_ms"],
+        "timing_max_ms": timing["max_ms"],
+    }
+
+
+def print_summary(summary: dict):
+    print(f"commands:   {summary['commands']} ({summary['accepted']} accepted) in {summary['session_seconds']:.2f} s")
+    print(f"throughput: {summary['handle_throughput_cps']:.0f} commands/s through the protocol handler")
+    print(f"dispatch:   p50 {summary['dispatch_p50_ms']:.3f} ms, p99 {summary['dispatch_p99_ms']:.3f} ms (submit to first step)")
+    print(f"timing:     p50 {summary['timing_p50_ms']:.3f} ms, p99 {summary['timing_p99_ms']:.3f} ms, "
+          f"max {summary['timing_max_ms']:.3f} ms late")
+    print(f"reports:    {summary['reports']} sent, {summary['reports_deferred']} deferred by rate cap")
+    if "pads" in summary:
+        print(f"{'pad':<5} {'started':>8} {'dispatch p50':>13} {'p99':>9} {'timing p50':>11} {'p99':>9} {'reports':>8}")
+        for pad in summary["pads"]:
+            print(f"{pad['pad']:<5} {pad['started']:>8} {pad['dispatch_p50_ms']:>10.3f} ms {pad['dispatch_p99_ms']:>6.3f} ms "
+                  f"{pad['timing_p50_ms']:>8.3f} ms {pad['timing_p99_ms']:>6.3f} ms {pad['reports']:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a command trace through the controller bridge")
+    parser.add_argument("trace", nargs="?", help="JSONL trace of bridge protocol messages")
+    parser.add_argument("--profile", help="synthesize a trace from this profile instead of reading one")
+    parser.add_argument("--count", type=int, default=200, help="synthesized trace length")
+    parser.add_argument("--rate", type=float, default=20.0, help="synthesized commands per second")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--speed", type=float, default=1.0, help="playback speed multiplier for trace times")
+    parser.add_argument("--fast", action="store_true", help="ignore trace times and send as fast as possible")
+    parser.add_argument("--pads", type=int, default=1, help="virtual controllers to drive at once")
+    parser.add_argument("--record", help="write every report to this JSONL file (one per pad with several)")
+    parser.add_argument("--spin-budget-ms", type=float, default=DEFAULT_SPIN_BUDGET * 1000.0)
+    parser.add_argument("--report-rate-hz", type=float)
+    parser.add_argument("--json", action="store_true", help="print the summary as one JSON line")
+    args = parser.parse_args()
+
+    if args.profile:
+        trace = synthesize_trace(args.profile, args.count, args.rate, args.seed, args.pads)
+    elif args.trace:
+        trace = load_trace(args.trace)
+    else:
+        parser.error("give a TRACE file or --profile")
+
+    summary = replay(trace, speed=args.speed, fast=args.fast, record_path=args.record,
+                     spin_budget=args.spin_budget_ms / 1000.0, report_rate_hz=args.report_rate_hz, pads=args.pads)
+    if args.json:
+        print(json.dumps(summary))
+    else:
+        print_summary(summary)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+"""
+Runtime stats and on-demand sampling profiler for the Phonix Python processes.
+The speech process and the controller bridge each keep one RuntimeStats:
+counters (callback and intake rates, filter rejections), gauges read when a
+snapshot is taken (queue depths, intake totals) and latency histograms
+(callback handling time, dispatch latency, sleep overshoot).
+
+Snapshots are exposed two ways, both off by default:
+- --stats-interval SECONDS prints one line per interval on stderr, with
+  each counter's rate over the interval:
+
+      [runtime] {"process": "bridge", "pid": 4242, "t": 1700000000123.4, "uptime_s": 60.0,
+                 "counters": {...}, "rates": {...}, "gauges": {...}, "histograms": {...}}
+
+- --stats-port PORT serves them on 127.0.0.1:
+      GET /stats               one snapshot as JSON
+      GET /profile?seconds=N   sample every thread for N seconds (default 5) and return folded stacks
+
+The sampling profiler (StackSampler) reads every thread's stack a few
+hundred times a second while it runs, so a session that stutters can be
+profiled without restarting it under a profiler. Besides /profile it is
+toggled by SIGUSR1 (not on Windows) or each process's control command
+({"command": "sample", "seconds": N}). Every run is written as a .folded
+file (one "thread;outer;...;inner count" line per stack, the input format
+of flamegraph.pl and speedscope) to --sample-dir, and its hottest
+functions are logged on stderr.
+"""
+import os
+import sys
+import json
+import time
+import signal
+import tempfile
+import threading
+import functools
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import tracing
+from timing import JitterStats
+
+DEFAULT_SAMPLE_INTERVAL = 0.005
+DEFAULT_SAMPLE_SECONDS = 5.0
+MAX_SAMPLE_SECONDS = 120.0
+# Hottest functions logged after a sampling run
+TOP_FUNCTIONS = 8
+
+
+class RuntimeStats:
+    """
+    Named counters, gauges and histograms for one process. incr() and the
+    histograms are cheap enough for per-callback and per-action use; gauges
+    cost nothing until a snapshot reads them.
+    """
+
+    def __init__(self, process: str):
+        self.process = process
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._counters = Counter()
+        self._gauges = {}      # name -> callable returning a number or a dict of numbers
+        self._histograms = {}  # name -> JitterStats (seconds)
+
+    def incr(self, name: str, n: int = 1):
+        with self._lock:
+            self._counters[name] += n
+
+    def gauge(self, name: str, read):
+        """Report read() under name in every snapshot."""
+        self._gauges[name] = read
+
+    def histogram(self, name: str, stats: JitterStats = None) -> JitterStats:
+        """The histogram called name, created on first use; or register an existing JitterStats under name."""
+        if stats is not None:
+            self._histograms[name] = stats
+        return self._histograms.setdefault(name, JitterStats())
+
+    def timed(self, name: str):
+        """Decorator: count calls as counter name and record their duration in histogram name."""
+        def wrap(fn):
+            histogram = self.histogram(name)
+
+            @functools.wraps(fn)
+            def timed_call(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    histogram.record(time.perf_counter() - start)
+                    self.incr(name)
+            return timed_call
+        return wrap
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+        gauges = {}
+        for name, read in list(self._gauges.items()):
+            try:
+                gauges[name] = read()
+            except Exception as e:
+                gauges[name] = f"error: {e}"
+        return {
+            "process": self.process,
+            "pid": os.getpid(),
+            "t": round(tracing.now_ms(), 3),
+            "uptime_s": round(time.perf_counter() - self.started, 3),
+            "counters": counters,
+            "gauges": gauges,
+            "histograms": {name: {key: round(value, 4) for key, value in stats.snapshot().items()}
+                           for name, stats in list(self._histograms.items())},
+        }
+
+
+class StatsReporter:
+    """Prints a [runtime] snapshot line, with per-second counter rates, every interval seconds."""
+
+    def __init__(self, stats: RuntimeStats, interval: float, stream=None):
+        self.stats = stats
+        self.interval = interval
+        self.stream = stream
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="stats-reporter", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        previous, last = {}, time.perf_counter()
+        while not self._stop.wait(self.interval):
+            snapshot = self.stats.snapshot()
+            now = time.perf_counter()
+            elapsed = now - last
+            snapshot["rates"] = {name: round((count - previous.get(name, 0)) / elapsed, 2)
+                                 for name, count in snapshot["counters"].items()}
+            previous, last = snapshot["counters"], now
+            print(f"[runtime] {json.dumps(snapshot)}", file=self.stream or sys.stderr, flush=True)
+
+
+def _frame_name(code) -> str:
+    return f"{os.path.basename(code.co_filename)}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+class StackSampler:
+    """
+    Statistical profiler over every thread of the process. While running, a
+    background thread records each thread's stack every interval seconds;
+    stop() writes the folded stacks to out_dir and logs the hottest functions.
+    """
+
+    def __init__(self, process: str, out_dir: str = None, interval: float = DEFAULT_SAMPLE_INTERVAL):
+        self.process = process
+        self.out_dir = out_dir or tempfile.gettempdir()
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._stacks = None
+        self._thread = None
+        self._started = 0.0
+        self._samples = 0
+        self._stop = threading.Event()
+        self._timer = None
+
+    @property
+    def active(self) -> bool:
+        return self._thread is not None
+
+    def start(self, seconds: float = None) -> bool:
+        """Start sampling (for seconds, then stop by itself). Returns False if already running."""
+        with self._lock:
+            if self._thread is not None:
+                return False
+            self._stacks = Counter()
+            self._samples = 0
+            self._stop.clear()
+            self._started = time.perf_counter()
+            self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+            self._thread.start()
+            if seconds:
+                self._timer = threading.Timer(min(seconds, MAX_SAMPLE_SECONDS), self.stop)
+                self._timer.daemon = True
+                self._timer.start()
+        print(f"[runtime] sampling {self.process} every {self.interval * 1000:.0f} ms"
+              + (f" for {seconds:g} s" if seconds else ""), file=sys.stderr, flush=True)
+        return True
+
+    def stop(self):
+        """Stop sampling; returns (path of the .folded file, folded text), or None if it wasn't running."""
+        with self._lock:
+            thread = self._thread
+            if thread is None:
+                return None
+            self._stop.set()
+            if self._timer is not None and self._timer is not threading.current_thread():
+                self._timer.cancel()
+            self._timer = None
+        thread.join()
+        with self._lock:
+            self._thread = None
+            stacks, samples = self._stacks, self._samples
+        elapsed = time.perf_counter() - self._started
+        folded = "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+        path = os.path.join(self.out_dir, f"phonix-{self.process}-{os.getpid()}-{time.strftime('%Y%m%d-%H%M%S')}.folded")
+        try:
+            os.makedirs(self.out_dir, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(folded)
+        except OSError as e:
+            print(f"[runtime] could not write profile: {e}", file=sys.stderr, flush=True)
+            path = None
+        self._log_summary(stacks, samples, elapsed, path)
+        return path, folded
+
+    def toggle(self):
+        if self.active:
+            self.stop()
+        else:
+            self.start()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            sampled = Counter()
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_name(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                sampled[";".join(reversed(stack))] += 1
+            with self._lock:
+                self._stacks.update(sampled)
+                self._samples += 1
+
+    def _log_summary(self, stacks: Counter, samples: int, elapsed: float, path: str):
+        # Time spent in each function itself (leaf frame), over every thread; idle waits included
+        leaves = Counter()
+        for stack, count in stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        total = sum(leaves.values()) or 1
+        hottest = ", ".join(f"{name} {count / total:.0%}" for name, count in leaves.most_common(TOP_FUNCTIONS))
+        print(f"[runtime] profile: {samples} samples over {elapsed:.1f} s -> {path or 'not written'}",
+              file=sys.stderr, flush=True)
+        if hottest:
+            print(f"[runtime] hottest: {hottest}", file=sys.stderr, flush=True)
+
+
+def _make_handler(stats: RuntimeStats, sampler: StackSampler):
+    class StatsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path in ("/", "/stats"):
+                self._reply(200, "application/json", json.dumps(stats.snapshot()))
+            elif url.path == "/profile":
+                try:
+                    seconds = float(parse_qs(url.query).get("seconds", [DEFAULT_SAMPLE_SECONDS])[0])
+                except ValueError:
+                    self._reply(400, "text/plain", "seconds must be a number\n")
+                    return
+                if not sampler.start():
+                    self._reply(409, "text/plain", "already sampling\n")
+                    return
+                time.sleep(min(max(seconds, 0.0), MAX_SAMPLE_SECONDS))
+                result = sampler.stop()
+                self._reply(200, "text/plain", result[1] if result else "")
+            else:
+                self._reply(404, "text/plain", "try /stats or /profile?seconds=5\n")
+
+        def _reply(self, status: int, content_type: str, body: str):
+            data = body.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+    return StatsHandler
+
+
+def serve(stats: RuntimeStats, sampler: StackSampler, port: int) -> ThreadingHTTPServer:
+    """Serve /stats and /profile on 127.0.0.1:port from a daemon thread."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), _make_handler(stats, sampler))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="stats-server", daemon=True).start()
+    print(f"[runtime] serving stats on http://127.0.0.1:{port}/stats", file=sys.stderr, flush=True)
+    return server
+
+
+def add_arguments(parser):
+    """The command-line options shared by both processes."""
+    parser.add_argument("--stats-interval", type=float, default=0.0,
+                        help="print a [runtime] stats line on stderr every this many seconds (0 = off)")
+    parser.add_argument("--stats-port", type=int, default=0,
+                        help="serve /stats and /profile on this 127.0.0.1 port (0 = off)")
+    parser.add_argument("--sample-dir", default=None,
+                        help="where sampling profiler runs are written (default: the temp directory)")
+
+
+def start(stats: RuntimeStats, args) -> StackSampler:
+    """Start what the add_arguments options ask for; returns the process's sampler. Call from the main thread."""
+    sampler = StackSampler(stats.process, args.sample_dir)
+    if args.stats_interval > 0:
+        StatsReporter(stats, args.stats_interval).start()
+    if args.stats_port:
+        try:
+            serve(stats, sampler, args.stats_port)
+        except OSError as e:
+            print(f"[runtime] can't serve stats on port {args.stats_port}: {e}", file=sys.stderr, flush=True)
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, lambda signum, frame: threading.Thread(target=sampler.toggle, daemon=True).start())
+    return sampler
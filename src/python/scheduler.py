@@ -0,0 +1,307 @@
+"""
+Deadline-driven action scheduler for the Phonix controller bridge.
+Plays several compiled keymap programs at once from a single timer thread,
+so a long hold never blocks the commands queued behind it.
+
+Each running program (a Playback) owns the controller inputs it touches.
+When a new program claims an input that a running one owns, the older
+playback is preempted: it stops immediately, and any inputs it owned that
+the new program doesn't claim are returned to rest. A program can't
+preempt one of higher priority and is refused instead; otherwise arrival
+order decides, so conflicts always resolve the same way.
+"""
+import heapq
+import itertools
+import sys
+import threading
+
+from keymap_compiler import OP_WAIT, neutral_step, program_resources
+from timing import JitterStats, PrecisionTimer
+from queue_policy import PRIORITY_NORMAL
+import tracing
+
+
+class Playback:
+    """One keymap program in flight."""
+
+    __slots__ = ("id", "program", "priority", "trace", "tag", "resources", "pc", "deadline", "submitted", "started",
+                 "cancelled", "reported")
+
+    def __init__(self, playback_id: int, program: tuple, deadline: float, priority: int = PRIORITY_NORMAL,
+                 trace: str = None, tag=None):
+        self.id = playback_id
+        self.program = program
+        self.priority = priority
+        self.trace = trace
+        self.tag = tag
+        self.resources = program_resources(program)
+        self.pc = 0
+        self.deadline = deadline
+        self.submitted = deadline
+        self.started = None
+        self.cancelled = False
+        self.reported = False  # first input step applied; first_report sent or waiting for a report
+
+
+class ActionScheduler:
+    """
+    Runs compiled programs concurrently against one controller state.
+
+    Every step due in the same tick is applied to state (a ControllerState)
+    and then flushed once, so a tick produces at most one report. Deadlines
+    are met with the timer's sleep-then-spin strategy, and the lateness of
+    every step that follows a wait is recorded in timer.stats. The delay
+    from submit to a playback's first step is recorded in dispatch_stats.
+
+    Playbacks submitted with a tag are reported when they end, in batches, as
+    on_finished([(tag, completed, start_delay, play_time), ...]) from the
+    scheduler thread: completed is False if they were preempted or
+    cancelled, start_delay (seconds from submit to first step) is None if
+    they never started.
+    """
+
+    def __init__(self, state, timer: PrecisionTimer = None, name: str = "action-scheduler"):
+        self.state = state
+        self.name = name
+        self.timer = timer or PrecisionTimer()
+        self.dispatch_stats = JitterStats()
+        self.preempted = 0  # playbacks stopped early by a conflict or cancel_all
+        self.on_finished = None
+        self._finished = []  # (tag, completed, start_delay, play_time) awaiting on_finished
+        self._clock = self.timer.clock
+        self._heap = []
+        self._seq = itertools.count()
+        self._ids = itertools.count(1)
+        self._owners = {}  # resource -> Playback
+        self._active = {}  # playback id -> Playback
+        lock = threading.RLock()
+        self._cond = threading.Condition(lock)
+        self._reported = threading.Condition(lock)  # notified when every change has been reported
+        self._running = False
+        self._thread = None
+        self._dirty = False  # state changed since the last flush
+        self._flush_at = None  # retry time for a report held back by the rate cap
+        self._unreported = []  # traces whose playback applied a step that no report has carried yet
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, drain: bool = False, timeout: float = None):
+        """Stop the scheduler thread. With drain=True, let queued playbacks finish first."""
+        with self._cond:
+            if drain:
+                self._cond.wait_for(lambda: not self._active, timeout=timeout)
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def submit(self, program: tuple, priority: int = PRIORITY_NORMAL, trace: str = None, tag=None):
+        """
+        Queue a program to start now. Never blocks on playback.
+        Returns the playback id, or None if a higher-priority playback owns an input it needs.
+        With a trace ID, a first_report stats line is emitted once a report
+        carrying the playback's first input step has been sent to the driver. With a tag, the
+        playback's end is reported to on_finished.
+        """
+        with self._cond:
+            playback = Playback(next(self._ids), program, self._clock(), priority, trace, tag)
+            if not self._claim(playback):
+                return None
+            self._active[playback.id] = playback
+            heapq.heappush(self._heap, (playback.deadline, next(self._seq), playback))
+            self._cond.notify()
+            return playback.id
+
+    def cancel_all(self) -> int:
+        """Stop every running playback and return its inputs to rest. Returns how many were cancelled."""
+        with self._cond:
+            cancelled = list(self._active.values())
+            for playback in cancelled:
+                self._cancel(playback, keep=frozenset())
+            self.preempted += len(cancelled)
+            self._cond.notify()
+            return len(cancelled)
+
+    def release_all(self) -> int:
+        """cancel_all, then zero the whole controller state, including inputs left set by finished playbacks."""
+        with self._cond:
+            cancelled = self.cancel_all()
+            self.state.reset()
+            self._dirty = True
+            return cancelled
+
+    def wait_reported(self, timeout: float = None) -> bool:
+        """Block until every change made so far has been sent to the driver. Returns False on timeout."""
+        with self._cond:
+            return self._reported.wait_for(lambda: not self._dirty and self._flush_at is None, timeout)
+
+    def active_count(self) -> int:
+        with self._cond:
+            return len(self._active)
+
+    def _claim(self, playback: Playback) -> bool:
+        """
+        Give playback ownership of its inputs, preempting older owners of equal
+        or lower priority. Returns False (claiming nothing) if a higher-priority
+        playback owns one of them. Caller holds the lock.
+        """
+        preempted = {}
+        for resource in playback.resources:
+            owner = self._owners.get(resource)
+            if owner is not None:
+                if owner.priority > playback.priority:
+                    return False
+                preempted[owner.id] = owner
+        for owner in preempted.values():
+            self._cancel(owner, keep=playback.resources)
+        self.preempted += len(preempted)
+        for resource in playback.resources:
+            self._owners[resource] = playback
+        return True
+
+    def _cancel(self, playback: Playback, keep: frozenset):
+        """Stop playback and rest the inputs it owned, except those in keep. Caller holds the lock."""
+        playback.cancelled = True
+        self._active.pop(playback.id, None)
+        self._record_finished(playback, completed=False)
+        for resource in playback.resources:
+            if self._owners.get(resource) is playback:
+                del self._owners[resource]
+                if resource not in keep:
+                    self._safe_apply(*neutral_step(resource))
+        if not self._active:
+            self._cond.notify_all()
+
+    def _release(self, playback: Playback):
+        """Drop ownership after a playback runs to completion. Caller holds the lock."""
+        self._active.pop(playback.id, None)
+        self._record_finished(playback, completed=True)
+        for resource in playback.resources:
+            if self._owners.get(resource) is playback:
+                del self._owners[resource]
+        if not self._active:
+            self._cond.notify_all()
+
+    def _record_finished(self, playback: Playback, completed: bool):
+        """Queue a tagged playback's end for on_finished. Caller holds the lock."""
+        if playback.tag is None or self.on_finished is None:
+            return
+        if playback.started is None:
+            self._finished.append((playback.tag, completed, None, 0.0))
+        else:
+            self._finished.append((playback.tag, completed, playback.started - playback.submitted,
+                                   self._clock() - playback.started))
+
+    def _deliver_finished(self):
+        """Hand queued playback ends to on_finished. Caller holds the lock."""
+        if not self._finished:
+            return
+        finished, self._finished = self._finished, []
+        try:
+            self.on_finished(finished)
+        except Exception as e:
+            print(f"[scheduler] error reporting finished playbacks: {e}", file=sys.stderr, flush=True)
+
+    def _safe_apply(self, op, a, b):
+        try:
+            self.state.apply(op, a, b)
+            self._dirty = True
+        except Exception as e:
+            print(f"[scheduler] error applying step {op}: {e}", file=sys.stderr, flush=True)
+
+    def _flush(self):
+        """Send this tick's changes as one report. Caller holds the lock."""
+        now = self._clock()
+        if not self._dirty and (self._flush_at is None or self._flush_at > now):
+            return
+        self._dirty = False
+        sent = self.state.reports_sent
+        try:
+            self._flush_at = self.state.flush(now)
+        except Exception as e:
+            self._flush_at = None
+            print(f"[scheduler] error sending report: {e}", file=sys.stderr, flush=True)
+        if self._unreported and self.state.reports_sent != sent:
+            # This report is the first to carry these playbacks' steps to the driver
+            for trace_id in self._unreported:
+                tracing.emit(trace_id, "first_report")
+            self._unreported.clear()
+        if self._flush_at is None:
+            self._reported.notify_all()
+
+    def _next_deadline(self):
+        """Earliest of the next playback step and a deferred report. Caller holds the lock."""
+        deadline = self._heap[0][0] if self._heap else None
+        if self._flush_at is not None and (deadline is None or self._flush_at < deadline):
+            deadline = self._flush_at
+        return deadline
+
+    def _advance(self, playback: Playback):
+        """Run playback's steps up to its next wait, then reschedule it. Caller holds the lock."""
+        program = playback.program
+        pc = playback.pc
+        end = len(program)
+        while pc < end:
+            op, a, b = program[pc]
+            pc += 1
+            if op == OP_WAIT:
+                # Absolute deadlines so waits don't accumulate dispatch drift
+                playback.pc = pc
+                playback.deadline += a
+                heapq.heappush(self._heap, (playback.deadline, next(self._seq), playback))
+                return
+            self._safe_apply(op, a, b)
+            if playback.trace and not playback.reported:
+                playback.reported = True
+                self._unreported.append(playback.trace)
+        playback.pc = pc
+        self._release(playback)
+
+    def _run(self):
+        with self._cond:
+            while self._running:
+                # Changes made outside a tick (preemption on submit, cancel_all)
+                self._flush()
+                self._deliver_finished()
+                deadline = self._next_deadline()
+                if deadline is None:
+                    self._cond.wait()
+                    continue
+                delay = self.timer.coarse_delay(deadline)
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+                if deadline > self._clock():
+                    # Spin the last stretch without the lock so submits aren't held up,
+                    # then re-check the heap in case an earlier deadline arrived
+                    self._cond.release()
+                    try:
+                        self.timer.spin_until(deadline)
+                    finally:
+                        self._cond.acquire()
+                    continue
+                # One tick: run every playback that is due, then send one report
+                now = self._clock()
+                while self._heap and self._heap[0][0] <= now:
+                    step_deadline, _, playback = heapq.heappop(self._heap)
+                    if not playback.cancelled:
+                        if playback.pc:
+                            self.timer.record_dispatch(step_deadline)
+                        else:
+                            playback.started = self._clock()
+                            self.dispatch_stats.record(playback.started - step_deadline)
+                        self._advance(playback)
+                self._flush()
+                self._deliver_finished()
+            # Don't lose a final report (e.g. the last release) held back by the rate cap
+            if self._flush_at is not None:
+                self.timer.spin_until(self._flush_at)
+            self._flush()
+            self._deliver_finished()
@@ -0,0 +1,112 @@
+"""
+Speculative action dispatch for the Phonix speech process (--speculate).
+Waiting for the final transcription costs the post-speech silence plus a
+final decode on every command. In speculative mode a confident realtime
+partial fires its actions at once; the final transcription then confirms
+them, or, when it disagrees, the speculator sends a compensating
+release_all and fires what the final text actually says.
+
+Phrases are resolved per utterance (each hypothesis from scratch), so
+unlike the streaming resolver a command split across two recordings does
+not resolve. Hit rate and rollbacks are counted so a profile can be judged
+on whether speculation pays off.
+"""
+import threading
+
+from phrase_resolver import PhraseResolver, KIND_COMMAND
+
+ROLLBACK_COMMAND = "release_all"
+# Utterances whose speculative actions are remembered until their final; only the open
+# recording and the sealed ones awaiting a final need it, older ones were abandoned
+MAX_OPEN_UTTERANCES = 8
+
+
+class Speculator:
+    """
+    Fires speculative actions from partial hypotheses and reconciles them
+    with the final transcription. fire(kind, id, utterance_id) is called for
+    every action, speculative, late or compensating.
+    """
+
+    def __init__(self, phrases: dict, fire, min_confidence: float, early: bool = True):
+        self._fire = fire
+        self.min_confidence = min_confidence
+        self._decided = []
+        self._resolver = PhraseResolver(phrases, lambda kind, target_id, _: self._decided.append((kind, target_id)),
+                                        early=early)
+        self._lock = threading.Lock()
+        self._fired = {}  # utterance_id -> actions fired speculatively, in order
+        self.speculated = 0
+        self.confirmed = 0
+        self.cancelled = 0   # speculative actions the final text did not contain
+        self.rollbacks = 0   # finals that needed a compensating release_all
+        self.late = 0        # actions only the final text produced
+
+    def _resolve(self, words: list, final: bool) -> list:
+        """Phrases decided by a whole hypothesis; a partial leaves a phrase that may still grow undecided."""
+        self._resolver.reset()
+        self._decided = []
+        for word in words:
+            self._resolver.feed(word)
+        if final:
+            self._resolver.end_utterance()
+        return self._decided
+
+    def partial(self, utterance_id: str, scored: list):
+        """
+        A realtime hypothesis as (vocabulary word or None, confidence) pairs.
+        Fires newly decided actions if every word matched the vocabulary
+        confidently and the hypothesis still agrees with what was already fired.
+        """
+        if utterance_id is None or not scored:
+            return
+        if any(word is None or score < self.min_confidence for word, score in scored):
+            return
+        with self._lock:
+            decided = self._resolve([word for word, _ in scored], final=False)
+            fired = self._fired.get(utterance_id)
+            if fired is None:
+                while len(self._fired) >= MAX_OPEN_UTTERANCES:
+                    # Finals arrive in order: the oldest entry's final is never coming
+                    self._fired.pop(next(iter(self._fired)))
+                fired = self._fired[utterance_id] = []
+            if decided[:len(fired)] != fired:
+                return
+            pending = decided[len(fired):]
+            fired.extend(pending)
+            self.speculated += len(pending)
+        for kind, target_id in pending:
+            self._fire(kind, target_id, utterance_id)
+
+    def final(self, utterance_id: str, words: list):
+        """Reconcile an utterance's speculative actions with its final transcription."""
+        with self._lock:
+            remaining = self._resolve(words, final=True)
+            wrong = []
+            for action in self._fired.pop(utterance_id, []):
+                if action in remaining:
+                    remaining.remove(action)
+                    self.confirmed += 1
+                else:
+                    wrong.append(action)
+            if wrong:
+                self.cancelled += len(wrong)
+                self.rollbacks += 1
+            self.late += len(remaining)
+        if wrong:
+            self._fire(KIND_COMMAND, ROLLBACK_COMMAND, utterance_id)
+        for kind, target_id in remaining:
+            self._fire(kind, target_id, utterance_id)
+
+    def reset(self):
+        """Drop speculation state for open utterances (counters are kept)."""
+        with self._lock:
+            self._fired.clear()
+
+    @property
+    def hit_rate(self) -> float:
+        return self.confirmed / self.speculated if self.speculated else 0.0
+
+    def summary(self) -> str:
+        return (f"{self.speculated} speculative actions, {self.hit_rate:.0%} confirmed, "
+                f"{self.rollbacks} rollbacks ({self.cancelled} cancelled), {self.late} late")
@@ -0,0 +1,107 @@
+"""
+CPU inference autotuner for the Phonix speech process.
+Sweeps compute type, inference threads and (optionally) core
+sets on the local machine, playing a reference corpus through the speech
+process for each combination (see speech_bench.py), and writes the
+fastest combination whose command accuracy reaches the floor to
+speech_config.json, which the speech process reads at startup.
+
+The reference corpus uses speech_bench.py's manifest format; a handful of
+recorded commands from the profile you play is enough.
+
+Usage:
+    python speech_autotune.py reference.jsonl --profile ../profiles/fighting.json [--floor 0.9] [--affinity 4,5,6,7]
+"""
+import os
+import sys
+import json
+import argparse
+import itertools
+
+from cpu_tuning import TUNED_CONFIG_PATH, load_config_file
+from speech_bench import load_manifest, measure_variant, score, print_results
+
+DEFAULT_COMPUTE_TYPES = ("int8", "float32")
+DEFAULT_THREADS = (1, 2, 4)
+
+
+def _int_list(text: str) -> list:
+    return [int(value) for value in text.split(",") if value.strip()]
+
+
+def candidates(args) -> list:
+    """One benchmark variant per combination of the swept settings."""
+    core_sets = [_int_list(cores) for cores in args.affinity] if args.affinity else [None]
+    variants = []
+    for compute_type, threads, cores in itertools.product(
+            args.compute_types.split(","), _int_list(args.threads), core_sets):
+        config = {
+            "compute_type": compute_type,
+            "inference_threads": threads,
+            "cpu_affinity": cores,
+        }
+        name = f"{compute_type}/{threads}t"
+        if cores:
+            name += f"/cpu{','.join(map(str, cores))}"
+        variants.append({"name": name, "config": config})
+    return variants
+
+
+def rank_key(result: dict, objective: str):
+    """Sort key: lower is better; missing measurements sort last."""
+    latency = result["latency_p50_ms"] if result["latency_p50_ms"] is not None else float("inf")
+    cpu = result["cpu_seconds"] if result["cpu_seconds"] is not None else float("inf")
+    return (cpu, latency) if objective == "cpu" else (latency, cpu)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pick CPU inference settings for the speech process on this machine")
+    parser.add_argument("manifest", help="JSONL reference corpus (speech_bench.py format)")
+    parser.add_argument("--profile", help="profile JSON; clips are scored on resolved actions")
+    parser.add_argument("--floor", type=float, default=0.9, help="minimum command accuracy (0-1) a setting must reach")
+    parser.add_argument("--objective", choices=("latency", "cpu"), default="latency",
+                        help="what 'fastest' means: p50 speech-end-to-action latency, or CPU seconds used")
+    parser.add_argument("--compute-types", default=",".join(DEFAULT_COMPUTE_TYPES))
+    parser.add_argument("--threads", default=",".join(map(str, DEFAULT_THREADS)), help="inference thread counts to try")
+    parser.add_argument("--affinity", action="append", metavar="CORES",
+                        help="core set to try, e.g. 4,5,6,7 (repeatable; default: no pinning)")
+    parser.add_argument("--write", default=TUNED_CONFIG_PATH, help="config file to update with the winner")
+    parser.add_argument("--dry-run", action="store_true", help="report only, don't write the config file")
+    parser.add_argument("--speed", type=float, default=1.0, help="input pace (1.0 = real time)")
+    parser.add_argument("--gap", type=float, default=1.0, help="seconds of silence between clips")
+    parser.add_argument("--tail", type=float, default=3.0, help="seconds to wait after the last clip")
+    parser.add_argument("--timeout", type=float, default=600.0, help="per-setting time limit in seconds")
+    parser.add_argument("--verbose", action="store_true", help="show the speech process's stderr")
+    args = parser.parse_args()
+
+    corpus = load_manifest(args.manifest)
+    if not corpus:
+        parser.error("empty corpus")
+
+    results = []
+    variants = candidates(args)
+    for i, variant in enumerate(variants, 1):
+        print(f"[{i}/{len(variants)}] {variant['name']}...", file=sys.stderr)
+        results.append((variant, score(corpus, measure_variant(variant, corpus, args), args.speed)))
+    print_results([(variant["name"], result) for variant, result in results])
+
+    eligible = [(variant, result) for variant, result in results if result["accuracy"] >= args.floor]
+    if not eligible:
+        print(f"\nno setting reached {args.floor:.0%} accuracy; config unchanged", file=sys.stderr)
+        sys.exit(1)
+    best, best_result = min(eligible, key=lambda item: rank_key(item[1], args.objective))
+    print(f"\nbest: {best['name']} ({best_result['accuracy']:.0%} accuracy)")
+    if args.dry_run:
+        return
+
+    # Keep whatever else the config file sets
+    config = load_config_file(args.write)
+    config.update(best["config"])
+    with open(args.write, "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2)
+        f.write("\n")
+    print(f"wrote {os.path.relpath(args.write)}")
+
+
+if __name__ == "__main__":
+    main()
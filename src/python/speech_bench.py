@@ -0,0 +1,242 @@
+"""
+Offline recognition benchmark for the Phonix speech process.
+Plays a labelled corpus of recorded commands through speech_stub.py
+(--input, the same recorder configuration as live use) once per CONFIG
+variant and reports command accuracy, speech-end-to-emit latency, CPU time
+and real-time factor, to choose realtime_processing_pause, batch sizes and
+model sizes from data.
+
+The corpus is a JSONL manifest, one recorded command per line, paths
+relative to the manifest:
+    {"audio": "clips/jump_forward_01.wav", "expected": "jump forward", "speech_end": 0.82}
+"expected" is the profile keyword (or, without --profile, the words) the
+clip should produce; "speech_end" is where speech stops in the clip, in
+seconds (default: the end of the file).
+
+Variants are a JSON list of {"name": ..., "config": {CONFIG key: value}};
+without --variants a small built-in sweep is run.
+
+Usage:
+    python speech_bench.py corpus.jsonl --profile ../profiles/fighting.json [--variants v.json] [--speed 1.0] [--json]
+"""
+import os
+import sys
+import json
+import argparse
+import threading
+import subprocess
+
+import tracing
+from timing import percentile
+
+try:
+    import resource
+except ImportError:  # Windows: CPU time is not reported
+    resource = None
+
+SPEECH_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "speech_stub.py")
+INPUT_MARKER = "[speech] input "
+
+DEFAULT_VARIANTS = [
+    {"name": "default", "config": {}},
+    {"name": "pause-50ms", "config": {"realtime_processing_pause": 0.05}},
+    {"name": "pause-100ms", "config": {"realtime_processing_pause": 0.1}},
+    {"name": "batch-16", "config": {"realtime_batch_size": 16}},
+    {"name": "base.en", "config": {"model": "base.en", "realtime_model_type": "base.en"}},
+]
+
+
+def load_manifest(path: str) -> list:
+    base = os.path.dirname(os.path.abspath(path))
+    corpus = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            entry["audio"] = os.path.join(base, entry["audio"])
+            entry["expected"] = entry["expected"].lower().strip()
+            corpus.append(entry)
+    return corpus
+
+
+def load_variants(path: str) -> list:
+    if not path:
+        return DEFAULT_VARIANTS
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _cpu_seconds() -> float:
+    """CPU time of every child process waited for so far; it only grows, so take a delta per run."""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def run_variant(variant: dict, corpus: list, args) -> dict:
+    """Run the corpus through one speech process with the variant's CONFIG; return raw timings."""
+    cmd = [sys.executable, SPEECH_SCRIPT, "--input", *[entry["audio"] for entry in corpus],
+           "--input-speed", str(args.speed), "--input-gap", str(args.gap), "--input-tail", str(args.tail)]
+    if args.profile:
+        cmd += ["--profile", args.profile, "--resolve"]
+    for key, value in variant.get("config", {}).items():
+        cmd += ["--config", f"{key}={json.dumps(value)}"]
+
+    outputs = []  # (receipt ms, line)
+    markers = []  # input markers in play order
+    proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                            text=True, bufsize=1)
+
+    def read_stdout():
+        for line in proc.stdout:
+            if line.strip() and not line.startswith("[speech]"):
+                outputs.append((tracing.now_ms(), line.strip()))
+
+    def read_stderr():
+        for line in proc.stderr:
+            if line.startswith(INPUT_MARKER):
+                markers.append(json.loads(line[len(INPUT_MARKER):]))
+            elif args.verbose:
+                print(f"    [{variant['name']}] {line.rstrip()}", file=sys.stderr)
+
+    readers = [threading.Thread(target=read_stdout, daemon=True), threading.Thread(target=read_stderr, daemon=True)]
+    for reader in readers:
+        reader.start()
+    try:
+        proc.wait(timeout=args.timeout)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+    for reader in readers:
+        reader.join(timeout=5.0)
+    proc.stdin.close()
+    return {
+        "outputs": outputs,
+        "markers": markers,
+        "exit_code": proc.returncode,
+    }
+
+
+def measure_variant(variant: dict, corpus: list, args) -> dict:
+    """run_variant plus cpu_seconds, the CPU time its speech process used."""
+    cpu_before = _cpu_seconds()
+    run = run_variant(variant, corpus, args)
+    # RUSAGE_CHILDREN accumulates over every variant run so far: keep only this one's share
+    run["cpu_seconds"] = _cpu_seconds() - cpu_before if cpu_before is not None else None
+    return run
+
+
+def _emitted(line: str):
+    """Resolved ID for an action/command line, or the word for a word line."""
+    head = line.split("\t", 1)[0]
+    return head[1:] if head[:1] in (">", "!") else head
+
+
+def score(corpus: list, run: dict, speed: float) -> dict:
+    """Match outputs to clips by play window and compute accuracy and latency."""
+    markers = run["markers"]
+    outputs = run["outputs"]
+    correct = 0
+    extra = 0
+    latencies = []
+    audio_seconds = 0.0
+    for i, entry in enumerate(corpus):
+        if i >= len(markers):
+            break
+        start = markers[i]["t"]
+        end = markers[i + 1]["t"] if i + 1 < len(markers) else float("inf")
+        duration = markers[i]["duration"] or 0.0
+        audio_seconds += duration
+        window = [(t, _emitted(line), line) for t, line in outputs if start <= t < end]
+        expected = entry["expected"]
+        speech_end = start + float(entry.get("speech_end", duration)) * 1000.0 / (speed or float("inf"))
+
+        hit_at = None
+        if window and window[0][2][:1] in (">", "!"):
+            # Resolved actions: the clip's first action must be the expected one
+            if window[0][1] == expected:
+                hit_at = window[0][0]
+            extra += len(window) - (1 if hit_at is not None else 0)
+        else:
+            # Words: the expected words must appear in order; latency to the last of them
+            words = expected.split()
+            k = 0
+            for t, word, _ in window:
+                if k < len(words) and word == words[k]:
+                    k += 1
+                    if k == len(words):
+                        hit_at = t
+                        break
+        if hit_at is not None:
+            correct += 1
+            latencies.append(hit_at - speech_end)
+
+    latencies.sort()
+    played = min(len(corpus), len(markers))
+    cpu = run["cpu_seconds"]
+    return {
+        "clips": len(corpus),
+        "played": played,
+        "correct": correct,
+        "accuracy": correct / played if played else 0.0,
+        "extra_actions": extra,
+        "latency_p50_ms": percentile(latencies, 50) if latencies else None,
+        "latency_p90_ms": percentile(latencies, 90) if latencies else None,
+        "latency_max_ms": latencies[-1] if latencies else None,
+        "audio_seconds": audio_seconds,
+        "cpu_seconds": cpu,
+        "cpu_rtf": (cpu / audio_seconds) if cpu is not None and audio_seconds else None,
+        "exit_code": run["exit_code"],
+    }
+
+
+def _fmt(value, spec: str) -> str:
+    return "n/a" if value is None else format(value, spec)
+
+
+def print_results(results: list):
+    print(f"{'variant':<14} {'accuracy':>9} {'extra':>6} {'p50':>9} {'p90':>9} {'max':>9} {'cpu s':>7} {'cpu rtf':>8}")
+    for name, r in results:
+        print(f"{name:<14} {r['correct']:>3}/{r['played']:<3}{r['accuracy']:>4.0%} {r['extra_actions']:>5} "
+              f"{_fmt(r['latency_p50_ms'], '>6.0f')} ms {_fmt(r['latency_p90_ms'], '>6.0f')} ms "
+              f"{_fmt(r['latency_max_ms'], '>6.0f')} ms {_fmt(r['cpu_seconds'], '>7.1f')} {_fmt(r['cpu_rtf'], '>8.2f')}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline recognition benchmark over CONFIG variants")
+    parser.add_argument("manifest", help="JSONL corpus of recorded commands")
+    parser.add_argument("--profile", help="profile JSON; clips are scored on resolved actions")
+    parser.add_argument("--variants", help="JSON list of {name, config} (default: built-in sweep)")
+    parser.add_argument("--only", help="comma-separated variant names to run")
+    parser.add_argument("--speed", type=float, default=1.0, help="input pace (1.0 = real time)")
+    parser.add_argument("--gap", type=float, default=1.0, help="seconds of silence between clips")
+    parser.add_argument("--tail", type=float, default=3.0, help="seconds to wait after the last clip")
+    parser.add_argument("--timeout", type=float, default=1800.0, help="per-variant time limit in seconds")
+    parser.add_argument("--json", action="store_true", help="print results as one JSON line")
+    parser.add_argument("--verbose", action="store_true", help="show the speech process's stderr")
+    args = parser.parse_args()
+
+    corpus = load_manifest(args.manifest)
+    if not corpus:
+        parser.error("empty corpus")
+    variants = load_variants(args.variants)
+    if args.only:
+        wanted = set(args.only.split(","))
+        variants = [v for v in variants if v["name"] in wanted]
+
+    results = []
+    for variant in variants:
+        if not args.json:
+            print(f"running {variant['name']} ({len(corpus)} clips)...", file=sys.stderr)
+        results.append((variant["name"], score(corpus, measure_variant(variant, corpus, args), args.speed)))
+
+    if args.json:
+        print(json.dumps({name: r for name, r in results}))
+    else:
+        print_results(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,10 +4,49 @@ Outputs transcribed words/phrases line-by-line to stdout for TypeScript integrat
 
 Configuration optimized for low-latency game controller commands.
 Based on Phonix implementation patterns and RealtimeSTT best practices.
+
+The process is a long-lived daemon: models load once and are warmed up
+before "[speech] ready", and the host steers it with JSON lines on stdin:
+    {"command": "pause"}                     stop listening, keep models loaded
+    {"command": "resume"}                    listen again from a clean state
+    {"command": "profile", "path": "..."}    swap vocabulary and phrases (null path: open vocabulary)
+    {"command": "shutdown"}                  exit (stdin EOF does the same)
+    {"command": "sample", "seconds": N}      run the sampling profiler for N seconds (default 5)
+
+With --speculate (and --resolve) confident realtime partials fire actions
+at once and the final transcription confirms or rolls them back (see
+speculation.py).
+
+With a profile, the silence that ends a recording follows the vocabulary,
+and the VAD sensitivities are calibrated to the room (see endpointing.py).
+
+With --input the recorder is fed from WAV files or a raw PCM pipe instead
+of the microphone (see audio_source.py), and exits once they are played.
+
+With --stats-interval / --stats-port the process reports callback rates,
+word filter rejections, audio queue depth and callback handling times
+(see runtime_stats.py).
 """
 import sys
+import json
+import time
 import signal
 import logging
+import argparse
+import threading
+
+import tracing
+from stream_diff import UtteranceDiffer
+from word_filter import extract_valid_words
+from vocabulary import DEFAULT_SYNONYMS_PATH
+from phrase_resolver import PhraseResolver, KIND_ACTION
+from profile_cache import load_compiled
+from speculation import Speculator
+from endpointing import Endpointer, NoiseCalibrator
+from audio_source import feed_inputs
+from cpu_tuning import TUNED_CONFIG_PATH, load_config_file, set_cpu_affinity, set_inference_threads
+import runtime_stats
+from runtime_stats import RuntimeStats
 
 # Suppress RealtimeSTT status messages by setting logging level to WARNING
 logging.basicConfig(level=logging.WARNING)
@@ -44,17 +83,77 @@ CONFIG = {
     # Language and processing
     "language": "en",  # English
     "use_microphone": True,  # Use default microphone
+
+    # Word emission: a partial word is emitted once this many consecutive
+    # realtime updates agree on it (1 = emit on first sight, lowest latency)
+    "partial_agreement": 2,
+
+    # Vocabulary mode (--profile): words are snapped to the profile's keywords
+    # and ones below this confidence, or as close to two keywords as the
+    # ambiguity margin, are dropped. Snapping makes greedy decoding good
+    # enough, so both beams drop to 1 for faster passes.
+    "vocab_min_confidence": 0.7,
+    "vocab_ambiguity_margin": 0.05,
+    "vocab_beam_size": 1,
+    "vocab_beam_size_realtime": 1,
+
+    # Speculative dispatch (--speculate): a partial fires its actions only if
+    # every word in it matched the vocabulary with at least this confidence
+    "speculate_min_confidence": 0.9,
+
+    # Adaptive endpointing (with a profile): a partial that completes a phrase
+    # nothing extends ends the recording after this much silence, and one that
+    # is a prefix of a longer phrase gets at least this much
+    "adaptive_endpointing": True,
+    "endpoint_complete_silence": 0.05,
+    "endpoint_prefix_silence": 0.4,
+
+    # Seconds of ambient audio measured when listening first starts to set the
+    # VAD sensitivities above from the noise floor (0 keeps them as configured)
+    "vad_calibration_seconds": 1.0,
+
+    # CPU inference: compute type ("default", "int8", "int8_float32",
+    # "float32") and inference threads (0 = library default) for both models,
+    # which the recorder builds with them at startup, and the core indexes the
+    # speech process and its model process may use (None = all).
+    # speech_autotune.py picks these for the local machine.
+    "compute_type": "default",
+    "inference_threads": 0,
+    "cpu_affinity": None,
 }
 
 # Global recorder instance
 recorder = None
 
-# Words/phrases to filter out (status messages, not actual transcriptions)
-FILTER_WORDS = {
-    "speak", "now", "speaknow",  # Handle both separate and concatenated
-    "recording", "transcribing", "listening", 
-    "ready", "model", "loaded", "error", "warning"
-}
+# Latency tracing (--trace): emit [stats] lines keyed by the utterance ID
+trace_enabled = False
+partial_seen = False
+
+# Emits each word of an utterance once; utterance IDs double as trace IDs
+differ = None
+
+# Profile vocabulary (--profile); None means open-vocabulary transcription
+vocabulary = None
+
+# Phrase resolver (--resolve); when set, resolved actions are sent instead of words
+resolver = None
+
+# Speculative dispatch (--speculate with --resolve); replaces the resolver's word feed
+speculator = None
+
+# Vocabulary-aware endpointing and VAD noise calibration
+endpointer = None
+calibrator = None
+
+# Daemon state: command line options reused on profile swaps, pause and shutdown flags
+options = None
+paused = threading.Event()
+shutdown_requested = threading.Event()
+
+# Callback rates, word filtering and handling times (--stats-interval / --stats-port);
+# the sampling profiler is created in main()
+stats = RuntimeStats("speech")
+sampler = None
 
 def signal_handler(sig, frame):
     """Handle shutdown signals gracefully."""
@@ -63,132 +162,368 @@ def signal_handler(sig, frame):
     # The 'with' statement will call __exit__() exactly once
     sys.exit(0)
 
-def extract_valid_words(text: str) -> list[str]:
+def transcription_words(text: str) -> list[str]:
+    """Valid words of a transcription, snapped to the profile vocabulary when there is one."""
+    words = extract_valid_words(text)
+    stats.incr("words.filtered", len(text.split()) - len(words))
+    if vocabulary is not None:
+        valid = len(words)
+        words = vocabulary.constrain(words)
+        stats.incr("words.off_vocabulary", valid - len(words))
+    return words
+
+def output_word(word: str, utterance_id: str, flag: str):
     """
-    Extract valid words from text, filtering out status messages.
-    Aggressively strips filter words from long concatenated strings.
+    Print one word line for the host: "word<TAB>utteranceId<TAB>flag" (flag p = partial,
+    f = final), plus "<TAB>confidence" in vocabulary mode.
     """
-    if not text or not text.strip():
-        return []
-    
-    # Convert to lowercase and strip non-alphabetic
-    text_lower = ''.join(c for c in text.lower() if c.isalpha() or c.isspace())
-    
-    # Sort filter words by length (longest first) for better matching
-    sorted_filter_words = sorted(FILTER_WORDS, key=len, reverse=True)
-    
-    # Split by spaces
-    words = text_lower.split()
-    valid_words = []
-    
-    for word in words:
-        if not word or len(word) < 2:
-            continue
-        
-        # If word is suspiciously long (> 14 chars), aggressively strip filter words
-        if len(word) > 14:
-            cleaned = word
-            max_iterations = 30  # More iterations for complex cases
-            iteration = 0
-            
-            while iteration < max_iterations and cleaned:
-                iteration += 1
-                original = cleaned
-                
-                # Remove all filter words (try multiple times to catch all patterns)
-                for fw in sorted_filter_words:
-                    # Remove all occurrences
-                    cleaned = cleaned.replace(fw, '')
-                    # Remove repeated patterns (2x, 3x, etc.)
-                    for repeat in range(10, 0, -1):  # Try up to 10 repetitions
-                        pattern = fw * repeat
-                        if pattern in cleaned:
-                            cleaned = cleaned.replace(pattern, '')
-                
-                # If nothing changed, we're done
-                if cleaned == original:
-                    break
-            
-            # If nothing left after stripping, skip it
-            if not cleaned or len(cleaned) < 2:
-                continue
-            
-            # Final check: if it still contains any filter word, skip it
-            if any(fw in cleaned for fw in FILTER_WORDS):
-                continue
-            
-            word = cleaned
-        
-        # Final validation: must be reasonable length and not a status word
-        if (len(word) >= 2 and 
-            len(word) <= 20 and
-            word not in FILTER_WORDS and
-            not any(fw in word for fw in FILTER_WORDS)):
-            valid_words.append(word)
-    
-    return valid_words
-
-def is_valid_word(word: str) -> bool:
-    """Check if a word is a valid transcription (not a status message)."""
-    if not word or len(word) < 2:  # Too short to be meaningful
-        return False
-    if word in FILTER_WORDS:
-        return False
-    # Check if it's a repeated status message (like "speaknowspeaknow")
-    if any(filter_word in word for filter_word in FILTER_WORDS):
-        return False
-    # Check if word is suspiciously long (likely concatenated status messages)
-    if len(word) > 20:  # Normal words shouldn't be this long
-        return False
-    # Check for repeated patterns (like "speaknowspeaknow" or "recordingrecording")
-    for filter_word in FILTER_WORDS:
-        if filter_word * 2 in word:  # Repeated status word
-            return False
-    return True
+    stats.incr("words.emitted")
+    if trace_enabled:
+        tracing.emit(utterance_id, "word_emitted")
+    if vocabulary is not None:
+        print(f"{word}\t{utterance_id}\t{flag}\t{vocabulary.confidence.get(word, 0.0):.2f}", flush=True)
+    else:
+        print(f"{word}\t{utterance_id}\t{flag}", flush=True)
+
+def emit_word(word: str, utterance_id: str, flag: str):
+    """Differ output: feed the phrase resolver, or print the word for the host's parser."""
+    if paused.is_set() or speculator is not None:
+        return
+    if resolver is not None:
+        resolver.feed(word, utterance_id)
+    else:
+        output_word(word, utterance_id, flag)
+
+def output_action(kind: str, target_id: str, utterance_id: str):
+    """
+    Print one resolved phrase for the host: ">actionId<TAB>utteranceId" for a
+    profile keyword, "!command<TAB>utteranceId" for a reserved bridge command.
+    """
+    stats.incr(f"actions.{kind}")
+    if trace_enabled:
+        tracing.emit(utterance_id, "phrase_matched")
+    marker = ">" if kind == KIND_ACTION else "!"
+    print(f"{marker}{target_id}\t{utterance_id}", flush=True)
+
+def speculate(text: str):
+    """Offer a partial hypothesis, with per-word vocabulary confidence, to the speculator."""
+    if speculator is None or paused.is_set():
+        return
+    speculator.partial(differ.utterance_id, [vocabulary.match(word) for word in extract_valid_words(text)])
+
+def report_stats():
+    """Log speculation and endpointing results (at pause, profile swap and shutdown)."""
+    if speculator is not None and speculator.speculated:
+        print(f"[speech] speculation: {speculator.summary()}", file=sys.stderr, flush=True)
+    if endpointer is not None and endpointer.trie is not None:
+        print(f"[speech] endpointing: {endpointer.summary()}", file=sys.stderr, flush=True)
+
+def apply_vad_calibration(noise_dbfs: float, silero_sensitivity: float, webrtc_sensitivity: int):
+    """NoiseCalibrator result: set the running recorder's VAD sensitivities."""
+    if hasattr(recorder, "silero_sensitivity"):
+        recorder.silero_sensitivity = silero_sensitivity
+    webrtc_vad = getattr(recorder, "webrtc_vad_model", None)
+    if hasattr(webrtc_vad, "set_mode"):
+        webrtc_vad.set_mode(webrtc_sensitivity)
+    print(f"[speech] noise floor {noise_dbfs:.0f} dBFS: silero_sensitivity {silero_sensitivity}, "
+          f"webrtc_sensitivity {webrtc_sensitivity}", file=sys.stderr, flush=True)
+
+@stats.timed("callback.recording_start")
+def on_recording_start():
+    """Callback when VAD starts a recording: opens a new utterance."""
+    global partial_seen
+    if paused.is_set():
+        return
+    utterance_id = differ.start()
+    partial_seen = False
+    endpointer.start()
+    if trace_enabled:
+        tracing.emit(utterance_id, "speech_start")
+
+@stats.timed("callback.recording_stop")
+def on_recording_stop():
+    """Callback when VAD ends a recording: the next final transcription belongs to this utterance."""
+    endpointer.stop()
+    differ.seal()
 
+@stats.timed("callback.realtime_update")
 def on_realtime_transcription_update(text: str):
     """
     Callback for real-time transcription updates.
-    Outputs transcribed text to stdout IMMEDIATELY as speech is detected.
-    This is the primary method for rapid word detection.
+    Each update carries the whole partial text so far; the differ emits
+    only words that became stable since the last update.
     """
+    global partial_seen
+    if trace_enabled and differ.utterance_id and not partial_seen:
+        partial_seen = True
+        tracing.emit(differ.utterance_id, "first_partial")
     if text and text.strip():
         # Use extract_valid_words to handle concatenated status messages
-        valid_words = extract_valid_words(text)
-        # Only output if we found valid words (skip if text was all status messages)
-        if valid_words:
-            for word in valid_words:
-                print(word, flush=True)  # Output each valid word immediately
+        words = transcription_words(text)
+        differ.partial(words)
+        endpointer.update(words)
+        speculate(text)
 
+@stats.timed("callback.realtime_stabilized")
 def on_realtime_transcription_stabilized(text: str):
     """
     Callback for stabilized (higher quality) transcription.
-    This fires after speech ends with the final, more accurate result.
-    We use this as a backup/confirmation, but real-time updates are primary.
+    Treated as another partial hypothesis: it can confirm words sooner but
+    never re-emits words already sent for this utterance.
     """
     if text and text.strip():
-        # Use extract_valid_words to handle concatenated status messages
-        valid_words = extract_valid_words(text)
-        for word in valid_words:
-            print(word, flush=True)  # Output each valid word
+        words = transcription_words(text)
+        differ.partial(words)
+        endpointer.update(words)
+        speculate(text)
+
+def decoding_options(profile_vocabulary) -> dict:
+    """Recorder decoding options; vocabulary mode adds a keyword prompt and greedy beams."""
+    if profile_vocabulary is None:
+        return {}
+    prompt = profile_vocabulary.prompt()
+    return {
+        "initial_prompt": prompt,
+        "initial_prompt_realtime": prompt,
+        "beam_size": CONFIG["vocab_beam_size"],
+        "beam_size_realtime": CONFIG["vocab_beam_size_realtime"],
+    }
+
+def load_profile(path: str):
+    """
+    Swap the vocabulary and phrase resolver to a profile (None: open vocabulary).
+    The profile comes from the compiled profile cache, so reloading an edited
+    file recompiles it and an unchanged one is only read back. On a running
+    recorder the prompt and beam settings are updated in place; ones the
+    recorder only reads at startup keep their startup values.
+    """
+    global vocabulary, resolver, speculator
+    report_stats()
+    start = time.perf_counter()
+    compiled = None
+    if path:
+        compiled = load_compiled(path, options.synonyms)
+        new_vocabulary = compiled.vocabulary(options.min_confidence, options.ambiguity_margin)
+        phrases = compiled.phrases
+        new_resolver = PhraseResolver(phrases, output_action, early=not options.no_early_fire)
+    else:
+        new_vocabulary, phrases, new_resolver = None, None, None
+    new_speculator = None
+    if options.resolve and options.speculate and phrases:
+        new_speculator = Speculator(phrases, output_action, CONFIG["speculate_min_confidence"],
+                                    early=not options.no_early_fire)
+    vocabulary, speculator = new_vocabulary, new_speculator
+    resolver = new_resolver if options.resolve else None
+    # The resolver's trie also drives endpointing, with or without --resolve
+    endpointer.trie = new_resolver.trie if new_resolver is not None and CONFIG["adaptive_endpointing"] else None
+    differ.reset()
+
+    if recorder is not None:
+        decoding = decoding_options(vocabulary) or {"initial_prompt": None, "initial_prompt_realtime": None}
+        for name, value in decoding.items():
+            if hasattr(recorder, name):
+                setattr(recorder, name, value)
+    elapsed_ms = (time.perf_counter() - start) * 1000.0
+    if vocabulary is not None:
+        source = "cached" if compiled.from_cache else "compiled"
+        print(f"[speech] vocabulary: {len(vocabulary.words)} words from {len(vocabulary.phrases)} phrases, "
+              f"{len(vocabulary.aliases)} aliases ({source}, {elapsed_ms:.1f} ms)", file=sys.stderr, flush=True)
+    else:
+        print("[speech] open vocabulary", file=sys.stderr, flush=True)
+
+def warm_up():
+    """
+    Run throwaway transcriptions so the first real command doesn't pay for
+    lazy initialization and first-call allocations in the models.
+    """
+    import numpy as np
+
+    start = time.perf_counter()
+    # Half a second of faint noise: silence can be skipped by the model's own VAD filter
+    audio = (np.random.default_rng(0).standard_normal(8000) * 0.001).astype(np.float32)
+    try:
+        if hasattr(recorder, "perform_final_transcription"):
+            recorder.perform_final_transcription(audio)
+        realtime_model = getattr(recorder, "realtime_model_type", None)
+        if hasattr(realtime_model, "transcribe"):
+            segments, _ = realtime_model.transcribe(audio, language=CONFIG["language"], beam_size=1)
+            list(segments)
+    except Exception as e:
+        print(f"[speech] warm-up skipped: {e}", file=sys.stderr, flush=True)
+        return
+    print(f"[speech] warm-up took {(time.perf_counter() - start) * 1000.0:.0f} ms", file=sys.stderr, flush=True)
+
+def set_listening(listening: bool):
+    """Turn audio intake on or off without unloading anything."""
+    if recorder is None:
+        return
+    if hasattr(recorder, "set_microphone") and not options.input:
+        recorder.set_microphone(listening)
+    if listening and hasattr(recorder, "clear_audio_queue"):
+        recorder.clear_audio_queue()
+
+def handle_control(msg: dict):
+    """Apply one control message from the host."""
+    command = msg.get("command")
+    if command == "pause":
+        paused.set()
+        set_listening(False)
+        report_stats()
+        print("[speech] paused", file=sys.stderr, flush=True)
+    elif command == "resume":
+        differ.reset()
+        if resolver is not None:
+            resolver.reset()
+        if speculator is not None:
+            speculator.reset()
+        set_listening(True)
+        paused.clear()
+        if calibrator.noise_dbfs is None:
+            calibrator.start()
+        print("[speech] resumed", file=sys.stderr, flush=True)
+    elif command == "profile":
+        load_profile(msg.get("path"))
+    elif command == "shutdown":
+        shutdown_requested.set()
+    elif command == "sample":
+        # Bounded run (default 5 s); a second command while sampling stops it early
+        if not sampler.start(msg.get("seconds") or runtime_stats.DEFAULT_SAMPLE_SECONDS):
+            sampler.stop()
+    else:
+        print(f"[speech] unknown control command: {command!r}", file=sys.stderr, flush=True)
+
+def input_loop():
+    """Play the --input files through the recorder, let the last one finish transcribing, then exit."""
+    try:
+        fed = feed_inputs(recorder.feed_audio, options.input, speed=options.input_speed, gap=options.input_gap)
+        time.sleep(options.input_tail)
+        print(f"[speech] input done ({fed:.1f} s of audio)", file=sys.stderr, flush=True)
+    except Exception as e:
+        print(f"[speech] input error: {e}", file=sys.stderr, flush=True)
+    shutdown_requested.set()
+
+def apply_config_overrides(overrides: list):
+    """Apply --config KEY=VALUE overrides to CONFIG; values are JSON (bare strings allowed)."""
+    for override in overrides:
+        key, sep, raw = override.partition("=")
+        if not sep or key not in CONFIG:
+            raise ValueError(f"bad --config override '{override}' (expected one of: {', '.join(CONFIG)})")
+        try:
+            CONFIG[key] = json.loads(raw)
+        except json.JSONDecodeError:
+            CONFIG[key] = raw
+
+def apply_config_file(path: str):
+    """Apply CONFIG overrides from a JSON file (e.g. the one speech_autotune.py writes)."""
+    overrides = load_config_file(path)
+    unknown = [key for key in overrides if key not in CONFIG]
+    if unknown:
+        raise ValueError(f"unknown CONFIG keys in {path}: {', '.join(unknown)}")
+    CONFIG.update(overrides)
+
+def apply_cpu_settings():
+    """Pin cores and set the model thread count before the models are built; the model process inherits both."""
+    if CONFIG["cpu_affinity"] and not set_cpu_affinity(CONFIG["cpu_affinity"]):
+        print("[speech] cpu_affinity is not supported on this platform", file=sys.stderr, flush=True)
+    set_inference_threads(CONFIG["inference_threads"])
+    print(f"[speech] cpu: compute {CONFIG['compute_type']}, threads {CONFIG['inference_threads'] or 'default'}, "
+          f"cores {CONFIG['cpu_affinity'] or 'all'}", file=sys.stderr, flush=True)
+
+def control_loop():
+    """
+    Read control messages from stdin until EOF (the host went away) or
+    shutdown. With --input, EOF is ignored: the process exits when the input ends.
+    """
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            msg = json.loads(line)
+        except json.JSONDecodeError:
+            print(f"[speech] bad control line: {line}", file=sys.stderr, flush=True)
+            continue
+        try:
+            handle_control(msg)
+        except Exception as e:
+            print(f"[speech] control error: {e}", file=sys.stderr, flush=True)
+        if shutdown_requested.is_set():
+            return
+    if not options.input:
+        shutdown_requested.set()
 
 def main():
     """Main function to initialize and run the speech-to-text recorder."""
-    global recorder
-    
+    global recorder, trace_enabled, differ, options, endpointer, calibrator, sampler
+
+    parser = argparse.ArgumentParser(description="Phonix speech-to-text")
+    parser.add_argument("--trace", action="store_true", help="emit [stats] latency lines keyed by utterance ID")
+    parser.add_argument("--partial-agreement", type=int, default=CONFIG["partial_agreement"],
+                        help="consecutive partials that must agree before a word is emitted")
+    parser.add_argument("--profile", help="profile JSON: restrict output to its keyword vocabulary")
+    parser.add_argument("--synonyms", default=DEFAULT_SYNONYMS_PATH, help="synonyms JSON used for vocabulary aliases")
+    parser.add_argument("--min-confidence", type=float, default=CONFIG["vocab_min_confidence"],
+                        help="drop words whose best vocabulary match scores below this (0-1)")
+    parser.add_argument("--ambiguity-margin", type=float, default=CONFIG["vocab_ambiguity_margin"],
+                        help="drop words whose two best vocabulary matches score within this of each other")
+    parser.add_argument("--resolve", action="store_true",
+                        help="while a profile is loaded, resolve its phrases here and print action IDs instead of words")
+    parser.add_argument("--no-early-fire", action="store_true",
+                        help="with --resolve, wait for a phrase's last word even once it is the only match left")
+    parser.add_argument("--speculate", action="store_true",
+                        help="with --resolve, fire actions from confident partials and roll back (release all) "
+                             "when the final transcription disagrees")
+    parser.add_argument("--speculate-confidence", type=float, default=CONFIG["speculate_min_confidence"],
+                        help="minimum vocabulary confidence of every word in a partial that speculation fires from")
+    parser.add_argument("--paused", action="store_true", help="start paused; listen after a resume command")
+    parser.add_argument("--no-warmup", action="store_true", help="skip the warm-up transcription at startup")
+    parser.add_argument("--input", nargs="+", metavar="PATH",
+                        help="read audio from WAV files or a raw 16 kHz mono s16le pipe instead of the microphone")
+    parser.add_argument("--input-speed", type=float, default=1.0,
+                        help="input pace: 1.0 = real time, 2.0 = twice as fast, 0 = as fast as possible")
+    parser.add_argument("--input-gap", type=float, default=1.0, help="seconds of silence fed after each input")
+    parser.add_argument("--input-tail", type=float, default=2.0,
+                        help="seconds to wait for the last transcription after the input ends")
+    parser.add_argument("--config-file", default=TUNED_CONFIG_PATH,
+                        help="JSON object of CONFIG overrides, applied before --config (default: speech_config.json "
+                             "from speech_autotune.py, if present)")
+    parser.add_argument("--config", action="append", default=[], metavar="KEY=VALUE",
+                        help="override a CONFIG entry, e.g. --config realtime_processing_pause=0.05")
+    runtime_stats.add_arguments(parser)
+    options = parser.parse_args()
+    try:
+        apply_config_file(options.config_file)
+        apply_config_overrides(options.config)
+    except (ValueError, OSError) as e:
+        parser.error(str(e))
+    if options.input:
+        CONFIG["use_microphone"] = False
+    CONFIG["speculate_min_confidence"] = options.speculate_confidence
+    trace_enabled = options.trace
+    differ = UtteranceDiffer(emit_word, tracing.new_trace_id, agreement=options.partial_agreement)
+    endpointer = Endpointer(None, None, CONFIG["post_speech_silence_duration"], CONFIG["min_length_of_recording"],
+                            CONFIG["endpoint_complete_silence"], CONFIG["endpoint_prefix_silence"])
+    # File input is measured as recorded, not calibrated against
+    calibrator = NoiseCalibrator(apply_vad_calibration, 0.0 if options.input else CONFIG["vad_calibration_seconds"])
+    load_profile(options.profile)
+    if options.paused:
+        paused.set()
+
     # Register signal handlers for graceful shutdown
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
-    
-    # Notify TypeScript that we're ready (send to stderr so it's not treated as a word)
-    print("[speech] ready", file=sys.stderr, flush=True)
-    
+    sampler = runtime_stats.start(stats, options)
+
+    print("[speech] loading models...", file=sys.stderr, flush=True)
+    apply_cpu_settings()
+
     try:
         # Initialize AudioToTextRecorder with configuration
         # Use context manager pattern for proper resource cleanup
         with AudioToTextRecorder(
             model=CONFIG["model"],
             language=CONFIG["language"],
+            compute_type=CONFIG["compute_type"],
             use_microphone=CONFIG["use_microphone"],
             
             # Real-time transcription settings
@@ -197,6 +532,8 @@ def main():
             realtime_batch_size=CONFIG["realtime_batch_size"],
             on_realtime_transcription_update=on_realtime_transcription_update,
             on_realtime_transcription_stabilized=on_realtime_transcription_stabilized,
+            on_recording_start=on_recording_start,
+            on_recording_stop=on_recording_stop,
             
             # VAD settings
             silero_sensitivity=CONFIG["silero_sensitivity"],
@@ -209,32 +546,63 @@ def main():
             min_gap_between_recordings=CONFIG["min_gap_between_recordings"],
             min_length_of_recording=CONFIG["min_length_of_recording"],
             pre_recording_buffer_duration=CONFIG["pre_recording_buffer_duration"],
+            on_recorded_chunk=calibrator.chunk if calibrator.seconds > 0 else None,
+
+            **decoding_options(vocabulary),
         ) as recorder_instance:
             recorder = recorder_instance
+            endpointer.recorder = recorder
+            audio_queue = getattr(recorder, "audio_queue", None)
+            if hasattr(audio_queue, "qsize"):
+                # Audio chunks waiting for the recorder's worker; growth means transcription can't keep up
+                stats.gauge("audio_queue", audio_queue.qsize)
+            stats.gauge("paused", paused.is_set)
+
+            # Keep the microphone off while warming up and while paused
+            set_listening(False)
+            if not options.no_warmup:
+                warm_up()
+            if not paused.is_set():
+                set_listening(True)
+                calibrator.start()
+
+            # Notify TypeScript that we're ready (send to stderr so it's not treated as a word);
+            # only now are the models loaded and warm
             print("[speech] model loaded, listening...", file=sys.stderr, flush=True)
+            print("[speech] ready", file=sys.stderr, flush=True)
             
             # Main loop: use recorder.text() for reliable transcription
             # This blocks until speech is detected and transcribed, then outputs immediately
             # We also have callbacks as backup, but text() is more reliable
-            import time
-            import threading
             
             # Flag to track if we're processing
             processing = True
+            final_stats = stats.histogram("transcription.final")
             
             def transcription_loop():
                 """Main transcription loop - processes speech continuously"""
                 nonlocal processing
                 while processing:
+                    if paused.is_set():
+                        time.sleep(0.05)
+                        continue
                     try:
                         # Get transcribed text (blocks until speech is detected and transcribed)
                         # With aggressive VAD settings, this should fire for each word/phrase
                         text = recorder.text()
-                        if text and text.strip():
-                            # Use extract_valid_words to handle concatenated status messages
-                            valid_words = extract_valid_words(text)
-                            for word in valid_words:
-                                print(word, flush=True)  # Output each valid word immediately
+                        if paused.is_set():
+                            continue
+                        # Always close the utterance, even when the final text is empty,
+                        # emitting only words the partials missed or got wrong
+                        start = time.perf_counter()
+                        words = transcription_words(text) if text else []
+                        utterance_id = differ.final(words)
+                        if speculator is not None:
+                            speculator.final(utterance_id, words)
+                        elif resolver is not None:
+                            resolver.end_utterance(utterance_id)
+                        final_stats.record(time.perf_counter() - start)
+                        stats.incr("transcription.final")
                     except Exception as e:
                         if processing:  # Only log if we're still supposed to be running
                             # Ignore EOF errors when shutting down
@@ -245,11 +613,21 @@ def main():
             # Start transcription in a thread so we can handle shutdown
             transcription_thread = threading.Thread(target=transcription_loop, daemon=True)
             transcription_thread.start()
+
+            # Control messages from the host
+            control_thread = threading.Thread(target=control_loop, daemon=True)
+            control_thread.start()
+
+            if options.input:
+                threading.Thread(target=input_loop, daemon=True).start()
             
-            # Keep main thread alive
+            # Keep main thread alive until the host asks us to exit
             try:
-                while True:
+                while not shutdown_requested.is_set():
                     time.sleep(0.1)
+                processing = False
+                report_stats()
+                print("[speech] shutting down...", file=sys.stderr, flush=True)
             except KeyboardInterrupt:
                 processing = False
                 raise
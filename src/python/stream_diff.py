@@ -0,0 +1,122 @@
+"""
+Incremental word emission for the Phonix speech process.
+The realtime transcription callbacks re-deliver the whole growing partial
+text many times per utterance. UtteranceDiffer tracks each utterance and
+emits every word position once: partial words when they are stable, and
+only the words the final transcription adds or changes.
+"""
+import threading
+from collections import deque
+
+PARTIAL = "p"
+FINAL = "f"
+
+
+class UtteranceDiffer:
+    """
+    Turns repeated partial / final transcriptions into one emission per word.
+
+    A partial word is stable once `agreement` consecutive partials agree on
+    every word up to and including it (agreement=1 emits on first sight).
+    The final transcription emits only the positions that differ from what
+    was already emitted, then closes the utterance. Recordings that stopped
+    (seal) are matched to finals in order, so a final that arrives after the
+    next recording has started still lands on the right utterance.
+
+    emit(word, utterance_id, flag) is called for each emitted word, with
+    flag PARTIAL or FINAL. new_id() makes utterance IDs.
+    """
+
+    def __init__(self, emit, new_id, agreement: int = 2):
+        self._emit = emit
+        self._new_id = new_id
+        self.agreement = max(1, agreement)
+        self._lock = threading.Lock()
+        self.utterance_id = None
+        self._emitted = []      # words emitted so far, by position
+        self._history = []      # most recent partial hypotheses (word lists)
+        self._sealed = deque()  # (utterance_id, emitted) of stopped recordings awaiting their final
+        self.partials_seen = 0
+        self.words_emitted = 0
+
+    def start(self, utterance_id: str = None) -> str:
+        """Open a new utterance (e.g. when VAD starts a recording). Returns its ID."""
+        with self._lock:
+            self._open(utterance_id)
+            return self.utterance_id
+
+    def reset(self):
+        """Forget every open and sealed utterance (e.g. after a pause or profile swap)."""
+        with self._lock:
+            self.utterance_id = None
+            self._emitted = []
+            self._history = []
+            self._sealed.clear()
+
+    def _open(self, utterance_id: str = None):
+        self.utterance_id = utterance_id or self._new_id()
+        self._emitted = []
+        self._history = []
+
+    def partial(self, words: list):
+        """Feed a realtime (or stabilized) hypothesis for the current utterance."""
+        with self._lock:
+            if self.utterance_id is None:
+                self._open()
+            self.partials_seen += 1
+            self._history.append(words)
+            if len(self._history) > self.agreement:
+                self._history.pop(0)
+            if len(self._history) < self.agreement:
+                return
+            stable = self._common_prefix(self._history)
+            # Words already emitted are never repeated; only extend past them
+            if stable[:len(self._emitted)] != self._emitted:
+                return
+            pending = stable[len(self._emitted):]
+            self._emitted.extend(pending)
+            utterance_id = self.utterance_id
+        for word in pending:
+            self._send(word, utterance_id, PARTIAL)
+
+    def seal(self):
+        """The current recording stopped: its final transcription comes next."""
+        with self._lock:
+            if self.utterance_id is None:
+                return
+            self._sealed.append((self.utterance_id, self._emitted))
+            self.utterance_id = None
+            self._emitted = []
+            self._history = []
+
+    def final(self, words: list) -> str:
+        """Feed the final transcription: emit only changed or new positions, then close the utterance. Returns its ID."""
+        with self._lock:
+            if self._sealed:
+                utterance_id, emitted = self._sealed.popleft()
+            else:
+                utterance_id = self.utterance_id or self._new_id()
+                emitted = self._emitted
+                self.utterance_id = None
+                self._emitted = []
+                self._history = []
+            # Position by position: a corrected word doesn't re-emit the matching words after it
+            pending = [word for position, word in enumerate(words)
+                       if position >= len(emitted) or word != emitted[position]]
+        for word in pending:
+            self._send(word, utterance_id, FINAL)
+        return utterance_id
+
+    def _send(self, word: str, utterance_id: str, flag: str):
+        with self._lock:
+            self.words_emitted += 1
+        self._emit(word, utterance_id, flag)
+
+    @staticmethod
+    def _common_prefix(hypotheses: list) -> list:
+        prefix = []
+        for column in zip(*hypotheses):
+            if any(word != column[0] for word in column[1:]):
+                break
+            prefix.append(column[0])
+        return prefix
@@ -0,0 +1,60 @@
+import io
+import json
+import struct
+import time
+import wave
+
+import pytest
+
+from audio_source import AudioFeeder, SAMPLE_RATE, feed_inputs, read_wav
+
+
+def write_wav(path, samples, channels=1, rate=SAMPLE_RATE):
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(struct.pack(f"<{len(samples)}h", *samples))
+    return str(path)
+
+
+def test_read_wav_round_trip(tmp_path):
+    samples = [0, 1000, -1000, 32767, -32768]
+    pcm, rate = read_wav(write_wav(tmp_path / "mono.wav", samples, rate=8000))
+    assert rate == 8000
+    assert pcm == struct.pack("<5h", *samples)
+
+
+def test_read_wav_mixes_channels_down_to_mono(tmp_path):
+    pcm, rate = read_wav(write_wav(tmp_path / "stereo.wav", [100, 300, -200, -400], channels=2))
+    assert rate == SAMPLE_RATE
+    assert struct.unpack("<2h", pcm) == (200, -300)
+
+
+def test_feed_inputs_prints_one_marker_per_input(tmp_path):
+    clip = write_wav(tmp_path / "jump.wav", [0] * 1600)
+    raw = tmp_path / "pipe.pcm"
+    raw.write_bytes(bytes(3200))
+    fed, markers = [], io.StringIO()
+    seconds = feed_inputs(lambda chunk, rate: fed.append(len(chunk)), [clip, str(raw)],
+                          speed=0, gap=0.05, stream=markers)
+    lines = markers.getvalue().splitlines()
+    assert all(line.startswith("[speech] input ") for line in lines)
+    first, second = (json.loads(line[len("[speech] input "):]) for line in lines)
+    assert (first["file"], first["duration"]) == (clip, 0.1)
+    # A pipe's length isn't known up front
+    assert (second["file"], second["duration"]) == (str(raw), None)
+    assert first["t"] <= second["t"]
+    assert sum(fed) == 3200 + 3200 + 2 * 1600
+    assert seconds == pytest.approx(0.3)
+
+
+def test_streams_are_fed_as_they_arrive():
+    fed = []
+    feeder = AudioFeeder(lambda chunk, rate: fed.append(chunk), speed=1.0)
+    start = time.perf_counter()
+    # One second of audio: paced, this would take a second
+    feeder.play_stream(io.BytesIO(bytes(SAMPLE_RATE * 2)))
+    assert time.perf_counter() - start < 0.5
+    assert feeder.fed_seconds == pytest.approx(1.0)
+    assert sum(map(len, fed)) == SAMPLE_RATE * 2
@@ -0,0 +1,51 @@
+import json
+
+import pytest
+
+from backends import OutputBackend, RecordingBackend, VgamepadBackend, create_backend
+from controller_state import NEUTRAL_REPORT
+
+PRESS_A = (0x1000, 0.5, -1.0, 0.0, 0.0, 0, 255)
+
+
+def test_create_backend_by_name(tmp_path):
+    path = str(tmp_path / "out.jsonl")
+    recording = create_backend("recording", record_path=path)
+    assert isinstance(recording, RecordingBackend) and recording.path == path
+    # Not opened: vgamepad is only imported by open()
+    assert isinstance(create_backend("vgamepad"), VgamepadBackend)
+    with pytest.raises(ValueError):
+        create_backend("keyboard")
+
+
+def test_backends_must_implement_send():
+    with pytest.raises(TypeError):
+        OutputBackend()
+
+    class Silent(OutputBackend):
+        pass
+
+    with pytest.raises(TypeError):
+        Silent()
+
+
+def test_recording_keeps_and_writes_timestamped_reports(tmp_path):
+    path = tmp_path / "out.jsonl"
+    now = [1.0]
+    backend = RecordingBackend(str(path), clock=lambda: now[0])
+    backend.open()
+    backend.send(PRESS_A)
+    now[0] = 1.25
+    backend.send(NEUTRAL_REPORT)
+    backend.close()
+    assert backend.reports == [(1.0, PRESS_A), (1.25, NEUTRAL_REPORT)]
+    lines = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert lines == [{"t": 1.0, "report": list(PRESS_A)}, {"t": 1.25, "report": list(NEUTRAL_REPORT)}]
+
+
+def test_recording_without_a_path_stays_in_memory():
+    backend = RecordingBackend()
+    backend.open()
+    backend.send(PRESS_A)
+    backend.close()
+    assert [report for _, report in backend.reports] == [PRESS_A]
@@ -0,0 +1,93 @@
+import time
+
+from controller_state import ControllerState, NEUTRAL_REPORT
+from keymap_compiler import OP_PRESS, OP_RELEASE, OP_LEFT_STICK, load_program
+from scheduler import ActionScheduler
+
+A = 0x1000
+
+
+def make_state(max_rate_hz=100.0):
+    sent = []
+    return ControllerState(sent.append, max_rate_hz=max_rate_hz), sent
+
+
+def test_changes_in_one_tick_are_one_report():
+    state, sent = make_state()
+    state.apply(OP_PRESS, A, None)
+    state.apply(OP_LEFT_STICK, 0.5, -1.0)
+    assert state.flush(0.0) is None
+    assert sent == [(A, 0.5, -1.0, 0.0, 0.0, 0, 0)]
+
+
+def test_unchanged_state_is_not_resent():
+    state, sent = make_state()
+    assert state.flush(0.0) is None
+    assert sent == []
+
+
+def test_press_and_release_in_one_tick_is_latched():
+    state, sent = make_state()
+    state.apply(OP_PRESS, A, None)
+    state.apply(OP_RELEASE, A, None)
+    retry = state.flush(0.0)
+    # The press is reported, and the release is due one interval later
+    assert sent == [(A,) + NEUTRAL_REPORT[1:]]
+    assert retry == 0.01
+    assert state.flush(retry) is None
+    assert sent[-1] == NEUTRAL_REPORT
+
+
+def test_rate_cap_defers_report():
+    state, sent = make_state()
+    state.apply(OP_PRESS, A, None)
+    state.flush(0.0)
+    state.apply(OP_RELEASE, A, None)
+    assert state.flush(0.004) == 0.01
+    assert len(sent) == 1
+    assert state.reports_deferred == 1
+    assert state.flush(0.01) is None
+    assert sent[-1] == NEUTRAL_REPORT
+
+
+def test_repeated_tap_inside_rate_cap_window_is_released():
+    state, sent = make_state()
+    for now in (0.0, 0.001):
+        state.apply(OP_PRESS, A, None)
+        state.apply(OP_RELEASE, A, None)
+        retry = state.flush(now)
+    # The second tap merges with the first press, but its release must still go out
+    assert retry == 0.01
+    assert state.flush(retry) is None
+    assert sent[-1] == NEUTRAL_REPORT
+
+
+def test_tap_repeated_inside_one_tick_is_released():
+    state, sent = make_state()
+    for _ in range(2):
+        state.apply(OP_PRESS, A, None)
+        state.apply(OP_RELEASE, A, None)
+    retry = state.flush(0.0)
+    assert sent == [(A,) + NEUTRAL_REPORT[1:]]
+    # Tapped again before the release went out: still one pulse, then released
+    state.apply(OP_PRESS, A, None)
+    state.apply(OP_RELEASE, A, None)
+    assert state.flush(retry) is None
+    assert sent[-1] == NEUTRAL_REPORT
+    assert state.reports_sent == 2
+
+
+def test_repeated_tap_through_scheduler_releases_button():
+    state, sent = make_state()
+    scheduler = ActionScheduler(state)
+    scheduler.start()
+    try:
+        program = load_program(["pressXUSB_GAMEPAD_A", "releaseXUSB_GAMEPAD_A"])
+        scheduler.submit(program)
+        time.sleep(0.001)
+        scheduler.submit(program)
+        time.sleep(0.1)
+    finally:
+        scheduler.stop()
+    assert sent[0][0] == A
+    assert sent[-1] == NEUTRAL_REPORT
@@ -0,0 +1,49 @@
+import json
+import os
+import types
+
+import cpu_tuning
+from cpu_tuning import load_config_file, set_cpu_affinity, set_inference_threads
+
+
+def test_config_file_is_read_or_empty(tmp_path):
+    path = tmp_path / "speech_config.json"
+    assert load_config_file(str(path)) == {}
+    assert load_config_file("") == {}
+    path.write_text(json.dumps({"compute_type": "int8", "cpu_threads": 2}), encoding="utf-8")
+    assert load_config_file(str(path)) == {"compute_type": "int8", "cpu_threads": 2}
+
+
+def test_inference_threads_set_omp_num_threads(monkeypatch):
+    monkeypatch.delenv("OMP_NUM_THREADS", raising=False)
+    set_inference_threads(0)
+    assert "OMP_NUM_THREADS" not in os.environ
+    set_inference_threads(3)
+    assert os.environ["OMP_NUM_THREADS"] == "3"
+
+
+def test_affinity_uses_sched_setaffinity_where_available(monkeypatch):
+    calls = []
+    monkeypatch.setattr(cpu_tuning.os, "sched_setaffinity", lambda pid, cores: calls.append((pid, cores)),
+                        raising=False)
+    assert set_cpu_affinity([0, 2])
+    assert calls == [(0, {0, 2})]
+
+
+def test_affinity_uses_the_process_mask_on_windows(monkeypatch):
+    masks = []
+    kernel32 = types.SimpleNamespace(
+        GetCurrentProcess=lambda: "process",
+        SetProcessAffinityMask=lambda process, mask: masks.append((process, mask)) or 1,
+    )
+    monkeypatch.delattr(cpu_tuning.os, "sched_setaffinity", raising=False)
+    monkeypatch.setattr(cpu_tuning.sys, "platform", "win32")
+    monkeypatch.setattr("ctypes.windll", types.SimpleNamespace(kernel32=kernel32), raising=False)
+    assert set_cpu_affinity([0, 2])
+    assert masks == [("process", 0b101)]
+
+
+def test_affinity_is_unsupported_elsewhere(monkeypatch):
+    monkeypatch.delattr(cpu_tuning.os, "sched_setaffinity", raising=False)
+    monkeypatch.setattr(cpu_tuning.sys, "platform", "darwin")
+    assert not set_cpu_affinity([0])
@@ -0,0 +1,67 @@
+import struct
+from types import SimpleNamespace
+
+import pytest
+
+from endpointing import Endpointer, NoiseCalibrator, vad_settings, SAMPLE_RATE
+from phrase_resolver import PhraseTrie, profile_phrases
+
+PROFILE = {"keywords": [
+    {"keyword": "throw", "keymap": ["pressXUSB_GAMEPAD_A"]},
+    {"keyword": "soft upper left", "keymap": ["pressXUSB_GAMEPAD_B"]},
+]}
+
+
+def make_endpointer():
+    recorder = SimpleNamespace(post_speech_silence_duration=None, min_length_of_recording=None)
+    endpointer = Endpointer(recorder, PhraseTrie(profile_phrases(PROFILE, [])), silence=0.3, min_length=0.2,
+                            complete_silence=0.05, prefix_silence=0.6)
+    endpointer.start()
+    return endpointer, recorder
+
+
+def test_complete_phrase_closes_the_recording_early():
+    endpointer, recorder = make_endpointer()
+    endpointer.update(["throw"])
+    assert (recorder.post_speech_silence_duration, recorder.min_length_of_recording) == (0.05, 0.0)
+    endpointer.stop()
+    assert endpointer.closed_early == 1
+
+
+def test_prefix_of_a_longer_phrase_stretches_the_silence_window():
+    endpointer, recorder = make_endpointer()
+    endpointer.update(["soft"])
+    endpointer.update(["soft", "upper"])
+    assert recorder.post_speech_silence_duration == 0.6
+    assert endpointer.stretched == 1
+    endpointer.update(["soft", "upper", "left"])
+    assert recorder.post_speech_silence_duration == 0.05
+
+
+def test_other_words_and_a_new_recording_use_the_configured_values():
+    endpointer, recorder = make_endpointer()
+    endpointer.update(["banana"])
+    assert recorder.post_speech_silence_duration == 0.3
+    endpointer.update(["throw"])
+    endpointer.start()
+    assert (recorder.post_speech_silence_duration, recorder.min_length_of_recording) == (0.3, 0.2)
+
+
+def test_vad_settings_get_stricter_with_noise():
+    assert vad_settings(-70.0) == (0.7, 0)
+    assert vad_settings(-45.0) == (0.5, 2)
+    assert vad_settings(-10.0) == (0.4, 3)
+
+
+def test_noise_calibrator_applies_once_from_the_noise_floor():
+    pytest.importorskip("numpy")
+    applied = []
+    calibrator = NoiseCalibrator(lambda *settings: applied.append(settings), seconds=0.1)
+    calibrator.start()
+    quiet = struct.pack("<h", 33) * (SAMPLE_RATE // 100)  # about -60 dBFS, 10 ms
+    for _ in range(10):
+        calibrator.chunk(quiet)
+    calibrator.chunk(quiet)
+    assert len(applied) == 1
+    assert applied[0][1:] == vad_settings(applied[0][0])
+    assert not calibrator.active
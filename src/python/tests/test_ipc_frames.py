@@ -0,0 +1,76 @@
+import io
+import math
+import struct
+
+import pytest
+
+import ipc_frames
+from ipc_frames import (
+    FrameError, MAX_BATCH, OP_ACTIONS, OP_COMMAND, OP_REGISTER, read_frame,
+    encode_actions, decode_actions, encode_register, decode_register, encode_command, decode_command,
+    encode_acks, decode_acks, encode_done, decode_done, encode_commanded, decode_commanded,
+)
+
+
+def payload_of(frame: bytes, opcode: int) -> bytes:
+    decoded = read_frame(io.BytesIO(frame))
+    assert decoded[0] == opcode
+    return decoded[1]
+
+
+def test_actions_round_trip():
+    actions = [(1, 7, 0, 1, 1700000000123.5, "p42-3"), (0xFFFFFFFF, 65535, 3, 2, None, None)]
+    assert decode_actions(payload_of(encode_actions(actions), OP_ACTIONS)) == actions
+
+
+def test_register_and_command_round_trip():
+    keymaps = [(1, '["pressXUSB_GAMEPAD_A"]'), (2, '["pressXUSB_GAMEPAD_B", 0.1, "releaseXUSB_GAMEPAD_B"]')]
+    assert decode_register(payload_of(encode_register(keymaps), OP_REGISTER)) == keymaps
+    assert decode_command(payload_of(encode_command("release_all"), OP_COMMAND)) == ("release_all", None)
+    assert decode_command(payload_of(encode_command("release_all", 2), OP_COMMAND)) == ("release_all", 2)
+    assert decode_command(payload_of(encode_command("sample"), OP_COMMAND)) == ("sample", None)
+    with pytest.raises(FrameError):
+        encode_command("stop")
+    with pytest.raises(FrameError):
+        decode_command(b"\x09")
+
+
+def test_bridge_replies_round_trip():
+    acks = decode_acks(read_frame(io.BytesIO(encode_acks([(1, 0, 2.5), (2, 3, None)])))[1])
+    assert acks == [(1, 0, 2.5), (2, 3, None)]
+    (done,) = decode_done(read_frame(io.BytesIO(encode_done([(9, 1, None, 12.5)])))[1])
+    assert done[:3] == (9, 1, None) and math.isclose(done[3], 12.5)
+    assert decode_commanded(read_frame(io.BytesIO(encode_commanded("release_all", 300)))[1]) == ("release_all", 300)
+
+
+def test_counts_are_limited_to_one_byte():
+    actions = [(seq, 1, 0, 1, None, None) for seq in range(MAX_BATCH)]
+    assert len(decode_actions(payload_of(encode_actions(actions), OP_ACTIONS))) == MAX_BATCH
+    with pytest.raises(FrameError):
+        encode_actions(actions + [(MAX_BATCH, 1, 0, 1, None, None)])
+    with pytest.raises(FrameError):
+        encode_done([(seq, 0, None, 0.0) for seq in range(MAX_BATCH + 1)])
+    with pytest.raises(FrameError):
+        encode_actions([(1, 1, 0, 1, None, "t" * 256)])
+
+
+def test_read_frame_handles_partial_reads_and_rejects_bad_lengths():
+    class Trickle(io.RawIOBase):
+        """A pipe that returns at most 3 bytes per read."""
+
+        def __init__(self, data):
+            self._data = io.BytesIO(data)
+
+        def read(self, size=-1):
+            return self._data.read(min(size, 3))
+
+    stream = Trickle(encode_command("release_all") + encode_register([(5, '["a"]')]))
+    assert read_frame(stream) == (OP_COMMAND, bytes([ipc_frames.COMMAND_RELEASE_ALL]))
+    assert decode_register(read_frame(stream)[1]) == [(5, '["a"]')]
+    assert read_frame(stream) is None
+    # A truncated frame is the end of the stream
+    assert read_frame(io.BytesIO(encode_register([(5, '["a"]')])[:-1])) is None
+    with pytest.raises(FrameError):
+        read_frame(io.BytesIO(struct.pack("<I", 0)))
+    with pytest.raises(FrameError):
+        read_frame(io.BytesIO(struct.pack("<I", ipc_frames.MAX_FRAME_BYTES + 1)))
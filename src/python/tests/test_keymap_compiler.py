@@ -0,0 +1,58 @@
+import pytest
+
+from keymap_compiler import (
+    OP_WAIT, OP_PRESS, OP_RELEASE, OP_LEFT_STICK, OP_RIGHT_TRIGGER,
+    KeymapError, compile_keymap, load_program, program_resources, neutral_step,
+)
+
+A = 0x1000
+
+
+def test_compiles_holds_into_steps_and_waits():
+    program = compile_keymap(["pressXUSB_GAMEPAD_A", 0.1, "releaseXUSB_GAMEPAD_A",
+                              "left_joystick_float", 0.5, -1, 0.2, 0.3, "right_trigger_float", 1])
+    assert program == (
+        (OP_PRESS, A, None),
+        (OP_WAIT, 0.1, None),
+        (OP_RELEASE, A, None),
+        (OP_LEFT_STICK, 0.5, -1.0),
+        # Back-to-back waits are merged
+        (OP_WAIT, pytest.approx(0.5), None),
+        (OP_RIGHT_TRIGGER, 255, None),
+    )
+
+
+@pytest.mark.parametrize("keymap", [
+    [],
+    "pressXUSB_GAMEPAD_A",
+    ["pressXUSB_GAMEPAD_Z"],
+    ["pressXUSB_GAMEPAD_A", -0.1],
+    ["pressXUSB_GAMEPAD_A", float("nan")],
+    ["left_joystick_float", 0.5],
+    ["left_joystick_float", 2, 0],
+    ["left_trigger_float", 1.5],
+    ["right_trigger", 256],
+    [0.1, 0.2],
+    ["pressXUSB_GAMEPAD_A", ["nested"]],
+])
+def test_malformed_keymap_is_rejected(keymap):
+    with pytest.raises(KeymapError):
+        load_program(keymap)
+
+
+def test_action_string_must_be_json():
+    with pytest.raises(KeymapError):
+        load_program("[pressXUSB_GAMEPAD_A")
+
+
+def test_action_string_and_list_compile_to_the_same_cached_program():
+    program = load_program('["pressXUSB_GAMEPAD_A", 0.1, "releaseXUSB_GAMEPAD_A"]')
+    assert load_program(["pressXUSB_GAMEPAD_A", 0.1, "releaseXUSB_GAMEPAD_A"]) is program
+
+
+def test_resources_and_their_neutral_steps():
+    program = load_program(["pressXUSB_GAMEPAD_A", "left_joystick_float", 1, 0, 0.1, "right_trigger", 9])
+    resources = program_resources(program)
+    assert resources == {A, "left_stick", "right_trigger"}
+    assert neutral_step(A) == (OP_RELEASE, A, None)
+    assert neutral_step("left_stick") == (OP_LEFT_STICK, 0.0, 0.0)
@@ -0,0 +1,37 @@
+from keyword_index import KeywordIndex, build_index, levenshtein, metaphone
+
+WORDS = ("jump", "hard", "right", "a", "kick", "pick")
+
+
+def test_misheard_words_snap_to_the_vocabulary():
+    index = KeywordIndex(WORDS)
+    assert index.lookup("jump") == ("jump", 1.0)
+    assert index.lookup("dump")[0] == "jump"
+    assert index.lookup("heart")[0] == "hard"
+    assert index.lookup("write")[0] == "right"
+    assert index.lookup("kik")[0] == "kick"
+
+
+def test_spoken_letter_names():
+    assert KeywordIndex(WORDS).lookup("ay") == ("a", 1.0)
+
+
+def test_weak_and_ambiguous_matches_are_rejected():
+    index = KeywordIndex(WORDS)
+    assert index.lookup("banana") == (None, 0.0)
+    # "lick" is as close to "kick" as to "pick"
+    word, confidence = index.lookup("lick")
+    assert word is None and confidence >= index.threshold
+
+
+def test_index_rebuilt_from_tables_matches_the_same_way():
+    index = build_index(WORDS)
+    rebuilt = KeywordIndex.from_tables(index.tables())
+    for heard in ("dump", "heart", "lick", "banana"):
+        assert rebuilt.lookup(heard) == index.lookup(heard)
+
+
+def test_distance_and_phonetic_key():
+    assert levenshtein("kitten", "sitting") == 3
+    assert metaphone("ship") == "XP"
+    assert metaphone("thumb") == "0M"
@@ -0,0 +1,34 @@
+import pytest
+
+from pads import MAX_PADS, parse_pad, pad_record_path
+
+
+def test_pad_defaults_to_the_first():
+    assert parse_pad(None, 2) == 0
+    assert parse_pad(1, 2) == 1
+
+
+@pytest.mark.parametrize("value", [-1, 2, 5])
+def test_out_of_range_pad_is_rejected(value):
+    with pytest.raises(ValueError):
+        parse_pad(value, 2)
+
+
+@pytest.mark.parametrize("value", ["1", 1.0, True, [0]])
+def test_non_integer_pad_is_rejected(value):
+    with pytest.raises(ValueError):
+        parse_pad(value, 2)
+
+
+def test_record_path_per_pad():
+    assert pad_record_path("out.jsonl", 0, 1) == "out.jsonl"
+    assert pad_record_path("out.jsonl", 1, 3) == "out.pad1.jsonl"
+    assert pad_record_path("runs/out", 2, 3) == "runs/out.pad2"
+    assert pad_record_path(None, 1, 3) is None
+
+
+def test_at_most_four_pads():
+    assert MAX_PADS == 4
+    assert parse_pad(MAX_PADS - 1, MAX_PADS) == MAX_PADS - 1
+    with pytest.raises(ValueError):
+        parse_pad(MAX_PADS, MAX_PADS)
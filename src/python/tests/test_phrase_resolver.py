@@ -0,0 +1,92 @@
+from phrase_resolver import (
+    PhraseResolver, PhraseTrie, profile_phrases,
+    KIND_ACTION, KIND_COMMAND, PHRASE_NONE, PHRASE_PREFIX, PHRASE_COMPLETE,
+)
+
+PROFILE = {"keywords": [
+    {"keyword": "Jump", "keymap": ["pressXUSB_GAMEPAD_A"]},
+    {"keyword": "jump forward", "keymap": ["pressXUSB_GAMEPAD_A"]},
+    {"keyword": "sliding kick", "keymap": ["pressXUSB_GAMEPAD_B"]},
+    {"keyword": "soft upper left", "keymap": ["pressXUSB_GAMEPAD_X"]},
+    {"keyword": "soft upper right", "keymap": ["pressXUSB_GAMEPAD_Y"]},
+]}
+
+
+def make_resolver(early=True, profile=PROFILE, synonyms=()):
+    fired = []
+    resolver = PhraseResolver(profile_phrases(profile, list(synonyms)),
+                              lambda kind, target_id, utterance_id: fired.append((kind, target_id)), early=early)
+    return resolver, fired
+
+
+def feed(resolver, text):
+    for word in text.split():
+        resolver.feed(word)
+
+
+def test_unique_prefix_fires_early_and_consumes_the_rest():
+    resolver, fired = make_resolver()
+    resolver.feed("sliding")
+    assert fired == [(KIND_ACTION, "sliding kick")]
+    resolver.feed("kick")
+    assert fired == [(KIND_ACTION, "sliding kick")]
+    assert resolver.fired_early == 1
+
+
+def test_early_firing_can_be_turned_off():
+    resolver, fired = make_resolver(early=False)
+    resolver.feed("sliding")
+    assert fired == []
+    resolver.feed("kick")
+    assert fired == [(KIND_ACTION, "sliding kick")]
+
+
+def test_ambiguous_prefix_waits_for_the_next_word():
+    resolver, fired = make_resolver()
+    resolver.feed("jump")
+    assert fired == []
+    resolver.feed("forward")
+    assert fired == [(KIND_ACTION, "jump forward")]
+
+
+def test_complete_phrase_waiting_on_a_longer_one_fires_on_another_word_or_utterance_end():
+    resolver, fired = make_resolver()
+    feed(resolver, "jump sliding")
+    assert fired == [(KIND_ACTION, "jump"), (KIND_ACTION, "sliding kick")]
+    resolver.feed("jump")
+    resolver.end_utterance()
+    assert fired[-1] == (KIND_ACTION, "jump")
+
+
+def test_shared_prefix_only_fires_on_the_distinguishing_word():
+    resolver, fired = make_resolver()
+    feed(resolver, "soft upper")
+    assert fired == []
+    resolver.feed("right")
+    assert fired == [(KIND_ACTION, "soft upper right")]
+
+
+def test_unknown_words_restart_matching():
+    resolver, fired = make_resolver()
+    feed(resolver, "soft banana sliding")
+    assert fired == [(KIND_ACTION, "sliding kick")]
+
+
+def test_reserved_phrases_and_synonyms():
+    synonyms = [{"keyword_match": "jump", "synonym_words": ["dump"]}]
+    resolver, fired = make_resolver(synonyms=synonyms)
+    feed(resolver, "release all dump")
+    resolver.end_utterance()
+    assert fired == [(KIND_COMMAND, "release_all"), (KIND_ACTION, "jump")]
+
+
+def test_profile_keyword_takes_precedence_over_a_reserved_phrase():
+    profile = {"keywords": [{"keyword": "release all", "keymap": ["pressXUSB_GAMEPAD_B"]}]}
+    assert profile_phrases(profile, [])["release all"] == (KIND_ACTION, "release all")
+
+
+def test_trie_state():
+    trie = PhraseTrie(profile_phrases(PROFILE, []))
+    assert trie.state(["soft"]) == PHRASE_PREFIX
+    assert trie.state(["soft", "upper", "left"]) == PHRASE_COMPLETE
+    assert trie.state(["banana"]) == PHRASE_NONE
@@ -0,0 +1,78 @@
+import json
+import os
+
+import profile_cache
+from profile_cache import load_compiled, content_key
+
+PROFILE = {"keywords": [
+    {"keyword": "Jump", "keymap": ["pressXUSB_GAMEPAD_A", 0.1, "releaseXUSB_GAMEPAD_A"]},
+    {"keyword": "broken", "keymap": ["pressXUSB_GAMEPAD_Z"]},
+]}
+SYNONYMS = {"synonyms": [{"keyword_match": "jump", "synonym_words": ["dump"]}]}
+
+
+def write_json(path, data):
+    path.write_text(json.dumps(data), encoding="utf-8")
+    return str(path)
+
+
+def artifacts(cache_dir):
+    return sorted(name for name in os.listdir(cache_dir) if name.endswith(".phxprof"))
+
+
+def test_compiled_once_then_loaded_from_the_cache(tmp_path):
+    profile = write_json(tmp_path / "profile.json", PROFILE)
+    synonyms = write_json(tmp_path / "synonyms.json", SYNONYMS)
+    cache = str(tmp_path / "cache")
+    first = load_compiled(profile, synonyms, cache)
+    second = load_compiled(profile, synonyms, cache)
+    assert not first.from_cache and second.from_cache
+    assert second.key == first.key
+    assert second.phrases == first.phrases
+    assert second.phrases["dump"] == ("action", "jump")
+    assert second.programs_by_keymap() == first.programs_by_keymap()
+    assert "broken" in second.rejected
+    assert "release all" in second.vocabulary_phrases
+
+
+def test_changed_contents_change_the_key_and_replace_the_artifact(tmp_path):
+    profile_path = tmp_path / "profile.json"
+    profile = write_json(profile_path, PROFILE)
+    cache = str(tmp_path / "cache")
+    old = load_compiled(profile, None, cache)
+    old_artifacts = artifacts(cache)
+
+    write_json(profile_path, {"keywords": PROFILE["keywords"] + [{"keyword": "kick", "keymap": ["pressXUSB_GAMEPAD_B"]}]})
+    new = load_compiled(profile, None, cache)
+    assert new.key != old.key
+    assert not new.from_cache
+    assert "kick" in new.phrases
+    # The stale artifact is pruned
+    assert len(artifacts(cache)) == 1 and artifacts(cache) != old_artifacts
+
+
+def test_synonyms_and_format_version_are_part_of_the_key(monkeypatch):
+    profile = json.dumps(PROFILE).encode()
+    key = content_key(profile, b"")
+    assert content_key(profile, json.dumps(SYNONYMS).encode()) != key
+    monkeypatch.setattr(profile_cache, "FORMAT_VERSION", profile_cache.FORMAT_VERSION + 1)
+    assert content_key(profile, b"") != key
+
+
+def test_unreadable_artifact_is_recompiled(tmp_path):
+    profile = write_json(tmp_path / "profile.json", PROFILE)
+    cache = str(tmp_path / "cache")
+    load_compiled(profile, None, cache)
+    (name,) = artifacts(cache)
+    with open(os.path.join(cache, name), "r+b") as f:
+        f.write(b"NOTAPROF")
+    reloaded = load_compiled(profile, None, cache)
+    assert not reloaded.from_cache
+    assert load_compiled(profile, None, cache).from_cache
+
+
+def test_force_recompiles(tmp_path):
+    profile = write_json(tmp_path / "profile.json", PROFILE)
+    cache = str(tmp_path / "cache")
+    load_compiled(profile, None, cache)
+    assert not load_compiled(profile, None, cache, force=True).from_cache
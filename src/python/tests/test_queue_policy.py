@@ -0,0 +1,29 @@
+import pytest
+
+from queue_policy import QueuePolicy, parse_priority, PRIORITY_LOW, PRIORITY_NORMAL, PRIORITY_HIGH
+
+
+def test_parse_priority():
+    assert parse_priority(None) == PRIORITY_NORMAL
+    assert parse_priority("HIGH") == PRIORITY_HIGH
+    assert parse_priority(-3) == PRIORITY_LOW
+    assert parse_priority(7) == PRIORITY_HIGH
+    with pytest.raises(ValueError):
+        parse_priority("urgent")
+    with pytest.raises(ValueError):
+        parse_priority(True)
+
+
+def test_stale_actions_are_dropped_and_late_ones_counted():
+    policy = QueuePolicy(max_age_ms=500, late_ms=100, clock=lambda: 10.0)
+    assert policy.admit({"ts": 9950.0})
+    assert policy.admit({"ts": 9800.0})
+    assert not policy.admit({"ts": 9000.0})
+    # No timestamp: never stale
+    assert policy.admit({})
+    assert policy.snapshot() == {"accepted": 0, "dropped_stale": 1, "dropped_priority": 0, "late": 1}
+
+
+def test_max_age_zero_never_drops():
+    policy = QueuePolicy(max_age_ms=0, clock=lambda: 10.0)
+    assert policy.admit({"ts": 0.0})
@@ -0,0 +1,51 @@
+import json
+
+from controller_state import NEUTRAL_REPORT
+from replay import load_trace, replay, synthesize_trace
+
+PROFILE = {"keywords": [
+    {"keyword": "jump", "keymap": ["pressXUSB_GAMEPAD_A", 0.005, "releaseXUSB_GAMEPAD_A"]},
+    {"keyword": "kick", "keymap": ["pressXUSB_GAMEPAD_B", 0.005, "releaseXUSB_GAMEPAD_B"]},
+]}
+
+
+def write_profile(tmp_path):
+    path = tmp_path / "profile.json"
+    path.write_text(json.dumps(PROFILE), encoding="utf-8")
+    return str(path)
+
+
+def test_load_trace_orders_lines_by_time(tmp_path):
+    path = tmp_path / "trace.jsonl"
+    path.write_text('{"t": 0.5, "command": "release_all"}\n\n{"t": 0.1, "action": "[]"}\n', encoding="utf-8")
+    assert load_trace(str(path)) == [(0.1, '{"t": 0.1, "action": "[]"}'),
+                                     (0.5, '{"t": 0.5, "command": "release_all"}')]
+
+
+def test_synthesized_trace_is_reproducible_and_spread_over_pads(tmp_path):
+    profile = write_profile(tmp_path)
+    trace = synthesize_trace(profile, 6, rate=10, seed=3, pads=2)
+    assert trace == synthesize_trace(profile, 6, rate=10, seed=3, pads=2)
+    assert [t for t, _ in trace] == [i * 0.1 for i in range(6)]
+    assert [json.loads(line)["pad"] for _, line in trace] == [0, 1, 0, 1, 0, 1]
+
+
+def test_replay_plays_every_command_into_the_recording(tmp_path):
+    trace = synthesize_trace(write_profile(tmp_path), 20, rate=0)
+    record = tmp_path / "out.jsonl"
+    summary = replay(trace, fast=True, record_path=str(record), report_rate_hz=0)
+    assert summary["commands"] == summary["accepted"] == 20
+    assert summary["reports"] >= 2
+    assert "pads" not in summary
+    reports = [json.loads(line)["report"] for line in record.read_text(encoding="utf-8").splitlines()]
+    assert len(reports) == summary["reports"]
+    assert reports[-1] == list(NEUTRAL_REPORT)
+
+
+def test_replay_reports_each_pad(tmp_path):
+    trace = synthesize_trace(write_profile(tmp_path), 8, rate=0, pads=2)
+    summary = replay(trace, fast=True, record_path=str(tmp_path / "out.jsonl"), pads=2)
+    assert summary["accepted"] == 8
+    assert [pad["pad"] for pad in summary["pads"]] == [0, 1]
+    assert sum(pad["reports"] for pad in summary["pads"]) == summary["reports"]
+    assert (tmp_path / "out.pad0.jsonl").exists() and (tmp_path / "out.pad1.jsonl").exists()
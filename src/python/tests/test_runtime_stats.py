@@ -0,0 +1,113 @@
+import io
+import json
+import threading
+import time
+
+import pytest
+
+import runtime_stats
+from runtime_stats import RuntimeStats, StatsReporter, StackSampler
+
+
+def test_counters_gauges_and_histograms_in_the_snapshot():
+    stats = RuntimeStats("bridge")
+    stats.incr("intake.actions")
+    stats.incr("intake.actions", 4)
+    depth = [3]
+    stats.gauge("pad0.active", lambda: depth[0])
+    stats.gauge("broken", lambda: 1 / 0)
+    stats.histogram("dispatch").record(0.002)
+    depth[0] = 5
+    snapshot = stats.snapshot()
+    assert snapshot["process"] == "bridge"
+    assert snapshot["counters"] == {"intake.actions": 5}
+    # Gauges are read when the snapshot is taken
+    assert snapshot["gauges"]["pad0.active"] == 5
+    assert snapshot["gauges"]["broken"].startswith("error:")
+    assert snapshot["histograms"]["dispatch"]["count"] == 1
+    assert snapshot["histograms"]["dispatch"]["max_ms"] == pytest.approx(2.0)
+
+
+def test_existing_histogram_is_registered_under_a_name():
+    stats = RuntimeStats("bridge")
+    existing = stats.histogram("other")
+    assert stats.histogram("pad0.dispatch", existing) is existing
+    assert stats.histogram("pad0.dispatch") is existing
+
+
+def test_timed_counts_calls_and_records_durations_even_on_errors():
+    stats = RuntimeStats("speech")
+
+    @stats.timed("callback.update")
+    def callback(fail=False):
+        if fail:
+            raise RuntimeError("boom")
+        return "ok"
+
+    assert callback() == "ok"
+    with pytest.raises(RuntimeError):
+        callback(fail=True)
+    snapshot = stats.snapshot()
+    assert snapshot["counters"]["callback.update"] == 2
+    assert snapshot["histograms"]["callback.update"]["count"] == 2
+
+
+class _Ticks:
+    """Stands in for the reporter's stop event: each wait() runs one step and advances the clock."""
+
+    def __init__(self, clock, steps):
+        self.clock = clock
+        self.steps = list(steps)
+
+    def wait(self, interval):
+        if not self.steps:
+            return True
+        self.steps.pop(0)()
+        self.clock[0] += interval
+        return False
+
+
+def test_reporter_logs_per_second_rates_over_each_interval(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(runtime_stats.time, "perf_counter", lambda: clock[0])
+    stats = RuntimeStats("speech")
+    stream = io.StringIO()
+    reporter = StatsReporter(stats, 2.0, stream=stream)
+    reporter._stop = _Ticks(clock, [lambda: stats.incr("words.emitted", 10),
+                                    lambda: stats.incr("words.emitted", 4)])
+    reporter._run()
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == 2 and all(line.startswith("[runtime] ") for line in lines)
+    first, second = (json.loads(line[len("[runtime] "):]) for line in lines)
+    assert first["rates"] == {"words.emitted": 5.0}
+    assert second["counters"] == {"words.emitted": 14}
+    assert second["rates"] == {"words.emitted": 2.0}
+
+
+def spin(done):
+    while not done.is_set():
+        pass
+
+
+def test_sampler_writes_folded_stacks(tmp_path):
+    done = threading.Event()
+    worker = threading.Thread(target=spin, args=(done,), name="worker", daemon=True)
+    worker.start()
+    sampler = StackSampler("bridge", str(tmp_path), interval=0.001)
+    try:
+        assert sampler.start()
+        assert not sampler.start()
+        assert sampler.active
+        time.sleep(0.05)
+        path, folded = sampler.stop()
+    finally:
+        done.set()
+        worker.join()
+    assert not sampler.active
+    assert sampler.stop() is None
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == folded
+    lines = folded.splitlines()
+    assert lines and all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    # One "thread;outer;...;inner count" line per stack, thread name first
+    assert any(line.startswith("worker;") and "test_runtime_stats.py:spin" in line for line in lines)
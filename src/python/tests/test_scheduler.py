@@ -0,0 +1,165 @@
+import time
+
+import tracing
+from backends import RecordingBackend
+from controller_state import ControllerState, NEUTRAL_REPORT
+from keymap_compiler import load_program
+from scheduler import ActionScheduler, Playback
+from queue_policy import PRIORITY_LOW, PRIORITY_NORMAL, PRIORITY_HIGH
+
+A = 0x1000
+B = 0x2000
+
+
+HOLD_A = ["pressXUSB_GAMEPAD_A", 1.0, "releaseXUSB_GAMEPAD_A"]
+
+
+def capture_stages(monkeypatch, events):
+    monkeypatch.setattr(tracing, "emit", lambda trace_id, stage, *args, **kwargs: events.append((stage, trace_id)))
+
+
+def test_first_report_waits_for_a_report_deferred_by_the_rate_cap(monkeypatch):
+    events = []
+    capture_stages(monkeypatch, events)
+    state = ControllerState(lambda report: events.append(("send", report)), max_rate_hz=20)
+    scheduler = ActionScheduler(state)
+    scheduler.start()
+    try:
+        scheduler.submit(load_program(["pressXUSB_GAMEPAD_A", 0.2, "releaseXUSB_GAMEPAD_A"]), trace="t1")
+        time.sleep(0.005)
+        scheduler.submit(load_program(["pressXUSB_GAMEPAD_B", 0.2, "releaseXUSB_GAMEPAD_B"]), trace="t2")
+        time.sleep(0.1)
+    finally:
+        scheduler.stop()
+    sends = [i for i, event in enumerate(events) if event[0] == "send"]
+    assert events.index(("first_report", "t1")) > sends[0]
+    # t2's press is held back ~50 ms by the rate cap: its stage follows the report that carries it
+    assert events[sends[1]][1][0] == A | B
+    assert events.index(("first_report", "t2")) > sends[1]
+
+
+def test_first_report_of_a_program_that_starts_with_a_wait(monkeypatch):
+    events = []
+    capture_stages(monkeypatch, events)
+    state = ControllerState(lambda report: events.append(("send", report)))
+    scheduler = ActionScheduler(state)
+    scheduler.start()
+    try:
+        scheduler.submit(load_program([0.03, "pressXUSB_GAMEPAD_A", 0.01, "releaseXUSB_GAMEPAD_A"]), trace="t1")
+        time.sleep(0.01)
+        assert ("first_report", "t1") not in events
+        time.sleep(0.1)
+    finally:
+        scheduler.stop()
+    assert events.index(("first_report", "t1")) > events.index(("send", (A,) + NEUTRAL_REPORT[1:]))
+    assert events.count(("first_report", "t1")) == 1
+
+
+def test_wait_reported_returns_once_release_all_has_been_sent():
+    sent = []
+    state = ControllerState(sent.append, max_rate_hz=20)
+    scheduler = ActionScheduler(state)
+    scheduler.start()
+    try:
+        scheduler.submit(load_program(["pressXUSB_GAMEPAD_A", 1.0, "releaseXUSB_GAMEPAD_A"]))
+        time.sleep(0.01)
+        assert scheduler.release_all() == 1
+        # The neutral report is held back ~50 ms by the rate cap
+        assert scheduler.wait_reported(timeout=1.0)
+        assert sent[-1] == NEUTRAL_REPORT
+    finally:
+        scheduler.stop()
+
+
+def test_higher_priority_claim_preempts_and_lower_priority_is_refused():
+    sent, finished = [], []
+    scheduler = ActionScheduler(ControllerState(sent.append))
+    scheduler.on_finished = finished.extend
+    scheduler.start()
+    try:
+        assert scheduler.submit(load_program(HOLD_A), PRIORITY_LOW, tag="low") is not None
+        time.sleep(0.01)
+        assert scheduler.submit(load_program(HOLD_A), PRIORITY_HIGH, tag="high") is not None
+        # The running high-priority hold can't be taken over by a lower class
+        assert scheduler.submit(load_program(HOLD_A), PRIORITY_NORMAL, tag="normal") is None
+        time.sleep(0.01)
+        assert scheduler.active_count() == 1
+        assert scheduler.preempted == 1
+    finally:
+        scheduler.stop()
+    assert [(tag, completed) for tag, completed, _, _ in finished] == [("low", False)]
+    assert sent[-1][0] == A
+
+
+def test_equal_priority_claim_preempts_and_rests_unclaimed_inputs():
+    sent = []
+    scheduler = ActionScheduler(ControllerState(sent.append))
+    scheduler.start()
+    try:
+        scheduler.submit(load_program(["pressXUSB_GAMEPAD_A", "pressXUSB_GAMEPAD_B", 1.0,
+                                       "releaseXUSB_GAMEPAD_A", "releaseXUSB_GAMEPAD_B"]))
+        time.sleep(0.01)
+        assert sent[-1][0] == A | B
+        scheduler.submit(load_program(HOLD_A))
+        time.sleep(0.01)
+    finally:
+        scheduler.stop()
+    # B belonged only to the preempted playback, so it is released
+    assert sent[-1][0] == A
+
+
+def recording_scheduler():
+    backend = RecordingBackend()
+    scheduler = ActionScheduler(ControllerState(backend.send, max_rate_hz=0))
+    return scheduler, backend
+
+
+def buttons(backend):
+    return [report[0] for _, report in backend.reports]
+
+
+def test_steps_play_in_deadline_order():
+    scheduler, backend = recording_scheduler()
+    scheduler.start()
+    try:
+        scheduler.submit(load_program([0.04, "pressXUSB_GAMEPAD_A"]))
+        scheduler.submit(load_program([0.01, "pressXUSB_GAMEPAD_B"]))
+        time.sleep(0.1)
+    finally:
+        scheduler.stop()
+    # B was submitted last but is due first
+    assert buttons(backend) == [B, A | B]
+    assert backend.reports[1][0] - backend.reports[0][0] >= 0.02
+
+
+def test_claim_refuses_a_lower_priority_claimant():
+    scheduler, _ = recording_scheduler()
+    program = load_program(HOLD_A)
+    high = Playback(1, program, 0.0, PRIORITY_HIGH)
+    low = Playback(2, program, 0.0, PRIORITY_LOW)
+    with scheduler._cond:
+        assert scheduler._claim(high)
+        assert not scheduler._claim(low)
+        assert scheduler._owners == {A: high}
+    assert not high.cancelled
+    assert scheduler.preempted == 0
+
+
+def test_cancel_all_rests_running_inputs_and_release_all_zeroes_the_rest():
+    scheduler, backend = recording_scheduler()
+    scheduler.start()
+    try:
+        # B is left pressed by a finished playback; A is held by a running one
+        scheduler.submit(load_program(["pressXUSB_GAMEPAD_B"]))
+        scheduler.submit(load_program(HOLD_A))
+        time.sleep(0.01)
+        assert buttons(backend)[-1] == A | B
+        assert scheduler.cancel_all() == 1
+        assert scheduler.wait_reported(timeout=1.0)
+        assert buttons(backend)[-1] == B
+        assert scheduler.active_count() == 0
+        assert scheduler.release_all() == 0
+        assert scheduler.wait_reported(timeout=1.0)
+        assert backend.reports[-1][1] == NEUTRAL_REPORT
+    finally:
+        scheduler.stop()
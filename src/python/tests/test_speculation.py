@@ -0,0 +1,68 @@
+from phrase_resolver import KIND_ACTION, KIND_COMMAND, profile_phrases
+from speculation import Speculator, ROLLBACK_COMMAND, MAX_OPEN_UTTERANCES
+
+PROFILE = {"keywords": [
+    {"keyword": "jump", "keymap": ["pressXUSB_GAMEPAD_A"]},
+    {"keyword": "kick", "keymap": ["pressXUSB_GAMEPAD_B"]},
+    {"keyword": "block", "keymap": ["pressXUSB_GAMEPAD_X"]},
+]}
+
+
+def make_speculator(min_confidence=0.8):
+    fired = []
+    speculator = Speculator(profile_phrases(PROFILE, []),
+                            lambda kind, target_id, utterance_id: fired.append((kind, target_id, utterance_id)),
+                            min_confidence)
+    return speculator, fired
+
+
+def test_confident_partial_fires_once_and_the_final_confirms_it():
+    speculator, fired = make_speculator()
+    speculator.partial("u1", [("jump", 0.95)])
+    speculator.partial("u1", [("jump", 0.95)])
+    assert fired == [(KIND_ACTION, "jump", "u1")]
+    speculator.final("u1", ["jump"])
+    assert fired == [(KIND_ACTION, "jump", "u1")]
+    assert (speculator.speculated, speculator.confirmed, speculator.rollbacks) == (1, 1, 0)
+
+
+def test_unconfident_partial_waits_for_the_final():
+    speculator, fired = make_speculator()
+    speculator.partial("u1", [("jump", 0.95), ("kick", 0.5)])
+    assert fired == []
+    speculator.final("u1", ["jump", "kick"])
+    assert [target for _, target, _ in fired] == ["jump", "kick"]
+    assert speculator.late == 2
+
+
+def test_disagreeing_final_rolls_back_and_fires_what_it_says():
+    speculator, fired = make_speculator()
+    speculator.partial("u1", [("jump", 0.9)])
+    speculator.final("u1", ["block"])
+    assert fired == [(KIND_ACTION, "jump", "u1"), (KIND_COMMAND, ROLLBACK_COMMAND, "u1"),
+                     (KIND_ACTION, "block", "u1")]
+    assert (speculator.cancelled, speculator.rollbacks, speculator.hit_rate) == (1, 1, 0.0)
+
+
+def test_partial_that_contradicts_what_was_fired_is_ignored():
+    speculator, fired = make_speculator()
+    speculator.partial("u1", [("jump", 0.9)])
+    speculator.partial("u1", [("kick", 0.9)])
+    assert fired == [(KIND_ACTION, "jump", "u1")]
+
+
+def test_partial_with_an_unmatched_word_fires_nothing():
+    speculator, fired = make_speculator()
+    speculator.partial("u1", [("jump", 0.95), (None, 0.0)])
+    assert fired == []
+
+
+def test_abandoned_utterances_are_forgotten():
+    speculator, fired = make_speculator()
+    for i in range(MAX_OPEN_UTTERANCES + 3):
+        speculator.partial(f"u{i}", [("jump", 0.95)])
+    assert len(speculator._fired) == MAX_OPEN_UTTERANCES
+    assert "u0" not in speculator._fired
+    # The newest one is still reconciled with its final
+    speculator.final(f"u{MAX_OPEN_UTTERANCES + 2}", ["jump"])
+    assert speculator.confirmed == 1
@@ -0,0 +1,88 @@
+import argparse
+import importlib
+import io
+import json
+import sys
+import types
+
+import pytest
+
+import profile_cache
+from endpointing import Endpointer, NoiseCalibrator
+from runtime_stats import StackSampler
+from stream_diff import UtteranceDiffer
+from vocabulary import DEFAULT_SYNONYMS_PATH
+
+PROFILE = {"keywords": [{"keyword": "jump", "keymap": ["pressXUSB_GAMEPAD_A"]}]}
+
+
+@pytest.fixture
+def stub(monkeypatch, tmp_path):
+    """speech_stub with fresh globals, as main() sets them up, but no recorder (RealtimeSTT isn't needed)."""
+    monkeypatch.setitem(sys.modules, "RealtimeSTT", types.SimpleNamespace(AudioToTextRecorder=None))
+    monkeypatch.delitem(sys.modules, "speech_stub", raising=False)
+    module = importlib.import_module("speech_stub")
+    cache_dir = str(tmp_path / "cache")
+    monkeypatch.setattr(module, "load_compiled",
+                        lambda path, synonyms: profile_cache.load_compiled(path, synonyms, cache_dir))
+    module.options = argparse.Namespace(input=None, synonyms=DEFAULT_SYNONYMS_PATH, min_confidence=0.6,
+                                        ambiguity_margin=0.05, resolve=True, speculate=False, no_early_fire=False)
+    module.differ = UtteranceDiffer(lambda *args: None, iter(range(1000)).__next__)
+    module.endpointer = Endpointer(None, None, 0.3, 0.2, 0.1, 0.5)
+    module.calibrator = NoiseCalibrator(lambda *args: None, 0.0)
+    module.sampler = StackSampler("speech", str(tmp_path))
+    yield module
+    module.sampler.stop()
+
+
+def feed(stub, monkeypatch, *messages):
+    lines = [m if isinstance(m, str) else json.dumps(m) for m in messages]
+    monkeypatch.setattr(sys, "stdin", io.StringIO("\n".join(lines) + "\n"))
+    stub.control_loop()
+
+
+def test_pause_and_resume(stub, monkeypatch):
+    stub.differ.start()
+    feed(stub, monkeypatch, {"command": "pause"})
+    assert stub.paused.is_set()
+    feed(stub, monkeypatch, {"command": "resume"})
+    assert not stub.paused.is_set()
+    # Resuming starts from a clean state
+    assert stub.differ.utterance_id is None
+
+
+def test_profile_swaps_the_vocabulary_and_resolver(stub, monkeypatch, tmp_path):
+    profile = tmp_path / "profile.json"
+    profile.write_text(json.dumps(PROFILE), encoding="utf-8")
+    feed(stub, monkeypatch, {"command": "profile", "path": str(profile)})
+    assert "jump" in stub.vocabulary.words
+    assert stub.resolver is not None
+    feed(stub, monkeypatch, {"command": "profile", "path": None})
+    assert stub.vocabulary is None and stub.resolver is None
+
+
+def test_shutdown_stops_reading(stub, monkeypatch):
+    feed(stub, monkeypatch, {"command": "shutdown"}, {"command": "pause"})
+    assert stub.shutdown_requested.is_set()
+    assert not stub.paused.is_set()
+
+
+def test_end_of_input_is_a_shutdown(stub, monkeypatch):
+    feed(stub, monkeypatch)
+    assert stub.shutdown_requested.is_set()
+
+
+def test_sample_starts_the_profiler_and_a_second_one_stops_it(stub, monkeypatch):
+    feed(stub, monkeypatch, {"command": "sample", "seconds": 60})
+    assert stub.sampler.active
+    feed(stub, monkeypatch, {"command": "sample"})
+    assert not stub.sampler.active
+
+
+def test_unknown_and_malformed_commands_are_rejected(stub, monkeypatch, capsys):
+    feed(stub, monkeypatch, {"command": "explode"}, "{not json", {"command": "pause"})
+    err = capsys.readouterr().err
+    assert "unknown control command: 'explode'" in err
+    assert "bad control line: {not json" in err
+    # Later lines are still handled
+    assert stub.paused.is_set()
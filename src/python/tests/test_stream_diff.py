@@ -0,0 +1,54 @@
+import itertools
+
+from stream_diff import UtteranceDiffer, PARTIAL, FINAL
+
+
+def make_differ(agreement=2):
+    emitted = []
+    ids = (f"u{i}" for i in itertools.count(1))
+    differ = UtteranceDiffer(lambda word, utterance_id, flag: emitted.append((word, utterance_id, flag)),
+                             lambda: next(ids), agreement=agreement)
+    return differ, emitted
+
+
+def test_partial_words_are_emitted_once_when_stable():
+    differ, emitted = make_differ()
+    differ.start()
+    differ.partial(["jump"])
+    assert emitted == []
+    differ.partial(["jump", "kick"])
+    differ.partial(["jump", "kick"])
+    differ.partial(["jump", "kick"])
+    assert emitted == [("jump", "u1", PARTIAL), ("kick", "u1", PARTIAL)]
+
+
+def test_final_emits_only_changed_positions():
+    differ, emitted = make_differ(agreement=1)
+    differ.start()
+    differ.partial(["jump", "kik"])
+    assert differ.final(["jump", "kick", "left"]) == "u1"
+    assert emitted[2:] == [("kick", "u1", FINAL), ("left", "u1", FINAL)]
+    assert differ.utterance_id is None
+
+
+def test_final_diffs_position_by_position():
+    differ, emitted = make_differ(agreement=1)
+    differ.start()
+    differ.partial(["jump", "kik", "left", "block"])
+    differ.final(["jump", "kick", "left", "block", "up"])
+    # Only the corrected word and the new one; "left" and "block" were already right
+    assert emitted[4:] == [("kick", "u1", FINAL), ("up", "u1", FINAL)]
+    assert differ.words_emitted == 6
+
+
+def test_late_final_lands_on_its_sealed_utterance():
+    differ, emitted = make_differ(agreement=1)
+    differ.start()
+    differ.partial(["jump"])
+    differ.seal()
+    differ.start()
+    differ.partial(["block"])
+    # The first recording's final arrives while the second one is open
+    assert differ.final(["jump"]) == "u1"
+    assert differ.final(["block", "up"]) == "u2"
+    assert emitted == [("jump", "u1", PARTIAL), ("block", "u2", PARTIAL), ("up", "u2", FINAL)]
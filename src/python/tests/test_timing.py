@@ -0,0 +1,48 @@
+import time
+
+import pytest
+
+from timing import JitterStats, PrecisionTimer, percentile
+
+
+def test_percentile_of_no_samples_and_of_one():
+    assert percentile([], 50) == 0.0
+    assert percentile([0.25], 50) == 0.25
+    assert percentile([0.25], 99) == 0.25
+    assert percentile([1, 2, 3, 4], 50) == 2
+    assert percentile([1, 2, 3, 4], 99) == 4
+
+
+def test_merge_adds_events_and_reset_clears_them():
+    first, second = JitterStats(), JitterStats()
+    first.record(0.001)
+    second.record(0.003)
+    second.record(0.002)
+    first.merge(second)
+    snapshot = first.snapshot()
+    assert snapshot["count"] == 3
+    assert snapshot["mean_ms"] == pytest.approx(2.0)
+    assert snapshot["max_ms"] == pytest.approx(3.0)
+    assert second.count == 2
+    first.reset()
+    assert first.snapshot() == {"count": 0, "mean_ms": 0.0, "p50_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+
+
+@pytest.mark.parametrize("spin_budget", [0.0, 0.002])
+def test_sleep_until_returns_at_or_after_the_deadline(spin_budget):
+    timer = PrecisionTimer(spin_budget=spin_budget)
+    deadline = time.perf_counter() + 0.005
+    overshoot = timer.sleep_until(deadline)
+    assert time.perf_counter() >= deadline
+    assert overshoot >= 0.0
+    assert timer.stats.count == 1
+
+
+def test_record_dispatch_updates_the_stats():
+    now = [10.0]
+    timer = PrecisionTimer(clock=lambda: now[0])
+    assert timer.record_dispatch(9.996) == pytest.approx(0.004)
+    assert timer.record_dispatch(10.0) == 0.0
+    snapshot = timer.stats.snapshot()
+    assert snapshot["count"] == 2
+    assert snapshot["max_ms"] == pytest.approx(4.0)
@@ -0,0 +1,59 @@
+import json
+
+from vocabulary import (
+    ALIAS_CONFIDENCE, EXACT_CONFIDENCE, MAX_PROMPT_CHARS, RESERVED_COMMANDS,
+    Vocabulary, _word_aliases, load_vocabulary, profile_vocabulary,
+)
+
+PROFILE = {"keywords": [{"keyword": "Hard Up"}, {"keyword": "jump"}, {"keyword": ""}]}
+SYNONYMS = [
+    {"keyword_match": "hard up", "synonym_words": ["heart up", "hard cup", "hardup"]},
+    {"keyword_match": "jump", "synonym_words": ["dump"]},
+    {"keyword_match": "unknown", "synonym_words": ["nope"]},
+]
+
+
+def test_word_aliases_line_up_word_for_word():
+    aliases = _word_aliases(SYNONYMS, {"hard", "up", "jump"})
+    # "hardup" has a different word count; "unknown" isn't a vocabulary word
+    assert aliases == {"heart": "hard", "cup": "up", "dump": "jump"}
+
+
+def test_reserved_commands_are_in_every_profile_vocabulary():
+    assert RESERVED_COMMANDS == {"release all": "release_all"}
+    phrases, aliases = profile_vocabulary(PROFILE, SYNONYMS)
+    assert phrases == ["hard up", "jump", "release all"]
+    vocabulary = Vocabulary(phrases, aliases)
+    assert vocabulary.match("release") == ("release", EXACT_CONFIDENCE)
+    assert vocabulary.constrain(["release", "all"]) == ["release", "all"]
+    assert "release all" in vocabulary.prompt()
+
+
+def test_match_and_constrain():
+    phrases, aliases = profile_vocabulary(PROFILE, SYNONYMS)
+    vocabulary = Vocabulary(phrases, aliases)
+    assert vocabulary.match("jump") == ("jump", EXACT_CONFIDENCE)
+    assert vocabulary.match("heart") == ("hard", ALIAS_CONFIDENCE)
+    assert vocabulary.match("xylophone")[0] is None
+    assert vocabulary.constrain(["heart", "xylophone", "up"]) == ["hard", "up"]
+    assert (vocabulary.matched, vocabulary.rejected) == (2, 1)
+    assert vocabulary.confidence["hard"] == ALIAS_CONFIDENCE
+
+
+def test_prompt_puts_new_words_first_and_is_truncated():
+    vocabulary = Vocabulary(["hard up", "up", "jump"])
+    assert vocabulary.prompt() == "hard up, jump, up."
+    long = Vocabulary([f"move {i}" for i in range(500)])
+    prompt = long.prompt()
+    assert len(prompt) <= MAX_PROMPT_CHARS + 1
+    assert prompt.startswith("move 0, move 1") and prompt.endswith(".")
+    # Cut between phrases, never inside one
+    assert all(phrase.startswith("move ") for phrase in prompt[:-1].split(", "))
+
+
+def test_load_vocabulary_without_synonyms(tmp_path):
+    path = tmp_path / "profile.json"
+    path.write_text(json.dumps(PROFILE), encoding="utf-8")
+    vocabulary = load_vocabulary(str(path), synonyms_path=None)
+    assert vocabulary.words == ["all", "hard", "jump", "release", "up"]
+    assert vocabulary.aliases == {}
@@ -0,0 +1,21 @@
+from word_filter import extract_valid_words, is_valid_word, strip_filter_words
+
+
+def test_status_words_are_dropped():
+    assert extract_valid_words("Speak now. Jump, recording!") == ["jump"]
+
+
+def test_glued_status_words_are_stripped_from_long_tokens():
+    assert extract_valid_words("speaknowspeaknowjump") == ["jump"]
+    # Removing "ready" joins "spe" + "aknow" into another status word
+    assert strip_filter_words("spereadyaknowkick") == "kick"
+
+
+def test_short_tokens_containing_a_status_word_are_dropped():
+    assert extract_valid_words("nowhere jump") == ["jump"]
+
+
+def test_word_length_limits_and_punctuation():
+    assert extract_valid_words("a up 3rd x-ray") == ["up", "rd", "xray"]
+    assert not is_valid_word("a" * 21)
+    assert extract_valid_words("   ") == []
@@ -0,0 +1,123 @@
+"""
+Low-jitter timing for the Phonix controller bridge.
+Sleeps coarsely with the OS timer, then spins on perf_counter up to an
+absolute deadline, so short holds land within microseconds of their target
+instead of oversleeping by a varying few milliseconds.
+"""
+import math
+import threading
+import time
+from collections import deque
+
+# Default time before a deadline at which sleeping stops and spinning starts
+DEFAULT_SPIN_BUDGET = 0.002
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list (0.0 if empty)."""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(pct / 100.0 * len(sorted_values)) - 1
+    return sorted_values[max(0, min(len(sorted_values) - 1, rank))]
+
+
+class JitterStats:
+    """
+    Overshoot of timed events past their deadline, in seconds.
+    Totals cover every event; percentiles cover the most recent window.
+    """
+
+    def __init__(self, window: int = 4096):
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, overshoot: float):
+        with self._lock:
+            self._recent.append(overshoot)
+            self.count += 1
+            self.total += overshoot
+            if overshoot > self.max:
+                self.max = overshoot
+
+    def snapshot(self) -> dict:
+        """Summary in milliseconds: count, mean, p50, p99, max."""
+        with self._lock:
+            recent = sorted(self._recent)
+            count = self.count
+            total = self.total
+            worst = self.max
+        return {
+            "count": count,
+            "mean_ms": (total / count * 1000.0) if count else 0.0,
+            "p50_ms": percentile(recent, 50) * 1000.0,
+            "p99_ms": percentile(recent, 99) * 1000.0,
+            "max_ms": worst * 1000.0,
+        }
+
+    def merge(self, other: "JitterStats"):
+        """Add another instance's events to this one, e.g. to summarise several pads together."""
+        with other._lock:
+            recent = list(other._recent)
+            count, total, worst = other.count, other.total, other.max
+        with self._lock:
+            self._recent.extend(recent)
+            self.count += count
+            self.total += total
+            self.max = max(self.max, worst)
+
+    def reset(self):
+        with self._lock:
+            self._recent.clear()
+            self.count = 0
+            self.total = 0.0
+            self.max = 0.0
+
+
+class PrecisionTimer:
+    """
+    Waits until absolute perf_counter deadlines.
+
+    spin_budget is how long before the deadline to stop sleeping and start
+    spinning; 0 gives plain sleep behaviour. Every wait's overshoot is
+    recorded in self.stats.
+    """
+
+    def __init__(self, spin_budget: float = DEFAULT_SPIN_BUDGET, clock=time.perf_counter):
+        self.spin_budget = max(0.0, spin_budget)
+        self.clock = clock
+        self.stats = JitterStats()
+
+    def coarse_delay(self, deadline: float) -> float:
+        """How long it's safe to block (sleep / Condition.wait) before spinning; <= 0 means spin now."""
+        return deadline - self.clock() - self.spin_budget
+
+    def spin_until(self, deadline: float) -> float:
+        """Busy-wait to deadline without sleeping. Returns the current time."""
+        clock = self.clock
+        now = clock()
+        while now < deadline:
+            now = clock()
+        return now
+
+    def sleep_until(self, deadline: float) -> float:
+        """Sleep coarsely, then spin to deadline. Records and returns the overshoot in seconds."""
+        delay = self.coarse_delay(deadline)
+        if delay > 0:
+            time.sleep(delay)
+        now = self.spin_until(deadline) if self.spin_budget else self.clock()
+        overshoot = now - deadline
+        self.stats.record(overshoot)
+        return overshoot
+
+    def sleep(self, duration: float) -> float:
+        """Relative version of sleep_until."""
+        return self.sleep_until(self.clock() + duration)
+
+    def record_dispatch(self, deadline: float) -> float:
+        """Record how late an event was dispatched relative to its deadline."""
+        overshoot = self.clock() - deadline
+        self.stats.record(overshoot)
+        return overshoot
@@ -0,0 +1,156 @@
+"""
+End-to-end latency tracing for Phonix.
+Every utterance gets a trace ID that travels with its words from the
+speech process, through the Electron parser, to the controller bridge.
+Each stage logs a structured stats line:
+
+    [stats] {"trace": "p1234-7", "stage": "word_emitted", "t": 1700000000123.456}
+
+"t" is epoch milliseconds taken from a monotonic clock anchored to the wall
+clock at startup, so stamps never go backwards within a process and line up
+across processes on the same machine.
+
+Collect the output of a session (Electron console, or each process's stderr)
+and print per-stage latency histograms with:
+
+    python tracing.py report session.log [more.log ...]
+"""
+import sys
+import os
+import json
+import time
+import argparse
+import itertools
+import re
+
+from timing import percentile
+
+# Pipeline stages in order; latencies are reported between consecutive stages
+STAGES = (
+    "speech_start",       # VAD started a recording (speech process)
+    "first_partial",      # first realtime transcription update (speech process)
+    "word_emitted",       # word printed to stdout (speech process)
+    "word_received",      # word line read by the host (Electron)
+    "phrase_matched",     # a profile phrase matched (Electron parser, or the speech process with --resolve)
+    "action_received",    # resolved action line read by the host (Electron, --resolve only)
+    "keymap_dispatched",  # bridge submitted the keymap to the scheduler
+    "first_report",       # first controller report of that keymap sent to the driver
+    "action_done",        # keymap finished playing (host, from the bridge's done frame)
+)
+
+# Histogram bucket upper bounds in milliseconds
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, float("inf"))
+
+_ANCHOR_MS = time.time() * 1000.0 - time.perf_counter() * 1000.0
+_ids = itertools.count(1)
+_prefix = f"p{os.getpid()}"
+
+STATS_PATTERN = re.compile(r"\[stats\] (\{.*\})")
+
+
+def now_ms() -> float:
+    """Monotonic time in epoch milliseconds (comparable across local processes)."""
+    return _ANCHOR_MS + time.perf_counter() * 1000.0
+
+
+def new_trace_id() -> str:
+    """A trace ID unique across processes on this machine."""
+    return f"{_prefix}-{next(_ids)}"
+
+
+def emit(trace_id: str, stage: str, t: float = None, stream=None):
+    """Print one stats line for a trace stage (to stderr by default)."""
+    record = {"trace": trace_id, "stage": stage, "t": round(now_ms() if t is None else t, 3)}
+    print(f"[stats] {json.dumps(record)}", file=stream or sys.stderr, flush=True)
+
+
+def parse_stats_lines(lines):
+    """Yield stats records found anywhere in log lines (prefixes like '[ControllerBridge python ERR]' are fine)."""
+    for line in lines:
+        for match in STATS_PATTERN.finditer(line):
+            try:
+                record = json.loads(match.group(1))
+            except json.JSONDecodeError:
+                continue
+            if "trace" in record and "stage" in record and "t" in record:
+                yield record
+
+
+def collect_traces(records) -> dict:
+    """{trace_id: {stage: first time seen}}."""
+    traces = {}
+    for record in records:
+        stages = traces.setdefault(record["trace"], {})
+        t = float(record["t"])
+        if record["stage"] not in stages or t < stages[record["stage"]]:
+            stages[record["stage"]] = t
+    return traces
+
+
+def stage_latencies(traces: dict) -> dict:
+    """
+    Latency samples per hop, keyed "from -> to". Each stage is measured from
+    the closest earlier stage present in the same trace, plus an end-to-end
+    hop from the first to the last stage recorded.
+    """
+    hops = {}
+    for stages in traces.values():
+        present = [s for s in STAGES if s in stages]
+        for prev, cur in zip(present, present[1:]):
+            hops.setdefault(f"{prev} -> {cur}", []).append(stages[cur] - stages[prev])
+        if len(present) > 2:
+            hops.setdefault(f"{present[0]} -> {present[-1]} (total)", []).append(stages[present[-1]] - stages[present[0]])
+    return hops
+
+
+def histogram(samples: list) -> list:
+    """Counts per BUCKETS_MS bucket."""
+    counts = [0] * len(BUCKETS_MS)
+    for value in samples:
+        for i, bound in enumerate(BUCKETS_MS):
+            if value <= bound:
+                counts[i] += 1
+                break
+    return counts
+
+
+def print_report(hops: dict, stream=None):
+    out = stream or sys.stdout
+    if not hops:
+        print("no [stats] trace lines found", file=out)
+        return
+    order = {f"{a} -> {b}": i for i, (a, b) in enumerate(zip(STAGES, STAGES[1:]))}
+    for hop in sorted(hops, key=lambda h: (h.endswith("(total)"), order.get(h, len(order)), h)):
+        samples = sorted(hops[hop])
+        print(f"{hop}: n={len(samples)} p50={percentile(samples, 50):.1f} ms "
+              f"p90={percentile(samples, 90):.1f} ms p99={percentile(samples, 99):.1f} ms max={samples[-1]:.1f} ms", file=out)
+        counts = histogram(samples)
+        peak = max(counts) or 1
+        lower = 0
+        for bound, count in zip(BUCKETS_MS, counts):
+            label = f"> {lower} ms" if bound == float("inf") else f"<= {bound} ms"
+            if count:
+                print(f"    {label:>10} {count:>6} {'#' * max(1, round(count / peak * 40))}", file=out)
+            lower = bound
+        print(file=out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Phonix latency trace tools")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    report = sub.add_parser("report", help="per-stage latency histograms from session logs")
+    report.add_argument("logs", nargs="*", help="log files (default: stdin)")
+    args = parser.parse_args()
+
+    if args.logs:
+        records = []
+        for path in args.logs:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                records.extend(parse_stats_lines(f))
+    else:
+        records = list(parse_stats_lines(sys.stdin))
+    print_report(stage_latencies(collect_traces(records)))
+
+
+if __name__ == "__main__":
+    main()
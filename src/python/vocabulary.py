@@ -0,0 +1,142 @@
+"""
+Profile vocabulary for the Phonix speech process.
+A session only cares about the words in the loaded profile's keywords, so
+with a profile the speech process biases Whisper toward them (initial
+prompt) and snaps every transcribed word to its best in-vocabulary match
+(see keyword_index.py) with a confidence score, dropping words that match
+nothing well enough.
+"""
+import os
+import json
+
+from keyword_index import build_index, DEFAULT_THRESHOLD, DEFAULT_AMBIGUITY_MARGIN
+
+DEFAULT_SYNONYMS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "profiles", "synonyms", "synonyms.json")
+RESERVED_PHRASES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "reserved_phrases.json")
+
+EXACT_CONFIDENCE = 1.0
+ALIAS_CONFIDENCE = 0.9
+DEFAULT_MIN_CONFIDENCE = DEFAULT_THRESHOLD
+
+# Whisper reads at most ~224 prompt tokens; stay well under that
+MAX_PROMPT_CHARS = 600
+
+
+def load_reserved_commands(path: str = RESERVED_PHRASES_PATH) -> dict:
+    """
+    Reserved phrase -> bridge command, from the table the host reads too
+    (src/electron/backend/reservedPhrases.ts). Reserved phrases are always
+    in the vocabulary.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        entries = json.load(f).get("reserved_phrases", [])
+    return {entry["phrase"].lower().strip(): entry["command"] for entry in entries}
+
+
+RESERVED_COMMANDS = load_reserved_commands()
+
+
+class Vocabulary:
+    """
+    The words of a profile's keywords, plus optional single-word aliases taken
+    from the synonyms table (e.g. "heart" -> "hard" from "heart up" -> "hard up").
+    Other words go through the phonetic/fuzzy index.
+    """
+
+    def __init__(self, phrases: list, aliases: dict = None, min_confidence: float = DEFAULT_MIN_CONFIDENCE,
+                 ambiguity_margin: float = DEFAULT_AMBIGUITY_MARGIN, index=None):
+        self.phrases = list(dict.fromkeys(phrases))
+        self.words = sorted({word for phrase in self.phrases for word in phrase.split()})
+        self._word_set = set(self.words)
+        self.aliases = {a: w for a, w in (aliases or {}).items() if w in self._word_set and a not in self._word_set}
+        self.min_confidence = min_confidence
+        # A prebuilt index (e.g. from the compiled profile cache) must cover exactly self.words
+        self.index = index or build_index(tuple(self.words), min_confidence, ambiguity_margin)
+        self._cache = {}
+        self.confidence = {}  # last confidence per emitted canonical word
+        self.matched = 0
+        self.rejected = 0
+
+    def match(self, word: str):
+        """(best vocabulary word, confidence); the word is None if nothing reaches min_confidence."""
+        cached = self._cache.get(word)
+        if cached is not None:
+            return cached
+        if word in self._word_set:
+            result = (word, EXACT_CONFIDENCE)
+        elif word in self.aliases:
+            result = (self.aliases[word], ALIAS_CONFIDENCE)
+        else:
+            result = self.index.lookup(word)
+        self._cache[word] = result
+        return result
+
+    def constrain(self, words: list) -> list:
+        """Snap each word to the vocabulary, dropping words without a confident match."""
+        snapped = []
+        for word in words:
+            canonical, score = self.match(word)
+            if canonical is None:
+                self.rejected += 1
+                continue
+            self.matched += 1
+            self.confidence[canonical] = score
+            snapped.append(canonical)
+        return snapped
+
+    def prompt(self) -> str:
+        """
+        Initial prompt listing the profile's phrases, to bias decoding toward
+        them. Phrases that add new words go first, so a long profile's
+        repetitive combinations are what gets cut at MAX_PROMPT_CHARS.
+        """
+        seen = set()
+        novel, repeats = [], []
+        for phrase in self.phrases:
+            words = phrase.split()
+            (repeats if seen.issuperset(words) else novel).append(phrase)
+            seen.update(words)
+        text = ""
+        for phrase in novel + repeats:
+            candidate = f"{text}, {phrase}" if text else phrase
+            if len(candidate) > MAX_PROMPT_CHARS:
+                break
+            text = candidate
+        return text + "."
+
+
+def _word_aliases(synonyms: list, words: set) -> dict:
+    """Single-word aliases from synonym entries whose phrases line up word for word."""
+    aliases = {}
+    for entry in synonyms:
+        target = entry.get("keyword_match", "").lower().split()
+        for synonym in entry.get("synonym_words", []):
+            source = synonym.lower().split()
+            if len(source) != len(target):
+                continue
+            for alias, word in zip(source, target):
+                if alias != word and word in words:
+                    aliases.setdefault(alias, word)
+    return aliases
+
+
+def profile_vocabulary(profile: dict, synonyms: list) -> tuple:
+    """(phrases, aliases) of a parsed profile and synonyms table, as a Vocabulary takes them."""
+    phrases = [entry["keyword"].lower().strip() for entry in profile.get("keywords", []) if entry.get("keyword")]
+    phrases.extend(RESERVED_COMMANDS)
+    words = {word for phrase in phrases for word in phrase.split()}
+    return phrases, _word_aliases(synonyms, words)
+
+
+def load_vocabulary(profile_path: str, synonyms_path: str = DEFAULT_SYNONYMS_PATH,
+                    min_confidence: float = DEFAULT_MIN_CONFIDENCE,
+                    ambiguity_margin: float = DEFAULT_AMBIGUITY_MARGIN) -> Vocabulary:
+    """Build the vocabulary for a profile JSON ({"keywords": [{"keyword": ...}]}); synonyms_path=None skips aliases."""
+    with open(profile_path, "r", encoding="utf-8") as f:
+        profile = json.load(f)
+    synonyms = []
+    if synonyms_path and os.path.exists(synonyms_path):
+        with open(synonyms_path, "r", encoding="utf-8") as f:
+            synonyms = json.load(f).get("synonyms", [])
+    phrases, aliases = profile_vocabulary(profile, synonyms)
+    return Vocabulary(phrases, aliases, min_confidence, ambiguity_margin)
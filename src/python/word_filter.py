@@ -0,0 +1,61 @@
+"""
+Status-word filtering for the Phonix speech process.
+RealtimeSTT status text ("speak now", "recording", ...) can leak into
+transcriptions, sometimes glued into long tokens like "speaknowspeaknowjump".
+FILTER_WORDS is compiled once into a single regex, so each token is checked
+or cleaned in one linear scan instead of one str scan per filter word.
+"""
+import re
+
+# Words/phrases to filter out (status messages, not actual transcriptions)
+FILTER_WORDS = {
+    "speak", "now", "speaknow",  # Handle both separate and concatenated
+    "recording", "transcribing", "listening",
+    "ready", "model", "loaded", "error", "warning"
+}
+
+# Tokens longer than this are treated as possible status-word concatenations and cleaned
+CONCAT_THRESHOLD = 14
+MIN_WORD_LENGTH = 2
+MAX_WORD_LENGTH = 20
+
+# Longest alternatives first, so "speaknow" is removed as one match rather than "speak" + "now"
+FILTER_PATTERN = re.compile("|".join(re.escape(w) for w in sorted(FILTER_WORDS, key=len, reverse=True)))
+# Everything except letters and whitespace (digits and "_" are word characters, so list them explicitly)
+_NON_LETTERS = re.compile(r"[^\w\s]|[\d_]")
+
+
+def strip_filter_words(token: str) -> str:
+    """
+    Remove every status word from a token. Removing one can join the pieces
+    around it into another (e.g. "spe" + "ready" + "aknow"), so repeat until
+    nothing matches; realistic tokens settle in one or two passes.
+    """
+    while True:
+        cleaned = FILTER_PATTERN.sub("", token)
+        if cleaned == token:
+            return cleaned
+        token = cleaned
+
+
+def is_valid_word(word: str) -> bool:
+    """Check if a word is a valid transcription (not a status message)."""
+    return MIN_WORD_LENGTH <= len(word) <= MAX_WORD_LENGTH and FILTER_PATTERN.search(word) is None
+
+
+def extract_valid_words(text: str) -> list[str]:
+    """
+    Extract valid words from text, filtering out status messages.
+    Long tokens have glued-on status words stripped; any other token that
+    contains a status word is dropped.
+    """
+    if not text or not text.strip():
+        return []
+
+    valid_words = []
+    for word in _NON_LETTERS.sub("", text.lower()).split():
+        if len(word) > CONCAT_THRESHOLD:
+            word = strip_filter_words(word)
+        if is_valid_word(word):
+            valid_words.append(word)
+    return valid_words
@@ -0,0 +1,88 @@
+import { describe, it, expect } from 'vitest';
+import {
+  FrameDecoder,
+  OP_ACKS,
+  OP_ACTIONS,
+  decodeAcks,
+  decodeCommanded,
+  decodeDone,
+  encodeActions,
+  encodeCommand,
+  encodeRegister,
+} from '../electron/backend/ipcFrames.js';
+
+function ackFrame(records: Array<[number, number, number]>): Buffer {
+  const payload = Buffer.alloc(1 + records.length * 9);
+  payload.writeUInt8(records.length, 0);
+  records.forEach(([seq, status, age], i) => {
+    payload.writeUInt32LE(seq, 1 + i * 9);
+    payload.writeUInt8(status, 5 + i * 9);
+    payload.writeFloatLE(age, 6 + i * 9);
+  });
+  const header = Buffer.alloc(5);
+  header.writeUInt32LE(payload.length + 1, 0);
+  header.writeUInt8(OP_ACKS, 4);
+  return Buffer.concat([header, payload]);
+}
+
+describe('ipcFrames', () => {
+  it('should lay out action records after the frame header', () => {
+    const frame = encodeActions([
+      { seq: 7, keymapId: 3, pad: 2, priority: 1, ts: 1000, trace: 'ab' },
+      { seq: 8, keymapId: 4, priority: 2 },
+    ]);
+    expect(frame.readUInt32LE(0)).toBe(frame.length - 4);
+    expect(frame.readUInt8(4)).toBe(OP_ACTIONS);
+    expect(frame.readUInt8(5)).toBe(2);
+    expect(frame.readUInt32LE(6)).toBe(7);
+    expect(frame.readUInt16LE(10)).toBe(3);
+    expect(frame.readUInt8(12)).toBe(2);
+    expect(frame.readUInt8(13)).toBe(1);
+    expect(frame.readDoubleLE(14)).toBe(1000);
+    expect(frame.subarray(23, 25).toString()).toBe('ab');
+    expect(frame.readUInt32LE(25)).toBe(8);
+    expect(frame.readUInt8(31)).toBe(0);
+    expect(frame.readDoubleLE(33)).toBe(0);
+  });
+
+  it('should refuse more actions than fit in a frame', () => {
+    const actions = Array.from({ length: 256 }, (_, seq) => ({ seq, keymapId: 0, priority: 1 }));
+    expect(() => encodeActions(actions)).toThrow(RangeError);
+  });
+
+  it('should encode keymap registration and commands', () => {
+    const register = encodeRegister([[5, '[["a", 0.1]]']]);
+    expect(register.readUInt16LE(5)).toBe(1);
+    expect(register.readUInt16LE(7)).toBe(5);
+    expect(register.subarray(13).toString()).toBe('[["a", 0.1]]');
+    expect([...encodeCommand('release_all')]).toEqual([2, 0, 0, 0, 3, 1]);
+    expect([...encodeCommand('release_all', 1)]).toEqual([3, 0, 0, 0, 3, 1, 1]);
+    expect([...encodeCommand('sample')]).toEqual([2, 0, 0, 0, 3, 2]);
+  });
+
+  it('should reassemble frames split across chunks', () => {
+    const stream = Buffer.concat([ackFrame([[1, 0, 2.5]]), ackFrame([[2, 3, NaN]])]);
+    const decoder = new FrameDecoder();
+    expect(decoder.push(stream.subarray(0, 3))).toEqual([]);
+    const first = decoder.push(stream.subarray(3, 16));
+    const rest = decoder.push(stream.subarray(16));
+    expect(first).toHaveLength(1);
+    expect(rest).toHaveLength(1);
+    expect(decodeAcks(first[0].payload)).toEqual([{ seq: 1, status: 0, ageMs: 2.5 }]);
+    expect(decodeAcks(rest[0].payload)).toEqual([{ seq: 2, status: 3, ageMs: null }]);
+  });
+
+  it('should decode done records', () => {
+    const payload = Buffer.alloc(1 + 13);
+    payload.writeUInt8(1, 0);
+    payload.writeUInt32LE(9, 1);
+    payload.writeUInt8(1, 5);
+    payload.writeFloatLE(NaN, 6);
+    payload.writeFloatLE(12.5, 10);
+    expect(decodeDone(payload)).toEqual([{ seq: 9, outcome: 1, startDelayMs: null, playMs: 12.5 }]);
+  });
+
+  it('should decode command acks', () => {
+    expect(decodeCommanded(Buffer.from([1, 3, 1]))).toEqual({ command: 'release_all', cancelled: 259 });
+  });
+});
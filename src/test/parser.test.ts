@@ -1,10 +1,11 @@
 import { describe, it, expect, beforeEach, vi } from 'vitest';
-import { handleWord } from '../electron/backend/parser.js';
+import { handleWord, handleAction, handleCommand } from '../electron/backend/parser.js';
 import { AppState } from '../electron/backend/state.js';
 
 // Mock the controller bridge
 vi.mock('../electron/backend/controllerBridge.js', () => ({
   sendActionToController: vi.fn(),
+  sendCommandToController: vi.fn(),
 }));
 
 describe('Parser', () => {
@@ -12,6 +13,7 @@ describe('Parser', () => {
     // Reset AppState before each test
     AppState.recentWords = [];
     AppState.mappings = {};
+    AppState.pads = {};
     AppState.isRunning = true;
 
     // Clear all mocks
@@ -61,7 +63,7 @@ describe('Parser', () => {
 
       // Test single word match
       handleWord('jump');
-      expect(sendActionToController).toHaveBeenCalledWith('["space"]');
+      expect(sendActionToController).toHaveBeenCalledWith('["space"]', undefined, undefined);
       expect(AppState.recentWords).toEqual([]); // Should be cleared after match
 
       // Reset mock
@@ -70,7 +72,7 @@ describe('Parser', () => {
       // Test two word phrase match
       handleWord('run');
       handleWord('forward');
-      expect(sendActionToController).toHaveBeenCalledWith('["shift", "w"]');
+      expect(sendActionToController).toHaveBeenCalledWith('["shift", "w"]', undefined, undefined);
       expect(AppState.recentWords).toEqual([]); // Should be cleared after match
     });
 
@@ -87,7 +89,7 @@ describe('Parser', () => {
       handleWord('jump');
 
       // Should match 'triple jump' (2-word phrase) over 'jump' (1-word)
-      expect(sendActionToController).toHaveBeenCalledWith('["space", "space", "space"]');
+      expect(sendActionToController).toHaveBeenCalledWith('["space", "space", "space"]', undefined, undefined);
       expect(AppState.recentWords).toEqual([]);
     });
 
@@ -113,7 +115,61 @@ describe('Parser', () => {
       };
 
       handleWord('JUMP');
-      expect(sendActionToController).toHaveBeenCalledWith('["space"]');
+      expect(sendActionToController).toHaveBeenCalledWith('["space"]', undefined, undefined);
+    });
+
+    it('should pass the trace ID of the matching word to the controller', async () => {
+      const { sendActionToController } = await import('../electron/backend/controllerBridge.js');
+
+      AppState.mappings = {
+        'jump': '["space"]'
+      };
+
+      handleWord('jump', 'p42-1');
+      expect(sendActionToController).toHaveBeenCalledWith('["space"]', 'p42-1', undefined);
+    });
+
+    it('should send phrases addressed to another pad to that pad', async () => {
+      const { sendActionToController } = await import('../electron/backend/controllerBridge.js');
+
+      AppState.mappings = {
+        'jump': '["space"]'
+      };
+      AppState.pads = {
+        'jump': 1
+      };
+
+      handleWord('jump');
+      expect(sendActionToController).toHaveBeenCalledWith('["space"]', undefined, 1);
+    });
+
+    it('should send reserved commands for reserved phrases', async () => {
+      const { sendActionToController, sendCommandToController } = await import('../electron/backend/controllerBridge.js');
+
+      AppState.mappings = {
+        'jump': '["space"]'
+      };
+
+      handleWord('release');
+      handleWord('all');
+
+      expect(sendCommandToController).toHaveBeenCalledWith('release_all');
+      expect(sendActionToController).not.toHaveBeenCalled();
+      expect(AppState.recentWords).toEqual([]);
+    });
+
+    it('should let profile mappings override reserved phrases', async () => {
+      const { sendActionToController, sendCommandToController } = await import('../electron/backend/controllerBridge.js');
+
+      AppState.mappings = {
+        'release all': '["pressXUSB_GAMEPAD_B", 0.1, "releaseXUSB_GAMEPAD_B"]'
+      };
+
+      handleWord('release');
+      handleWord('all');
+
+      expect(sendActionToController).toHaveBeenCalledWith('["pressXUSB_GAMEPAD_B", 0.1, "releaseXUSB_GAMEPAD_B"]', undefined, undefined);
+      expect(sendCommandToController).not.toHaveBeenCalled();
     });
 
     it('should clear only matched words from queue', async () => {
@@ -127,8 +183,38 @@ describe('Parser', () => {
       handleWord('run');
       handleWord('forward');
 
-      expect(sendActionToController).toHaveBeenCalledWith('["shift", "w"]');
+      expect(sendActionToController).toHaveBeenCalledWith('["shift", "w"]', undefined, undefined);
       expect(AppState.recentWords).toEqual(['jump']); // Only unmatched word remains
     });
   });
+
+  describe('handleAction', () => {
+    it('should send the keymap for a resolved action ID', async () => {
+      const { sendActionToController } = await import('../electron/backend/controllerBridge.js');
+
+      AppState.mappings = {
+        'sliding kick': '["pressXUSB_GAMEPAD_B", 0.1, "releaseXUSB_GAMEPAD_B"]'
+      };
+
+      handleAction('sliding kick', 'p42-3');
+      expect(sendActionToController).toHaveBeenCalledWith('["pressXUSB_GAMEPAD_B", 0.1, "releaseXUSB_GAMEPAD_B"]', 'p42-3', undefined);
+      expect(AppState.recentWords).toEqual([]);
+    });
+
+    it('should ignore unknown action IDs', async () => {
+      const { sendActionToController } = await import('../electron/backend/controllerBridge.js');
+
+      handleAction('teleport');
+      expect(sendActionToController).not.toHaveBeenCalled();
+    });
+
+    it('should forward reserved commands', async () => {
+      const { sendCommandToController } = await import('../electron/backend/controllerBridge.js');
+
+      handleCommand('release_all');
+      handleCommand('self_destruct');
+      expect(sendCommandToController).toHaveBeenCalledTimes(1);
+      expect(sendCommandToController).toHaveBeenCalledWith('release_all');
+    });
+  });
 });
\ No newline at end of file
@@ -1,7 +1,7 @@
 import { describe, it, expect, beforeEach, vi } from 'vitest';
 import fs from 'fs';
 import path from 'path';
-import { loadProfileMappings } from '../electron/backend/profileLoader.js';
+import { loadProfileMappings, watchProfileFiles } from '../electron/backend/profileLoader.js';
 import { AppState } from '../electron/backend/state.js';
 
 // Mock fs module
@@ -9,6 +9,8 @@ vi.mock('fs', () => ({
   default: {
     readFileSync: vi.fn(),
     existsSync: vi.fn(),
+    watchFile: vi.fn(),
+    unwatchFile: vi.fn(),
   },
 }));
 
@@ -61,6 +63,27 @@ describe('ProfileLoader', () => {
       });
     });
 
+    it('should load the pad each keyword is addressed to', () => {
+      const mockProfilePath = '/path/to/profile.json';
+      const mockProfileData = {
+        keywords: [
+          { keyword: 'jump', keymap: ['space'] },
+          { keyword: 'block', keymap: ['b'], pad: 1 }
+        ]
+      };
+
+      AppState.profileFilePath = mockProfilePath;
+
+      (fs.readFileSync as any).mockReturnValueOnce(JSON.stringify(mockProfileData));
+      (fs.existsSync as any).mockReturnValue(false);
+
+      loadProfileMappings();
+
+      expect(AppState.pads).toEqual({
+        'block': 1
+      });
+    });
+
     it('should expand mappings with synonyms when synonyms file exists', () => {
       const mockProfilePath = '/path/to/profile.json';
       const mockProfileData = {
@@ -238,4 +261,30 @@ describe('ProfileLoader', () => {
       expect(() => loadProfileMappings()).toThrow();
     });
   });
+
+  describe('watchProfileFiles', () => {
+    it('should call back once per burst of changes and stop on unwatch', () => {
+      vi.useFakeTimers();
+      AppState.profileFilePath = '/path/to/profile.json';
+      const onChange = vi.fn();
+
+      const unwatch = watchProfileFiles(onChange, 100);
+      expect(fs.watchFile).toHaveBeenCalledTimes(2);
+      const listener = (fs.watchFile as any).mock.calls[0][2];
+
+      // Polls that see the same stats are ignored
+      listener({ mtimeMs: 1, size: 10 }, { mtimeMs: 1, size: 10 });
+      vi.advanceTimersByTime(200);
+      expect(onChange).not.toHaveBeenCalled();
+
+      listener({ mtimeMs: 2, size: 10 }, { mtimeMs: 1, size: 10 });
+      listener({ mtimeMs: 3, size: 12 }, { mtimeMs: 2, size: 10 });
+      vi.advanceTimersByTime(200);
+      expect(onChange).toHaveBeenCalledTimes(1);
+
+      unwatch();
+      expect(fs.unwatchFile).toHaveBeenCalledTimes(2);
+      vi.useRealTimers();
+    });
+  });
 });
\ No newline at end of file
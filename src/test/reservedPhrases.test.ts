@@ -0,0 +1,18 @@
+import { describe, it, expect, vi } from 'vitest';
+import { reservedPhrases, warnShadowedReservedPhrases } from '../electron/backend/reservedPhrases.js';
+
+describe('reservedPhrases', () => {
+  it('should read the table shared with the speech process', () => {
+    expect(reservedPhrases()).toEqual({ 'release all': 'release_all' });
+  });
+
+  it('should warn when the profile maps a reserved phrase', () => {
+    const warn = vi.spyOn(console, 'warn').mockImplementation(() => {});
+    warnShadowedReservedPhrases({ 'jump': '["pressXUSB_GAMEPAD_A"]' });
+    expect(warn).not.toHaveBeenCalled();
+    warnShadowedReservedPhrases({ 'release all': '["pressXUSB_GAMEPAD_B"]' });
+    expect(warn).toHaveBeenCalledTimes(1);
+    expect(warn.mock.calls[0][0]).toContain('release all');
+    warn.mockRestore();
+  });
+});